@@ -0,0 +1,263 @@
+"""
+Optional multithreaded csv file reader using the Apache Arrow csv engine (requires pyarrow).
+Reads Custom and Fugro-csv logger files to the same dataframe as pandas.read_csv for the header layouts used by
+the logger file formats. Layouts Arrow cannot read raise an ArrowCSVError so that the pandas parser can be used.
+"""
+
+__author__ = "Craig Dickinson"
+
+import csv
+import io
+import os
+from glob import glob
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+# Csv engines selectable for each logger
+CSV_ENGINES = ["pandas", "pyarrow"]
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class ArrowCSVError(Error):
+    """Exception raised for a csv file that cannot be read with the Arrow csv engine."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def arrow_csv_available():
+    """Return True if pyarrow is installed."""
+
+    return pa_csv is not None
+
+
+def read_csv(file, engine="pandas", **kwargs):
+    """
+    Read a csv file using the requested engine.
+    The pandas parser is used if pyarrow is not installed or the file layout cannot be read with Arrow.
+    """
+
+    if engine == "pyarrow" and arrow_csv_available():
+        try:
+            return read_csv_arrow(file, **kwargs)
+        except ArrowCSVError:
+            if hasattr(file, "seek"):
+                file.seek(0)
+
+    return pd.read_csv(file, **kwargs)
+
+
+def read_csv_arrow(
+    file,
+    sep=",",
+    header="infer",
+    skiprows=None,
+    skip_blank_lines=True,
+    encoding=None,
+    usecols=None,
+    dtype=None,
+    index_col=None,
+):
+    """
+    Read a csv file to a dataframe using the Arrow csv engine, with the pandas.read_csv arguments used for
+    logger files. usecols are column positions.
+    Raises ArrowCSVError if the file layout or data cannot be read with Arrow.
+    """
+
+    if not arrow_csv_available():
+        raise ArrowCSVError("pyarrow is not installed.")
+
+    if header == "infer":
+        header = 0
+    if isinstance(header, list) and len(header) == 1:
+        header = header[0]
+
+    header_rows = [] if header is None else header if isinstance(header, list) else [header]
+    skip_rows = sorted(skiprows) if skiprows else []
+    encoding = encoding or "utf-8"
+
+    if len(sep) != 1:
+        raise ArrowCSVError("Multi-character delimiters are not supported.")
+    if isinstance(file, io.TextIOBase):
+        raise ArrowCSVError("Text streams are not supported.")
+
+    # Arrow reads a single block of rows following the header lines, so the header rows and rows to skip must be
+    # contiguous lines at the top of the file
+    if header_rows and skip_rows and skip_rows[0] < max(header_rows):
+        raise ArrowCSVError("Rows to skip before the header row are not supported.")
+
+    data_start = max(header_rows) + 1 if header_rows else 0
+    while data_start in skip_rows:
+        data_start += 1
+
+    if skip_rows and skip_rows[-1] > data_start:
+        raise ArrowCSVError("Rows to skip within the data are not supported.")
+
+    # Read header lines
+    header_lines = _read_lines(file, data_start, encoding)
+    if len(header_lines) < data_start:
+        raise ArrowCSVError("File is shorter than the header.")
+
+    # pandas doesn't count blank lines when locating the header rows if blank lines are skipped
+    if skip_blank_lines and not all(header_lines):
+        raise ArrowCSVError("Blank header lines are not supported.")
+
+    header_names = [next(csv.reader([header_lines[i]], delimiter=sep)) for i in header_rows]
+    if header_names:
+        # Column names must be unique and not blank to be labelled in the same way as pandas
+        names = header_names[0]
+        if any(not n for row in header_names for n in row) or len(set(names)) != len(names):
+            raise ArrowCSVError("Blank or duplicate column names are not supported.")
+        if any(len(row) != len(names) for row in header_names):
+            raise ArrowCSVError("Header rows of different lengths are not supported.")
+        column_names = names
+    else:
+        column_names = None
+
+    include_columns = None
+    column_types = {}
+    if column_names is not None:
+        if usecols is not None:
+            if max(usecols) >= len(column_names):
+                raise ArrowCSVError("Columns to use not found in file.")
+            include_columns = [column_names[i] for i in sorted(usecols)]
+        if dtype:
+            # Keys may be column positions or names
+            column_types = {
+                column_names[c] if isinstance(c, int) else c: pa.from_numpy_dtype(np.dtype(t))
+                for c, t in dtype.items()
+            }
+    elif usecols is not None or dtype:
+        raise ArrowCSVError("Columns to use are not supported for files without a header row.")
+
+    read_options = pa_csv.ReadOptions(
+        skip_rows=data_start,
+        column_names=column_names,
+        autogenerate_column_names=column_names is None,
+        encoding=encoding,
+    )
+    parse_options = pa_csv.ParseOptions(delimiter=sep, ignore_empty_lines=skip_blank_lines)
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=include_columns,
+        column_types=column_types,
+        strings_can_be_null=True,
+    )
+
+    try:
+        # Read any timestamp, date and time columns as strings, as for pandas (Arrow infers temporal types)
+        temporal_cols = _temporal_columns(file, read_options, parse_options, convert_options)
+        if temporal_cols:
+            column_types.update({c: pa.string() for c in temporal_cols if c not in column_types})
+            convert_options.column_types = column_types
+
+        if hasattr(file, "seek"):
+            file.seek(0)
+        table = pa_csv.read_csv(file, read_options, parse_options, convert_options)
+    except (pa.ArrowException, UnicodeDecodeError) as e:
+        raise ArrowCSVError(f"Arrow csv engine could not read file: {e}")
+
+    df = table.to_pandas()
+
+    # Set column labels as for pandas
+    if column_names is None:
+        df.columns = range(len(df.columns))
+    elif len(header_names) > 1:
+        cols = [column_names.index(c) for c in df.columns]
+        df.columns = pd.MultiIndex.from_arrays([[row[i] for i in cols] for row in header_names])
+
+    if index_col is not None and index_col is not False:
+        if index_col != 0:
+            raise ArrowCSVError("Only the first column can be used as the index.")
+
+        # For a multi-row header the first column header rows label the column levels, as for pandas
+        index_labels = df.columns[0]
+        df = df.set_index(df.columns[0])
+        if len(header_names) > 1:
+            df.columns.names = list(index_labels)
+            df.index.name = None
+
+    return df
+
+
+def _temporal_columns(file, read_options, parse_options, convert_options):
+    """Return the names of the columns Arrow infers as timestamp, date or time types from the first block of a file."""
+
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+    reader = pa_csv.open_csv(file, read_options, parse_options, convert_options)
+    try:
+        return [field.name for field in reader.schema if pa.types.is_temporal(field.type)]
+    finally:
+        reader.close()
+
+
+def _read_lines(file, num_lines, encoding):
+    """Read the first lines of a file path or binary file object, returning the file object to the start."""
+
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            lines = [f.readline() for _ in range(num_lines)]
+    else:
+        file.seek(0)
+        lines = [file.readline() for _ in range(num_lines)]
+        file.seek(0)
+
+    # Drop any byte order mark, as for pandas
+    if encoding.lower().replace("_", "-") in ("utf-8", "utf8"):
+        encoding = "utf-8-sig"
+
+    try:
+        return [line.decode(encoding).rstrip("\r\n") for line in lines if line]
+    except UnicodeDecodeError as e:
+        raise ArrowCSVError(f"Could not decode header: {e}")
+
+
+def benchmark_csv_engines(files, repeat=3, **kwargs):
+    """
+    Compare the time to read a list of csv files with the pandas and Arrow csv engines.
+    :param files: List of csv files
+    :param repeat: Number of times to read the files with each engine (the fastest time is reported)
+    :param kwargs: pandas.read_csv arguments
+    :return: Dictionary of engine and fastest time (seconds) to read all files
+    """
+
+    timings = {}
+    for engine in CSV_ENGINES:
+        if engine == "pyarrow" and not arrow_csv_available():
+            continue
+
+        times = []
+        for _ in range(repeat):
+            t0 = perf_counter()
+            for file in files:
+                read_csv(file, engine=engine, **kwargs)
+            times.append(perf_counter() - t0)
+
+        timings[engine] = min(times)
+
+    return timings
+
+
+if __name__ == "__main__":
+    # Benchmark on the Fugro-csv test data
+    folder = os.path.join(os.path.dirname(__file__), "..", "tests", "test_data", "dd09")
+    test_files = sorted(glob(os.path.join(folder, "*.csv")))
+    fugro_csv_args = dict(header=1, skiprows=[2], skip_blank_lines=False, encoding="latin1")
+
+    for engine, t in benchmark_csv_engines(test_files, repeat=5, **fugro_csv_args).items():
+        print(f"{engine}: {t:.3f} s to read {len(test_files)} files")
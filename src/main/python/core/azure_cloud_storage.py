@@ -3,18 +3,179 @@ Routines to access and stream data from Azure Cloud Storage.
 """
 __author__ = "Craig Dickinson"
 
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import TemporaryFile
 
+import requests
+from azure.common import AzureException, AzureHttpError
 from azure.storage.blob import BlockBlobService
 import os
 
+from core.compressed_files import decompress_stream, is_compressed
+
+# Number of times a failed blob download is retried and the wait (seconds) before the first retry
+# (the wait is doubled for each further retry)
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_BACKOFF = 1.0
+
+# Blobs up to this size (bytes) are streamed into memory; larger blobs are spooled to a temporary file
+IN_MEMORY_BLOB_BYTES = 16 * 1024 * 1024
+
+# Initial number of bytes downloaded from the start of a blob to read its header
+HEADER_BYTES = 65536
+
+# HTTP status code of a range request starting beyond the end of a blob
+INVALID_RANGE_STATUS_CODE = 416
+
+# Number of blobs per listing request (the maximum allowed by the service)
+LISTING_PAGE_SIZE = 5000
+
+# Number of keep-alive connections held by the shared client of an account
+# (enough for the download pool threads of each logger plus the main thread)
+POOL_CONNECTIONS = 16
+
+# HTTP status codes of failed requests that are worth retrying (timeout and throttling - server errors are also retried)
+RETRY_STATUS_CODES = (408, 429)
+
+
+class AzureRequestMetrics(object):
+    """Thread-safe counts and latencies of the requests made by an Azure client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def request_started(self, request=None):
+        self._local.t0 = time.perf_counter()
+
+    def request_completed(self, response=None):
+        t0 = getattr(self._local, "t0", None)
+        if t0 is None:
+            return
+
+        self._local.t0 = None
+        latency = time.perf_counter() - t0
+        is_error = response is not None and response.status >= 400
+        with self._lock:
+            self.requests += 1
+            self.errors += is_error
+            self.total_time += latency
+            self.max_time = max(self.max_time, latency)
+
+    @property
+    def mean_time(self):
+        if self.requests == 0:
+            return 0.0
+
+        return self.total_time / self.requests
+
+    def summary(self):
+        return (
+            f"{self.requests} requests ({self.errors} errors) over {self.connections} connections, "
+            f"mean latency {self.mean_time * 1000:.0f} ms, max {self.max_time * 1000:.0f} ms"
+        )
+
+
+class AzureClientRegistry(object):
+    """
+    Process-wide registry of Azure blob clients, one per account.
+    Each client holds a pool of keep-alive connections that is shared by all threads using the client, so
+    setup, screening and the dashboards reuse connections rather than opening new ones for each client.
+    """
+
+    def __init__(self, client_factory=BlockBlobService, pool_connections=POOL_CONNECTIONS):
+        self.client_factory = client_factory
+        self.pool_connections = pool_connections
+        self._clients = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, account_name, account_key):
+        """Return the shared client of an account, creating it on first use."""
+
+        key = (account_name, account_key)
+        with self._lock:
+            if key not in self._clients:
+                metrics = AzureRequestMetrics()
+                client = self.client_factory(
+                    account_name, account_key, request_session=self._create_session()
+                )
+                client.request_callback = metrics.request_started
+                client.response_callback = metrics.request_completed
+                self._clients[key] = client
+                self._metrics[key] = metrics
+
+            return self._clients[key]
+
+    def metrics(self, account_name, account_key):
+        """Return the request metrics of an account's client, or None if no client has been created."""
+
+        key = (account_name, account_key)
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is not None:
+                metrics.connections = count_connections(self._clients[key].request_session)
+
+        return metrics
+
+    def clear(self):
+        """Close and remove all clients."""
+
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+            self._metrics = {}
+
+        for client in clients:
+            client.request_session.close()
+
+    def _create_session(self):
+        """Return an HTTP session whose connection pool is sized to be shared by the download threads."""
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections, pool_maxsize=self.pool_connections
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return session
+
+
+def count_connections(session):
+    """Return the number of connections opened by an HTTP session."""
+
+    n = 0
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                n += pool.num_connections
+
+    return n
+
+
+# Shared Azure clients of this process
+azure_clients = AzureClientRegistry()
+
 
 def connect_to_azure_account(account_name, account_key):
-    return BlockBlobService(account_name, account_key)
+    """Return the shared client of an Azure account."""
+
+    return azure_clients.get_client(account_name, account_key)
 
 
 def check_azure_account_exists(account_name, account_key):
-    bloc_blob_service = BlockBlobService(account_name, account_key)
+    bloc_blob_service = connect_to_azure_account(account_name, account_key)
     bloc_blob_service.list_containers(num_results=1)
 
     return bloc_blob_service
@@ -32,15 +193,224 @@ def extract_container_name_and_folders_path(fullpath):
 
 
 def get_blobs(bloc_blob_service, container_name, virtual_folders_path=""):
-    generator = bloc_blob_service.list_blobs(container_name, prefix=virtual_folders_path)
-    blobs = [blob.name for blob in generator]
+    blobs = []
+    for _, page in list_blob_pages(bloc_blob_service, container_name, virtual_folders_path):
+        blobs.extend(blob.name for blob in page)
 
     return blobs
 
 
+def list_blob_pages(
+    bloc_blob_service, container_name, prefix="", marker=None, page_size=LISTING_PAGE_SIZE
+):
+    """
+    List the blobs under a prefix one page per request, starting from a marker returned by an earlier listing.
+    Yields (marker, blobs) tuples of the marker that requested each page and the list of blobs in the page.
+    """
+
+    while True:
+        page = bloc_blob_service.list_blobs(
+            container_name, prefix=prefix, num_results=page_size, marker=marker
+        )
+        yield marker, page.items
+
+        if not page.next_marker:
+            break
+
+        marker = page.next_marker
+
+
 def stream_blob(bloc_blob_service, container_name, blob_name):
-    fp = TemporaryFile()
-    bloc_blob_service.get_blob_to_stream(container_name, blob_name, stream=fp)
-    fp.seek(0)
+    """
+    Download a blob as a file stream.
+    The first IN_MEMORY_BLOB_BYTES of the blob are read into memory, so a small blob is read in a single request
+    without a temporary file; the remainder of a larger blob is spooled to a temporary file.
+    """
+
+    data = read_blob_range(bloc_blob_service, container_name, blob_name, 0, IN_MEMORY_BLOB_BYTES)
+    if len(data) < IN_MEMORY_BLOB_BYTES:
+        fp = io.BytesIO(data)
+    else:
+        fp = TemporaryFile()
+        fp.write(data)
+        del data
+        try:
+            bloc_blob_service.get_blob_to_stream(
+                container_name, blob_name, stream=fp, start_range=IN_MEMORY_BLOB_BYTES
+            )
+        except AzureHttpError as e:
+            # Blob is exactly the in-memory size
+            if e.status_code != INVALID_RANGE_STATUS_CODE:
+                raise
+        fp.seek(0)
+
+    # Decompress compressed blobs as a stream
+    return decompress_stream(fp, blob_name)
+
+
+def read_blob_range(bloc_blob_service, container_name, blob_name, start, end):
+    """Return the bytes of a blob from start up to (but not including) end, or to the end of a shorter blob."""
+
+    try:
+        blob = bloc_blob_service.get_blob_to_bytes(
+            container_name, blob_name, start_range=start, end_range=end - 1
+        )
+    except AzureHttpError as e:
+        # Range starts beyond the end of the blob (e.g. an empty blob)
+        if e.status_code == INVALID_RANGE_STATUS_CODE:
+            return b""
+        raise
+
+    return blob.content
+
+
+def read_blob_head(bloc_blob_service, container_name, blob_name, num_lines=0, num_bytes=HEADER_BYTES):
+    """
+    Return a file stream of the start of a blob, including at least num_lines lines, for reading file headers.
+    Only a range of bytes at the start of the blob is downloaded; the range is doubled until it contains num_lines
+    lines. Compressed (gz, bz2 and xz) blobs are downloaded in full and decompressed; zip archives are not supported
+    on Azure.
+    """
+
+    if is_compressed(blob_name):
+        return stream_blob(bloc_blob_service, container_name, blob_name)
+
+    while True:
+        data = read_blob_range(bloc_blob_service, container_name, blob_name, 0, num_bytes)
+        if len(data) < num_bytes or data.count(b"\n") >= num_lines:
+            return io.BytesIO(data)
+
+        num_bytes *= 2
+
+
+def download_blob(
+    bloc_blob_service,
+    container_name,
+    blob_name,
+    retries=DOWNLOAD_RETRIES,
+    backoff=DOWNLOAD_BACKOFF,
+    blob_cache=None,
+):
+    """
+    Download a blob as a file stream (as for stream_blob), retrying downloads that fail with a transient error after
+    an exponentially increasing wait.
+    If a blob cache is supplied, the blob is read from the cache if cached and otherwise downloaded to the cache.
+    """
+
+    for attempt in range(retries + 1):
+        try:
+            if blob_cache is not None:
+                return blob_cache.open(bloc_blob_service, container_name, blob_name)
+
+            return stream_blob(bloc_blob_service, container_name, blob_name)
+        except (AzureException, OSError) as e:
+            if attempt == retries or not is_transient_error(e):
+                raise
+
+            time.sleep(backoff * 2 ** attempt)
+
+
+def is_transient_error(e):
+    """Return True if a failed Azure request may succeed if retried (i.e. a connection, timeout or server error)."""
+
+    if isinstance(e, AzureHttpError):
+        return e.status_code in RETRY_STATUS_CODES or e.status_code >= 500
+
+    return True
+
+
+class BlobDownloadPool(object):
+    """
+    Pool of threads to download the blobs of a logger ahead of them being read.
+    Blobs are downloaded in the order given, with at most max_downloads blobs downloading or downloaded and waiting to
+    be taken, so the downloads run ahead of the processing of earlier blobs by a bounded amount.
+    """
+
+    def __init__(
+        self,
+        bloc_blob_service,
+        container_name,
+        blob_names,
+        max_downloads=4,
+        retries=DOWNLOAD_RETRIES,
+        backoff=DOWNLOAD_BACKOFF,
+        blob_cache=None,
+    ):
+        self.bloc_blob_service = bloc_blob_service
+        self.container_name = container_name
+        self.max_downloads = max(1, max_downloads)
+        self.retries = retries
+        self.backoff = backoff
+        self.blob_cache = blob_cache
+
+        self._blob_names = list(blob_names)
+        self._next_idx = 0
+        self._downloads = {}
+        self._taken = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_downloads)
+        self._submit_downloads()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, blob_name):
+        """
+        Return the file stream of a blob, waiting for its download to complete.
+        A blob not yet submitted to the pool is downloaded on the calling thread.
+        Any download error is raised here.
+        """
+
+        with self._lock:
+            future = self._downloads.pop(blob_name, None)
+            self._taken.add(blob_name)
+
+        try:
+            if future is None:
+                return self.download(blob_name)
+
+            return future.result()
+        finally:
+            self._submit_downloads()
+
+    def download(self, blob_name):
+        """Download a blob, retrying transient errors."""
+
+        return download_blob(
+            self.bloc_blob_service,
+            self.container_name,
+            blob_name,
+            self.retries,
+            self.backoff,
+            self.blob_cache,
+        )
+
+    def close(self):
+        """Cancel downloads not yet started and close the downloaded blobs that have not been taken."""
+
+        with self._lock:
+            downloads = list(self._downloads.values())
+            self._downloads = {}
+            self._next_idx = len(self._blob_names)
+
+        for future in downloads:
+            future.cancel()
+
+        self._executor.shutdown(wait=True)
+
+        for future in downloads:
+            if not future.cancelled() and future.exception() is None:
+                future.result().close()
+
+    def _submit_downloads(self):
+        """Submit the next blobs to download up to the maximum number of blobs in the pool."""
 
-    return fp
+        with self._lock:
+            while len(self._downloads) < self.max_downloads and self._next_idx < len(self._blob_names):
+                blob_name = self._blob_names[self._next_idx]
+                self._next_idx += 1
+                if blob_name not in self._taken and blob_name not in self._downloads:
+                    self._downloads[blob_name] = self._executor.submit(self.download, blob_name)
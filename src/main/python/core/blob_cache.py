@@ -0,0 +1,161 @@
+"""
+On-disk cache of raw files downloaded from Azure Cloud Storage.
+Each downloaded blob is stored (as downloaded, i.e. still compressed if a compressed blob) in a cache folder so that
+re-screening a container, or inspecting raw data, reads the local copy instead of downloading the blob again.
+Cached blobs are keyed by container, blob name and ETag, so a blob that is overwritten on Azure is downloaded again,
+and the least recently used cached blobs are evicted when the cache exceeds its size limit.
+"""
+
+__author__ = "Craig Dickinson"
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from core.compressed_files import decompress_stream
+from core.memory_budget import parse_memory_size
+
+# Cache subfolder of downloaded blobs
+BLOBS_FOLDER = "Azure Blobs"
+
+
+def create_blob_cache(control):
+    """Return the Azure blob cache of the project if enabled, otherwise None."""
+
+    if not control.azure_blob_cache:
+        return None
+
+    cache_path = os.path.join(control.project_path, control.cache_output_folder, BLOBS_FOLDER)
+    max_bytes = parse_memory_size(control.azure_blob_cache_size)
+
+    return BlobCache(cache_path, max_bytes)
+
+
+class BlobCache(object):
+    """Least recently used cache of Azure blobs stored in a cache folder."""
+
+    file_ext = ".blob"
+
+    def __init__(self, cache_path, max_bytes=None):
+        """
+        :param cache_path: Folder to store cached blobs
+        :param max_bytes: Size limit of the cache (bytes); None for no limit
+        """
+
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_path, exist_ok=True)
+
+        # Cached blob sizes ordered from least to most recently used
+        self._files = OrderedDict()
+        self.total_bytes = 0
+        entries = [e for e in os.scandir(cache_path) if e.name.endswith(self.file_ext)]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            self._files[entry.name] = entry.stat().st_size
+            self.total_bytes += entry.stat().st_size
+
+    def _cache_filename(self, container_name, blob_name, etag):
+        key = "|".join([container_name, blob_name, etag or ""])
+
+        return hashlib.md5(key.encode("utf-8")).hexdigest() + self.file_ext
+
+    def open(self, bloc_blob_service, container_name, blob_name):
+        """
+        Return a file stream of a blob, read from the cache if the cached copy has the current ETag of the blob,
+        otherwise downloaded to the cache.
+        """
+
+        etag = bloc_blob_service.get_blob_properties(container_name, blob_name).properties.etag
+        filename = self._cache_filename(container_name, blob_name, etag)
+        cache_file = os.path.join(self.cache_path, filename)
+
+        with self._lock:
+            if filename in self._files:
+                self._files.move_to_end(filename)
+                cached = True
+            # Check for a blob cached by another process
+            elif os.path.exists(cache_file):
+                self._files[filename] = os.path.getsize(cache_file)
+                self.total_bytes += self._files[filename]
+                cached = True
+            else:
+                cached = False
+
+        if cached:
+            try:
+                f = open(cache_file, "rb")
+
+                # Mark as recently used for later runs
+                os.utime(cache_file)
+            except OSError:
+                # Cached blob removed by another process
+                with self._lock:
+                    self.total_bytes -= self._files.pop(filename, 0)
+            else:
+                with self._lock:
+                    self.hits += 1
+
+                return decompress_stream(f, blob_name)
+
+        with self._lock:
+            self.misses += 1
+
+        f = self._download(bloc_blob_service, container_name, blob_name, etag)
+
+        return decompress_stream(f, blob_name)
+
+    def _download(self, bloc_blob_service, container_name, blob_name, etag):
+        """
+        Download a blob to the cache, evict the least recently used blobs above the size limit and return the cached
+        blob opened for reading.
+        """
+
+        # Download to a temporary file and rename so that an incomplete blob is never read
+        temp_file = os.path.join(
+            self.cache_path, f"{os.getpid()}.{threading.get_ident()}{self.file_ext}.tmp"
+        )
+        try:
+            with open(temp_file, "wb") as f:
+                blob = bloc_blob_service.get_blob_to_stream(container_name, blob_name, stream=f)
+        except Exception:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+
+        # Key by the ETag of the downloaded content in case the blob changed since its properties were read
+        if blob is not None and blob.properties.etag:
+            etag = blob.properties.etag
+
+        filename = self._cache_filename(container_name, blob_name, etag)
+        cache_file = os.path.join(self.cache_path, filename)
+        os.replace(temp_file, cache_file)
+
+        # Open before evicting so the blob is readable even if evicted by another thread
+        f = open(cache_file, "rb")
+        size = os.path.getsize(cache_file)
+        with self._lock:
+            self.total_bytes += size - self._files.pop(filename, 0)
+            self._files[filename] = size
+            self._evict()
+
+        return f
+
+    def _evict(self):
+        """Remove the least recently used cached blobs until within the size limit (keeping at least one)."""
+
+        while (
+            self.max_bytes is not None
+            and self.total_bytes > self.max_bytes
+            and len(self._files) > 1
+        ):
+            filename, size = self._files.popitem(last=False)
+            self.total_bytes -= size
+
+            try:
+                os.remove(os.path.join(self.cache_path, filename))
+            except OSError:
+                pass
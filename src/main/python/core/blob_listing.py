@@ -0,0 +1,167 @@
+"""
+Persisted listing of the logger blobs in an Azure Cloud Storage container folder.
+Listing a folder of hundreds of thousands of blobs takes minutes, so the listing of each logger folder is stored in the
+project cache folder and later setups list only the blobs added since the last scan.
+The Blob service returns blobs in name order and continues a listing from a marker, so a refresh resumes from the
+marker of the last page of the previous scan. Logger file names are timestamped, so new files sort after the files
+already listed; a full scan is made periodically to pick up any other added or deleted blobs.
+"""
+
+__author__ = "Craig Dickinson"
+
+import hashlib
+import json
+import os
+import time
+
+from azure.common import AzureHttpError
+
+from core.azure_cloud_storage import list_blob_pages
+from core.compressed_files import matches_file_ext
+
+# Cache subfolder of blob listings
+LISTINGS_FOLDER = "Azure Listings"
+
+# Seconds between full scans of a folder (refreshes in between only list blobs added after the last scan)
+FULL_SCAN_INTERVAL = 24 * 3600
+
+# Increment to invalidate stored listings if the listing format changes
+LISTING_VERSION = 2
+
+
+def get_listings_path(control):
+    """Return the folder to store blob listings in the project cache folder (empty if no project location is set)."""
+
+    if not control.project_path:
+        return ""
+
+    return os.path.join(control.project_path, control.cache_output_folder, LISTINGS_FOLDER)
+
+
+class BlobListing(object):
+    """Listing of the blobs with a file extension under a container folder, optionally stored in a listings folder."""
+
+    def __init__(self, container_name, prefix, file_ext, listings_path=""):
+        self.container_name = container_name
+        self.prefix = prefix
+        self.file_ext = file_ext
+
+        # Blob names and the last modified time of the most recently modified blob (ISO format) as of the last scan
+        self.blobs = []
+        self.watermark = ""
+
+        # ETag of each blob as of the last scan, to detect blobs overwritten under the same name
+        self.etags = {}
+
+        # Marker to resume listing from the last page of the last scan (None if the listing fitted on one page)
+        self.resume_marker = None
+        self.full_scan_time = 0
+
+        self.listing_file = ""
+        if listings_path:
+            key = "|".join([container_name, prefix, file_ext])
+            filename = hashlib.md5(key.encode("utf-8")).hexdigest() + ".json"
+            self.listing_file = os.path.join(listings_path, filename)
+
+    def load(self):
+        """Load the stored listing if it exists; otherwise start afresh."""
+
+        try:
+            with open(self.listing_file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+
+        if data.get("version") == LISTING_VERSION:
+            self.blobs = data["blobs"]
+            self.watermark = data["watermark"]
+            self.etags = data["etags"]
+            self.resume_marker = data["resume_marker"]
+            self.full_scan_time = data["full_scan_time"]
+
+    def save(self):
+        """Write listing to file (written to a temporary file first so a crash cannot corrupt it)."""
+
+        os.makedirs(os.path.dirname(self.listing_file), exist_ok=True)
+        data = dict(
+            version=LISTING_VERSION,
+            container_name=self.container_name,
+            prefix=self.prefix,
+            file_ext=self.file_ext,
+            watermark=self.watermark,
+            resume_marker=self.resume_marker,
+            full_scan_time=self.full_scan_time,
+            blobs=self.blobs,
+            etags=self.etags,
+        )
+        temp_file = self.listing_file + ".tmp"
+
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        os.replace(temp_file, self.listing_file)
+
+    def refresh(self, bloc_blob_service, full_scan=False):
+        """
+        Update the listing from the container, listing only the blobs after the last scan unless a full scan is due
+        (or requested), and store the listing.
+        :return: Names of the blobs added or modified since the last scan
+        """
+
+        if self.listing_file and not self.blobs:
+            self.load()
+
+        full_scan = full_scan or not self.blobs or time.time() - self.full_scan_time > FULL_SCAN_INTERVAL
+        if full_scan:
+            new_blobs = self._scan(bloc_blob_service, marker=None)
+        else:
+            try:
+                new_blobs = self._scan(bloc_blob_service, marker=self.resume_marker)
+            except AzureHttpError as e:
+                # Marker no longer accepted by the service
+                if e.status_code != 400:
+                    raise
+                new_blobs = self._scan(bloc_blob_service, marker=None)
+
+        if self.listing_file:
+            self.save()
+
+        return new_blobs
+
+    def _scan(self, bloc_blob_service, marker):
+        """List the blobs from a marker (from the start if None) and merge them into the listing."""
+
+        blobs = [] if marker is None else list(self.blobs)
+        known_blobs = set(blobs)
+        etags = {} if marker is None else dict(self.etags)
+        watermark = self.watermark
+        new_blobs = []
+
+        # The pages from a marker start with the last page of the previous scan, so blobs already listed are skipped
+        resume_marker = marker
+        for page_marker, page in list_blob_pages(
+            bloc_blob_service, self.container_name, self.prefix, marker=marker
+        ):
+            resume_marker = page_marker
+            for blob in page:
+                if not matches_file_ext(blob.name, self.file_ext):
+                    continue
+
+                last_modified = blob.properties.last_modified.isoformat()
+                if last_modified > self.watermark:
+                    new_blobs.append(blob.name)
+                watermark = max(watermark, last_modified)
+                etags[blob.name] = blob.properties.etag
+
+                if blob.name not in known_blobs:
+                    known_blobs.add(blob.name)
+                    blobs.append(blob.name)
+
+        self.blobs = blobs
+        self.watermark = watermark
+        self.etags = etags
+        self.resume_marker = resume_marker
+        if marker is None:
+            self.full_scan_time = time.time()
+
+        return new_blobs
@@ -0,0 +1,438 @@
+"""
+Consolidated store of the raw data of a logger campaign.
+The parsed files of a logger are ingested to a single chunked, compressed HDF5 array of channels x samples, with an
+index of the file name, start timestamp, row offset and length of each file. Windows of data are then read from the
+store by file or time range without parsing the raw files again.
+The size and modified time (or ETag of an Azure blob) of each raw file are recorded at ingest, so a raw file replaced
+after ingest is read from the raw file rather than the store.
+"""
+
+__author__ = "Craig Dickinson"
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import tables
+
+from core.azure_cloud_storage import stream_blob
+from core.compressed_files import raw_file_stat
+from core.read_ahead import read_ahead
+
+# Logger properties that affect the parsed data of the files in a store
+STORE_SETTINGS_ATTRIBUTES = [
+    "file_format",
+    "file_timestamp_embedded",
+    "file_timestamp_format",
+    "first_col_data",
+    "file_delimiter",
+    "file_encoding",
+    "num_headers",
+    "channel_header_row",
+    "units_header_row",
+    "datetime_format",
+    "freq",
+    "trusted_time_grid",
+]
+
+# Increment to invalidate existing stores if the store format changes
+STORE_VERSION = 2
+
+# Number of samples per chunk of the store data array
+CHUNK_SAMPLES = 16384
+
+# Compression filters of the store arrays
+STORE_FILTERS = tables.Filters(complevel=5, complib="blosc:lz4", shuffle=True)
+
+# Integer stored for a missing (NaT) timestamp
+NAT_INT = np.iinfo(np.int64).min
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class CampaignStoreError(Error):
+    """Exception raised for a campaign store that cannot be read or written."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def campaign_store_path(control, logger):
+    """Return the file path of the campaign store of a logger."""
+
+    folder = os.path.join(control.project_path, control.campaign_store_output_folder)
+
+    return os.path.join(folder, f"{logger.logger_id}.h5")
+
+
+def store_settings_key(logger):
+    """Return a hash of the logger settings that determine the parsed data of the files in a store."""
+
+    settings = {attr: getattr(logger, attr, None) for attr in STORE_SETTINGS_ATTRIBUTES}
+    settings["store_version"] = STORE_VERSION
+    settings_str = json.dumps(settings, sort_keys=True, default=str)
+
+    return hashlib.md5(settings_str.encode("utf-8")).hexdigest()
+
+
+def raw_file_properties(logger, file, blob=None):
+    """
+    Return the properties recorded at ingest to detect a raw file changed since - a tuple of the size, modified time
+    and ETag of the raw file (the blob ETag only for data on Azure). Returns None if a local file does not exist.
+    :param logger: LoggerProperties object of the file
+    :param file: Local file path (or zip member virtual path)
+    :param blob: Blob name if the logger data is on Azure
+    """
+
+    if logger.data_on_azure:
+        return -1, -1.0, logger.blob_etags.get(blob, "")
+
+    try:
+        stat = raw_file_stat(file)
+    except OSError:
+        return None
+
+    return stat.st_size, stat.st_mtime, ""
+
+
+def open_campaign_store(control, logger):
+    """
+    Open the campaign store of a logger if campaign stores are enabled.
+    Returns None if disabled or the store does not exist or was created with different file read settings.
+    """
+
+    if not control.use_campaign_stores:
+        return None
+
+    store_path = campaign_store_path(control, logger)
+    if not os.path.exists(store_path):
+        return None
+
+    store = CampaignStore(store_path)
+    if store.settings_key != store_settings_key(logger):
+        store.close()
+        return None
+
+    return store
+
+
+def ingest_logger(
+    data_screen, store_path, bloc_blob_service=None, progress_callback=None, prefetch_depth=0
+):
+    """
+    Read all files of a logger and write them to a campaign store, replacing any existing store.
+    The store contains all columns of the parsed files, as read for time series integration.
+    :param data_screen: DataScreen object of logger to ingest
+    :param store_path: File path of the store to create
+    :param bloc_blob_service: Azure blob service if logger data is to be streamed from Azure
+    :param progress_callback: Function called with the index and name of each file before it is written
+    :param prefetch_depth: Number of files to read ahead of the file being written
+    :return: Number of files ingested
+    """
+
+    logger = data_screen.logger
+
+    def read_file(j):
+        # Record the raw file properties before reading so a file changed during ingest is not trusted
+        if logger.data_on_azure:
+            properties = raw_file_properties(logger, data_screen.files[j], logger.blobs[j])
+            file = stream_blob(bloc_blob_service, logger.container_name, logger.blobs[j])
+        else:
+            file = data_screen.files[j]
+            properties = raw_file_properties(logger, file)
+
+        df = data_screen.read_logger_file(file)
+
+        return properties, data_screen.wrangle_data(df, file_idx=j)
+
+    folder = os.path.dirname(store_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    # Write to a temporary file and rename so that an incomplete store is never opened
+    temp_path = store_path + ".tmp"
+    writer = None
+    try:
+        file_indices = range(len(data_screen.files))
+        for j, (properties, df) in read_ahead(read_file, file_indices, prefetch_depth):
+            filename = os.path.basename(data_screen.files[j])
+            if progress_callback is not None:
+                progress_callback(j, filename)
+
+            # Use the filename timestamp as the file start time if available
+            start_timestamp = None
+            if logger.file_timestamp_embedded and j < len(logger.file_timestamps):
+                start_timestamp = logger.file_timestamps[j]
+
+            if writer is None:
+                writer = _CampaignStoreWriter(
+                    temp_path, df, data_screen.first_col, store_settings_key(logger)
+                )
+            writer.append(filename, df, properties, start_timestamp)
+
+        if writer is None:
+            raise CampaignStoreError(f"No files to ingest for logger {logger.logger_id}.")
+
+        writer.close()
+        os.replace(temp_path, store_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return len(file_indices)
+
+
+class _CampaignStoreWriter(object):
+    """Appends parsed logger files to a new store file. Channel data is stored as floats."""
+
+    def __init__(self, store_path, df_first, first_col, settings_key):
+        self.columns = [str(c) for c in df_first.columns]
+        self.is_timestamp = pd.api.types.is_datetime64_any_dtype(df_first.iloc[:, 0])
+        self.file_index = []
+        self.num_rows = 0
+
+        self.h5 = tables.open_file(store_path, mode="w")
+        num_channels = len(self.columns) - 1
+        time_atom = tables.Int64Atom() if self.is_timestamp else tables.Float64Atom()
+        self.time = self.h5.create_earray(
+            "/", "time", time_atom, shape=(0,), filters=STORE_FILTERS, chunkshape=(CHUNK_SAMPLES,)
+        )
+        self.data = self.h5.create_earray(
+            "/",
+            "data",
+            tables.Float64Atom(),
+            shape=(num_channels, 0),
+            filters=STORE_FILTERS,
+            chunkshape=(max(num_channels, 1), CHUNK_SAMPLES),
+        )
+
+        attrs = self.h5.root._v_attrs
+        attrs.columns = self.columns
+        attrs.first_col = first_col
+        attrs.is_timestamp = self.is_timestamp
+        attrs.settings_key = settings_key
+
+    def append(self, filename, df, properties, start_timestamp=None):
+        """
+        Append the data of a file and add the file to the index.
+        :param properties: Raw file properties returned by raw_file_properties
+        """
+
+        # Align the file columns to the store columns (missing channels are set to nan)
+        df = df.copy()
+        df.columns = [str(c) for c in df.columns]
+        df = df.rename(columns={df.columns[0]: self.columns[0]})
+        if list(df.columns) != self.columns:
+            df = df.reindex(columns=self.columns)
+
+        if self.is_timestamp:
+            time = pd.to_datetime(df.iloc[:, 0], errors="coerce").values.view(np.int64)
+        else:
+            time = df.iloc[:, 0].to_numpy(dtype=np.float64)
+
+        values = df.iloc[:, 1:].to_numpy(dtype=np.float64)
+        self.time.append(time)
+        self.data.append(values.T)
+
+        # File start time is the filename timestamp, else the first data timestamp
+        if start_timestamp is None and self.is_timestamp and len(time) > 0:
+            start_timestamp = pd.Timestamp(time[0])
+        if start_timestamp is None or pd.isnull(start_timestamp):
+            start = NAT_INT
+        else:
+            start = pd.Timestamp(start_timestamp).value
+
+        size, mtime, etag = properties
+        self.file_index.append(
+            (filename.encode("utf-8"), start, self.num_rows, len(df), size, mtime, etag.encode("utf-8"))
+        )
+        self.num_rows += len(df)
+
+    def close(self):
+        """Write the file index and close the store file."""
+
+        if not self.h5.isopen:
+            return
+
+        itemsize = max([len(f[0]) for f in self.file_index] + [1])
+        etag_itemsize = max([len(f[6]) for f in self.file_index] + [1])
+        dtype = [
+            ("filename", f"S{itemsize}"),
+            ("start_timestamp", np.int64),
+            ("row_offset", np.int64),
+            ("length", np.int64),
+            ("size", np.int64),
+            ("mtime", np.float64),
+            ("etag", f"S{etag_itemsize}"),
+        ]
+        self.h5.create_table("/", "file_index", np.array(self.file_index, dtype=dtype))
+        self.h5.close()
+
+
+class CampaignStore(object):
+    """Reads windows of logger data from a campaign store by file or time range."""
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+
+        try:
+            self.h5 = tables.open_file(store_path, mode="r")
+            attrs = self.h5.root._v_attrs
+            self.columns = list(attrs.columns)
+            self.first_col = attrs.first_col
+            self.is_timestamp = bool(attrs.is_timestamp)
+            self.settings_key = attrs.settings_key
+            file_index = self.h5.root.file_index.read()
+        except (OSError, tables.NoSuchNodeError, AttributeError) as e:
+            raise CampaignStoreError(f"Could not open campaign store {store_path}.\n<{e}>")
+
+        # File index dataframe
+        self.index = pd.DataFrame(
+            {
+                "filename": [f.decode("utf-8") for f in file_index["filename"]],
+                "start_timestamp": file_index["start_timestamp"],
+                "row_offset": file_index["row_offset"],
+                "length": file_index["length"],
+            }
+        )
+        self.index["start_timestamp"] = self.index["start_timestamp"].replace(NAT_INT, np.nan)
+        self.index["start_timestamp"] = pd.to_datetime(self.index["start_timestamp"])
+        self._file_idx = {f: i for i, f in enumerate(self.index["filename"])}
+
+        # Raw file properties of each file when ingested (not recorded by earlier store versions)
+        if "size" in file_index.dtype.names:
+            self._file_properties = [
+                (int(size), float(mtime), etag.decode("utf-8"))
+                for size, mtime, etag in zip(file_index["size"], file_index["mtime"], file_index["etag"])
+            ]
+        else:
+            self._file_properties = [None] * len(file_index)
+
+        # PyTables file handles are not thread safe
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, filename):
+        return filename in self._file_idx
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def num_rows(self):
+        return self.h5.root.time.nrows
+
+    def close(self):
+        self.h5.close()
+
+    def has_file(self, filename, properties):
+        """
+        Return True if a file is in the store and its raw file is unchanged since it was ingested.
+        :param properties: Current raw file properties returned by raw_file_properties
+        """
+
+        i = self._file_idx.get(filename)
+        if i is None or properties is None:
+            return False
+
+        return self._file_properties[i] == tuple(properties)
+
+    def file_idx(self, filename):
+        """Return the index of a file in the store."""
+
+        try:
+            return self._file_idx[filename]
+        except KeyError:
+            raise CampaignStoreError(f"{filename} not found in campaign store {self.store_path}.")
+
+    def read_file(self, file):
+        """Read the data of a file by store file index or filename."""
+
+        if isinstance(file, str):
+            file = self.file_idx(file)
+
+        row_offset, length = self.index.loc[file, ["row_offset", "length"]]
+
+        return self.read_rows(row_offset, row_offset + length)
+
+    def read_files(self, start_idx, end_idx):
+        """Read the data of a range of files by store file index (end index excluded)."""
+
+        files = self.index.iloc[start_idx:end_idx]
+        if files.empty:
+            return self.read_rows(0, 0)
+
+        start_row = files["row_offset"].iloc[0]
+        end_row = files["row_offset"].iloc[-1] + files["length"].iloc[-1]
+
+        return self.read_rows(start_row, end_row)
+
+    def read_window(self, start, end):
+        """
+        Read the data from the start (inclusive) to end (exclusive) timestamps.
+        Only the files spanning the window are read.
+        """
+
+        if not self.is_timestamp:
+            raise CampaignStoreError("Cannot read a time window from a store of time step data.")
+
+        start = pd.Timestamp(start).value
+        end = pd.Timestamp(end).value
+
+        # Select the files that may contain the window using the file start timestamps, if all are known and ordered
+        starts = self.index["start_timestamp"]
+        if starts.notnull().all() and starts.is_monotonic_increasing:
+            starts = starts.values.view(np.int64)
+            i0 = max(np.searchsorted(starts, start, side="right") - 1, 0)
+            i1 = np.searchsorted(starts, end, side="left")
+            if i1 <= i0:
+                return self.read_rows(0, 0)
+            start_row = self.index["row_offset"].iloc[i0]
+            end_row = self.index["row_offset"].iloc[i1 - 1] + self.index["length"].iloc[i1 - 1]
+        else:
+            start_row = 0
+            end_row = self.num_rows
+
+        with self._lock:
+            time = self.h5.root.time[start_row:end_row]
+
+        rows = np.flatnonzero((time >= start) & (time < end))
+        if len(rows) == 0:
+            return self.read_rows(0, 0)
+
+        df = self.read_rows(start_row + rows[0], start_row + rows[-1] + 1)
+        mask = (time[rows[0] : rows[-1] + 1] >= start) & (time[rows[0] : rows[-1] + 1] < end)
+        if not mask.all():
+            df = df[mask].reset_index(drop=True)
+
+        return df
+
+    def read_rows(self, start_row, end_row):
+        """Read a dataframe of the store rows from the start to end row (excluded)."""
+
+        with self._lock:
+            time = self.h5.root.time[start_row:end_row]
+            values = self.h5.root.data[:, start_row:end_row]
+
+        # Transpose to samples x channels without copying
+        df = pd.DataFrame(values.T, columns=self.columns[1:], copy=False)
+
+        if self.is_timestamp:
+            time = time.view("datetime64[ns]")
+        df.insert(loc=0, column=self.columns[0], value=time)
+
+        return df
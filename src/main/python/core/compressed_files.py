@@ -0,0 +1,142 @@
+"""
+Streaming reads of compressed logger files.
+Raw files compressed with gzip, bz2 or xz and the members of zip archives are read by decompressing as a stream into
+the file readers, without extracting them to disk.
+A zip archive member is addressed by a virtual path of the archive path and member name, e.g. "bundle.zip/file.csv".
+"""
+
+__author__ = "Craig Dickinson"
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import re
+import zipfile
+
+# Compressed file extensions and functions to open a decompressing stream of a file path or file object
+COMPRESSIONS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+ARCHIVE_EXT = ".zip"
+
+# Archive part of a zip member virtual path
+ARCHIVE_PATH = re.compile(r"^(.*?\.zip)[/\\](.+)$", re.IGNORECASE)
+
+
+def split_archive_path(path):
+    """Split a zip member virtual path into the archive path and member name (None if the path is not a member)."""
+
+    match = ARCHIVE_PATH.match(str(path))
+    if match is None or not zipfile.is_zipfile(match.group(1)):
+        return str(path), None
+
+    return match.group(1), match.group(2).replace("\\", "/")
+
+
+def compression_ext(filename):
+    """Return the compression extension of a filename, or an empty string if not compressed."""
+
+    ext = os.path.splitext(filename)[1].lower()
+
+    return ext if ext in COMPRESSIONS else ""
+
+
+def is_compressed(file):
+    """Return True if a file path is a compressed file or a zip archive member."""
+
+    if not isinstance(file, (str, os.PathLike)):
+        return False
+
+    return compression_ext(str(file)) != "" or split_archive_path(file)[1] is not None
+
+
+def inner_filename(filename):
+    """Return the filename of the uncompressed file of a compressed file or zip member, e.g. for file timestamps."""
+
+    filename = os.path.basename(str(filename).replace("\\", "/"))
+    ext = compression_ext(filename)
+    if ext:
+        filename = filename[: -len(ext)]
+
+    return filename
+
+
+def matches_file_ext(filename, file_ext):
+    """Return True if a filename, or the uncompressed filename of a compressed file, has the file extension."""
+
+    ext = os.path.splitext(inner_filename(filename))[1].lower()
+
+    return ext == "." + file_ext.lower()
+
+
+def list_raw_files(folder, file_ext):
+    """
+    Return the names of the files in a folder with a file extension, including compressed files and zip archive
+    members (as virtual paths relative to the folder). Returns an empty list if the folder does not exist.
+    """
+
+    if not os.path.isdir(folder):
+        return []
+
+    filenames = []
+    for entry in os.scandir(folder):
+        if not entry.is_file():
+            continue
+
+        if matches_file_ext(entry.name, file_ext):
+            filenames.append(entry.name)
+        elif entry.name.lower().endswith(ARCHIVE_EXT) and zipfile.is_zipfile(entry.path):
+            with zipfile.ZipFile(entry.path) as archive:
+                members = [m.filename for m in archive.infolist() if not m.is_dir()]
+            filenames.extend(f"{entry.name}/{m}" for m in members if matches_file_ext(m, file_ext))
+
+    return filenames
+
+
+def raw_file_stat(path):
+    """Return the os.stat result of a file, or of the archive of a zip member."""
+
+    return os.stat(split_archive_path(path)[0])
+
+
+def open_raw_file(path, mode="rb", encoding=None):
+    """
+    Open a raw file for reading, decompressing compressed files and zip members as a stream.
+    :param path: File path or zip member virtual path
+    :param mode: "rb" for a binary or "r"/"rt" for a text file object
+    :param encoding: Encoding of a text file object
+    """
+
+    text = "b" not in mode
+    archive_path, member = split_archive_path(path)
+
+    # The archive file is kept open until the member file object is closed
+    if member is not None:
+        with zipfile.ZipFile(archive_path) as archive:
+            try:
+                f = archive.open(member)
+            except KeyError:
+                raise FileNotFoundError(f"{member} not found in {archive_path}.")
+    elif compression_ext(path):
+        f = COMPRESSIONS[compression_ext(path)](path, "rb")
+    else:
+        return open(path, "r" if text else "rb", encoding=encoding)
+
+    if text:
+        return io.TextIOWrapper(f, encoding=encoding)
+
+    return f
+
+
+def decompress_stream(stream, filename):
+    """
+    Return a decompressing stream of a binary file object of a compressed file (e.g. an Azure blob stream).
+    The file object is returned unchanged if the filename is not compressed.
+    """
+
+    ext = compression_ext(filename)
+    if ext:
+        return COMPRESSIONS[ext](stream, "rb")
+
+    return stream
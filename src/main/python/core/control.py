@@ -2,7 +2,10 @@
 
 __author__ = "Craig Dickinson"
 
-import os.path
+import os
+
+# Working precisions of channel data
+WORKING_PRECISIONS = ["float64", "float32"]
 
 
 class Error(Exception):
@@ -41,6 +44,17 @@ class Control(object):
         self.azure_account_name = ""
         self.azure_account_key = ""
 
+        # Number of Azure blobs downloaded in parallel ahead of being read during screening and integration
+        # (0 to download each blob when it is read) and number of times a failed download is retried
+        self.azure_max_downloads = 4
+        self.azure_download_retries = 3
+
+        # Azure blob cache settings
+        # If enabled, downloaded blobs are stored in the cache folder and read by later runs and the raw data dashboard
+        # instead of downloading the blob again (least recently used blobs are removed above the cache size)
+        self.azure_blob_cache = False
+        self.azure_blob_cache_size = "10G"
+
         # Filter settings
         self.filter_type = "Butterworth"
         self.butterworth_order = 6
@@ -56,6 +70,8 @@ class Control(object):
         self.spect_output_folder = "Spectrograms"
         self.hist_output_folder = "Histograms"
         self.integration_output_folder = "Displacements and Angles"
+        self.cache_output_folder = "Screening Cache"
+        self.campaign_store_output_folder = "Campaign Stores"
 
         # Output paths
         self.report_output_path = ""
@@ -63,6 +79,8 @@ class Control(object):
         self.spect_output_path = ""
         self.hist_output_path = ""
         self.integration_output_path = ""
+        self.cache_output_path = ""
+        self.campaign_store_output_path = ""
 
         # Selected stats output file formats
         self.stats_to_csv = True
@@ -93,6 +111,54 @@ class Control(object):
         # Flag to indicate type of processing worker to run
         self.processing_mode = "screening"
 
+        # Parallel processing settings
+        # Parallel mode options are: Serial (all loggers screened in turn on the processing thread),
+        # Loggers (each logger screened in a separate worker process) or
+        # Files (files of each logger screened in chunks across worker processes)
+        # Number of workers is 0 to use one worker per CPU of the machine running the project
+        self.parallel_mode = "Serial"
+        self.num_workers = 0
+
+        # Number of files to read ahead in background threads while the current file is processed
+        # (0 to read each file on the processing thread)
+        self.prefetch_depth = 0
+
+        # Number of consecutive csv logger files read with a single parser call during screening
+        # (1 to read each file separately; batching reduces the per-file overhead of loggers of many short files)
+        self.read_batch_size = 1
+
+        # Read each logger file for screening in blocks of rows aligned to the stats and spectral sample lengths
+        # (peak memory is then proportional to the sample length rather than the file length, for very large files)
+        self.block_reading = False
+
+        # Working precision of channel data during screening and integration - "float64" or "float32"
+        # (float32 halves the memory of channel data; stats means and standard deviations are accumulated in float64
+        # and filter coefficients are float64, giving relative errors of about 1e-6 compared to float64 processing)
+        self.working_precision = "float64"
+
+        # Memory budget for screening, e.g. "8G" (empty for no budget)
+        # If set, the number of files in flight is limited and the results of screened loggers are spilled to disk
+        self.max_memory = ""
+
+        # Incremental screening settings
+        # If enabled, only files that are new or have changed since the last screening run are screened
+        # (file changes are detected by size and modified time, and optionally by a hash of the file contents)
+        self.incremental_screening = False
+        self.hash_raw_files = False
+
+        # Parsed file cache settings
+        # If enabled, each parsed raw file is stored in binary form in the cache folder and loaded by later runs
+        # instead of parsing the raw file again (least recently used files are removed above the cache size)
+        self.parsed_file_cache = False
+        self.parsed_file_cache_size = "4G"
+
+        # If enabled, logger files are read from the logger campaign store, if one has been ingested
+        # (files not in the store are read from the raw files)
+        self.use_campaign_stores = False
+
+        # Seconds between scans of the logger folders for new files in watch mode
+        self.watch_poll_interval = 60
+
     def set_output_paths(self):
         """Construct file paths for output folders and create folders if required."""
 
@@ -102,6 +168,16 @@ class Control(object):
         self.spect_output_path = os.path.join(path, self.spect_output_folder)
         self.hist_output_path = os.path.join(path, self.hist_output_folder)
         self.integration_output_path = os.path.join(path, self.integration_output_folder)
+        self.cache_output_path = os.path.join(path, self.cache_output_folder)
+        self.campaign_store_output_path = os.path.join(path, self.campaign_store_output_folder)
+
+    def get_num_workers(self):
+        """Return the number of worker processes to use, resolving 0 to the CPU count of this machine."""
+
+        if self.num_workers:
+            return self.num_workers
+        else:
+            return os.cpu_count() or 1
 
     def check_logger_ids(self):
         """Check for duplicate logger names."""
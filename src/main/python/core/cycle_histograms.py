@@ -3,11 +3,13 @@
 __author__ = "Craig Dickinson"
 
 import os
+from collections import defaultdict, deque
 
 import numpy as np
 import pandas as pd
 import rainflow
 
+from core.compressed_files import inner_filename
 from core.control import Control
 from core.data_screen import DataScreen
 
@@ -57,44 +59,72 @@ class CycleHistograms(object):
             if nb == 1:
                 self.channel_num_bins = [self.channel_num_bins[0]] * nc
 
-    def calc_histograms_on_dataframe(
-        self, df_file: pd.DataFrame, filename, data_screen: DataScreen
-    ):
-        """Calculate rainflow counting histograms of each channel in the (file) dataframe."""
+    def calc_file_histograms(self, file_samples, filename, data_screen: DataScreen):
+        """Calculate rainflow counting histograms of each channel of the file data."""
 
-        filename = os.path.splitext(filename)[0]
+        for i, col in enumerate(self.channels):
+            # Rainflow count column i
+            ranges, cycles = rainflow_cycles(file_samples.channel_values(col))
+            self._add_channel_histogram(i, ranges, cycles, filename)
+
+        data_screen.histograms_processed = True
+
+        return self.dict_df_col_hists
+
+    def create_cycle_counters(self):
+        """Return a dictionary of rainflow cycle counters of each channel, to count a file read in blocks."""
+
+        return {col: RainflowCounter() for col in self.channels}
+
+    @staticmethod
+    def count_block_cycles(cycle_counters, file_samples):
+        """Add the next block of file data of each channel to the channel rainflow cycle counters."""
+
+        for col, counter in cycle_counters.items():
+            counter.add_points(file_samples.channel_values(col))
+
+    def calc_counted_file_histograms(self, cycle_counters, filename, data_screen: DataScreen):
+        """Calculate rainflow counting histograms of each channel from the cycle counters of a file read in blocks."""
 
         for i, col in enumerate(self.channels):
-            # Retrieve bin size and num bins
-            try:
-                bin_size = self.channel_bin_sizes[i]
-            except IndexError:
-                bin_size = None
-
-            # Check for user supplied number of bins
-            try:
-                num_bins = self.channel_num_bins[i]
-            except IndexError:
-                num_bins = None
-
-            # Get histogram for column i
-            y = df_file[col].values.flatten()
-            bin_edges, hist = histogram(y, bin_size, num_bins)
-
-            # Add histogram to dataframe
-            if hist.size > 0:
-                # Convert to dataframe - index with lower bound bins
-                df_temp = pd.DataFrame(hist, index=bin_edges[:-1], columns=[filename])
-                df_temp.index.name = f"Bins ({self.units[i]})"
-
-                # Join to existing dataframe
-                df_hist = self.dict_df_col_hists[col]
-                self.dict_df_col_hists[col] = df_hist.join(df_temp, how="outer")
+            ranges, cycles = cycle_counters[col].cycles()
+            self._add_channel_histogram(i, ranges, cycles, filename)
 
         data_screen.histograms_processed = True
 
         return self.dict_df_col_hists
 
+    def _add_channel_histogram(self, i, ranges, cycles, filename):
+        """Bin the rainflow cycles of channel i of a file and add to the channel histograms dataframe."""
+
+        col = self.channels[i]
+        filename = os.path.splitext(inner_filename(filename))[0]
+
+        # Retrieve bin size and num bins
+        try:
+            bin_size = self.channel_bin_sizes[i]
+        except IndexError:
+            bin_size = None
+
+        # Check for user supplied number of bins
+        try:
+            num_bins = self.channel_num_bins[i]
+        except IndexError:
+            num_bins = None
+
+        # Get histogram for column i
+        bin_edges, hist = cycles_histogram(ranges, cycles, bin_size, num_bins)
+
+        # Add histogram to dataframe
+        if hist.size > 0:
+            # Convert to dataframe - index with lower bound bins
+            df_temp = pd.DataFrame(hist, index=bin_edges[:-1], columns=[filename])
+            df_temp.index.name = f"Bins ({self.units[i]})"
+
+            # Join to existing dataframe
+            df_hist = self.dict_df_col_hists[col]
+            self.dict_df_col_hists[col] = df_hist.join(df_temp, how="outer")
+
     def calc_aggregate_histograms(self):
         """Add aggregate histograms row to each channel dataframe."""
 
@@ -143,6 +173,12 @@ def histogram(y, bin_size=1, num_bins=None):
 
     ranges, cycles = rainflow_cycles(y)
 
+    return cycles_histogram(ranges, cycles, bin_size, num_bins)
+
+
+def cycles_histogram(ranges, cycles, bin_size=1, num_bins=None):
+    """Bin the rainflow cycle ranges and number of cycles of a time series into a histogram."""
+
     # In case of no cycles
     try:
         max_range = ranges[-1]
@@ -179,6 +215,12 @@ def rainflow_cycles(y):
     # Settings mimic output of OrcaFlex OrcFxAPI.RainflowHalfCycles function
     cycles = rainflow.count_cycles(y, left=False, right=True)
 
+    return cycle_arrays(cycles)
+
+
+def cycle_arrays(cycles):
+    """Convert a sorted list of (range, number of cycles) pairs to arrays of ranges and number of cycles."""
+
     # Split tuple and convert to arrays
     try:
         cycle_range, num_cycles = zip(*cycles)
@@ -188,6 +230,93 @@ def rainflow_cycles(y):
         return np.array([]), np.array([])
 
 
+class RainflowCounter(object):
+    """
+    Rainflow cycle counter of a time series added in consecutive blocks of points.
+    Counts the same cycles as rainflow_cycles of the whole series, keeping only the reversals of unclosed cycles
+    between blocks.
+    """
+
+    def __init__(self):
+        self.num_points = 0
+
+        # Number of cycles of each cycle range
+        self.counts = defaultdict(float)
+
+        # Reversals of unclosed cycles
+        self.reversals = deque()
+
+        # Last two points of the series with a change in value and their difference, and the last point
+        self._x_last = None
+        self._x = None
+        self._d_last = None
+        self._x_end = None
+
+    def add_points(self, y):
+        """Count the cycles closed by the next block of points of the series."""
+
+        # Reversals are found as for rainflow.reversals
+        for x_next in y:
+            if self.num_points == 0:
+                self._x_last = x_next
+            elif self.num_points == 1:
+                self._x = x_next
+                self._d_last = x_next - self._x_last
+            elif x_next != self._x:
+                d_next = x_next - self._x
+                if self._d_last * d_next < 0:
+                    self._add_reversal(self._x)
+                self._x_last, self._x = self._x, x_next
+                self._d_last = d_next
+
+            self._x_end = x_next
+            self.num_points += 1
+
+    def cycles(self):
+        """
+        Return arrays of cycle ranges and number of cycles of the series, as for rainflow_cycles.
+        The last point is counted as a reversal, so call once all points have been added.
+        """
+
+        if self.num_points > 2:
+            self._add_reversal(self._x_end)
+
+        # Count the remaining ranges as half cycles
+        while len(self.reversals) > 1:
+            self._count(self.reversals[0], self.reversals[1], 0.5)
+            self.reversals.popleft()
+
+        return cycle_arrays(sorted(self.counts.items()))
+
+    def _add_reversal(self, x):
+        """Add a reversal point and count any cycles it closes, as for rainflow.extract_cycles."""
+
+        points = self.reversals
+        points.append(x)
+        while len(points) >= 3:
+            # Form ranges X and Y from the three most recent points
+            X = abs(points[-2] - points[-1])
+            Y = abs(points[-3] - points[-2])
+
+            if X < Y:
+                break
+            elif len(points) == 3:
+                # Y contains the starting point - count Y as one-half cycle and discard the first point
+                self._count(points[0], points[1], 0.5)
+                points.popleft()
+            else:
+                # Count Y as one cycle and discard the peak and the valley of Y
+                self._count(points[-3], points[-2], 1.0)
+                last = points.pop()
+                points.pop()
+                points.pop()
+                points.append(last)
+
+    def _count(self, x1, x2, num_cycles):
+        low, high = (x1, x2) if x1 < x2 else (x2, x1)
+        self.counts[abs(high - low)] += num_cycles
+
+
 def calc_bin_size(max_range, num_bins=10):
     """Use max range and number of bins to calculate bins size to use in histogram."""
 
@@ -3,21 +3,46 @@ Class to carry out screening checks on logger data.
 """
 __author__ = "Craig Dickinson"
 
+import io
+import math
 import os.path
-from datetime import timedelta
 
 import numpy as np
 import pandas as pd
 
+from core.arrow_csv import read_csv
+from core.campaign_store import raw_file_properties
+from core.compressed_files import is_compressed, open_raw_file
 from core.control import Control
 from core.logger_properties import LoggerProperties
-from core.read_files import read_2hps2_acc, read_pulse_acc
+from core.read_files import (
+    DEFAULT_ENCODINGS,
+    read_2hps2_acc,
+    read_2hps2_acc_blocks,
+    read_pulse_acc,
+    read_pulse_acc_blocks,
+)
+from core.read_plan import ReadPlan
 from core.signal_processing import (
     add_signal_mean,
     apply_butterworth_filter,
     apply_rectangular_filter,
     create_butterworth_filter,
 )
+from core.timestamps import parse_timestamps, time_grid_timestamps, timestamps_from_offsets
+
+# Number of rows of each block read from a file when no stats or spectral sample length applies
+DEFAULT_BLOCK_LENGTH = 100000
+
+# Lists of the file numbers and start and end times of screened samples
+SAMPLE_RESULTS = [
+    "stats_file_nums",
+    "stats_sample_start",
+    "stats_sample_end",
+    "spect_file_nums",
+    "spect_sample_start",
+    "spect_sample_end",
+]
 
 
 class DataScreen(object):
@@ -35,6 +60,10 @@ class DataScreen(object):
         # Dictionary of files with errors for specified logger
         self.dict_bad_files = {}
 
+        # Errors found reading files, keyed by file index - added to the bad files as each file is screened
+        # (files may be read ahead in background threads, so only the screening thread writes to dict_bad_files)
+        self.file_read_errors = {}
+
         # Number of points per file and channels across all files
         self.points_per_file = []
         self.cum_pts_per_channel = np.array([])
@@ -59,14 +88,20 @@ class DataScreen(object):
         # File read properties
         self.file_format = "Custom"
         self.delim = ","
+        self.csv_engine = "pandas"
+        self.encoding = None
         self.header_row = 0
         self.skip_rows = []
         self.use_cols = []
+        self.read_plan = None
         self.channel_names = []
         self.unit_conv_factors = []
         self.file_timestamp_embedded = True
         self.first_col = "Timestamp"
 
+        # Data type of channel data
+        self.working_precision = control.working_precision
+
         # Filter parameters
         self.apply_filters = True
         self.low_cutoff = None
@@ -103,8 +138,13 @@ class DataScreen(object):
         # Flag whether filenames contain timestamps
         self.file_timestamp_embedded = self.logger.file_timestamp_embedded
 
+        # Name of the timestamp/time column of wrangled data
+        self.first_col = self.first_col_name()
+
         # Set file read properties
         self.delim = self.logger.file_delimiter
+        self.csv_engine = self.logger.csv_engine
+        self.encoding = self.logger.file_encoding or DEFAULT_ENCODINGS.get(self.file_format)
         self.header_row = self.logger.channel_header_row - 1
 
         # Additional header rows to skip - only using the first header row for dataframe column names
@@ -117,6 +157,12 @@ class DataScreen(object):
         # Set requested columns to process
         self.use_cols = set([0] + [c - 1 for c in self.logger.cols_to_process])
 
+        # Compile plan of columns to read from each file (number of file columns is known from test file header)
+        num_file_cols = 0
+        if self.logger.all_channel_names:
+            num_file_cols = len(self.logger.all_channel_names) + 1
+        self.read_plan = ReadPlan(self.use_cols, num_file_cols, dtype=self.working_precision)
+
         # Unit conversion factors
         self.unit_conv_factors = logger.unit_conv_factors
 
@@ -135,54 +181,337 @@ class DataScreen(object):
                 self.logger.freq, self.low_cutoff, self.high_cutoff, order=self.butterworth_order
             )
 
-    def read_logger_file(self, file):
-        """Read logger file into dataframe."""
+    def read_logger_file(self, file, read_plan=None, encoding=None):
+        """
+        Read logger file into dataframe.
+        If a read plan is supplied, only the plan columns are read, with dummy columns for any missing columns.
+        The file is read with the detected logger file encoding unless an encoding is given.
+        """
+
+        encoding = encoding or self.encoding
+
+        # Decompress compressed csv files and zip archive members as a stream into the csv reader
+        # (the acc file readers open compressed files themselves)
+        if self.file_format in DEFAULT_ENCODINGS and is_compressed(file):
+            with open_raw_file(file) as f:
+                return self.read_logger_file(f, read_plan, encoding)
+
+        if read_plan is not None:
+            return self._read_logger_file_columns(file, read_plan, encoding)
 
         # Read data to dataframe
         if self.file_format == "Custom" or self.file_format == "Fugro-csv":
-            if self.file_format == "Fugro-csv":
-                encoding = "latin1"
-            else:
-                encoding = None
-
             try:
-                df = pd.read_csv(
+                df = read_csv(
                     file,
+                    engine=self.csv_engine,
                     sep=self.delim,
                     header=self.header_row,
                     skiprows=self.skip_rows,
                     skip_blank_lines=False,
                     encoding=encoding,
                 )
-            # Attempt to handle non-utf-8 encoded files
+            # Handle files not of the detected encoding
             except UnicodeDecodeError:
-                df = pd.read_csv(
+                if encoding == "latin1":
+                    raise
+                return self.read_logger_file(file, encoding=self._use_latin1_encoding(file))
+        elif self.file_format == "Pulse-acc":
+            df = read_pulse_acc(file, multi_header=False)
+        elif self.file_format == "2HPS2-acc":
+            df = read_2hps2_acc(file, multi_header=False)
+        else:
+            df = pd.DataFrame()
+
+        return df
+
+    def _read_logger_file_columns(self, file, read_plan, encoding):
+        """Read the columns of a read plan from a logger file, reading all columns if the plan cannot be applied."""
+
+        try:
+            if self.file_format == "Custom" or self.file_format == "Fugro-csv":
+                # Don't use first column as index if rows have trailing delimiters
+                df = read_csv(
                     file,
+                    engine=self.csv_engine,
                     sep=self.delim,
-                    header=self.header_rows,
+                    header=self.header_row,
                     skiprows=self.skip_rows,
                     skip_blank_lines=False,
-                    encoding="latin1",
+                    encoding=encoding,
+                    usecols=read_plan.cols,
+                    dtype=read_plan.dtypes,
+                    index_col=False,
                 )
+            elif self.file_format == "Pulse-acc":
+                df = read_pulse_acc(file, multi_header=False, usecols=read_plan.cols)
+            elif self.file_format == "2HPS2-acc":
+                df = read_2hps2_acc(file, multi_header=False, usecols=read_plan.cols)
+            else:
+                return pd.DataFrame()
+        # Handle files not of the detected encoding
+        except UnicodeDecodeError:
+            if encoding == "latin1":
+                raise
+            return self._read_logger_file_columns(file, read_plan, self._use_latin1_encoding(file))
+        # File columns differ to the plan or channels contain non-numeric data - read all columns and select the
+        # plan columns
+        except (ValueError, IndexError):
+            if hasattr(file, "seek"):
+                file.seek(0)
+            return read_plan.project(self.read_logger_file(file, encoding=encoding))
+
+        return read_plan.add_missing_cols(df)
+
+    def read_logger_files(self, files, read_plan):
+        """
+        Read the read plan columns of a batch of consecutive csv logger files with a single parser call.
+        The header of the first file and the data rows of all files are parsed as one buffer and split back into a
+        dataframe per file by the row count of each file.
+        Returns None if the files cannot be read as a batch (i.e. the file headers differ or the data does not parse to
+        the plan columns), in which case the files should be read individually.
+        """
+
+        if self.file_format not in DEFAULT_ENCODINGS or not all(isinstance(f, str) for f in files):
+            return None
+
+        # Number of lines preceding the data rows
+        header_row = -1 if self.header_row is None else self.header_row
+        num_header_lines = max([header_row] + self.skip_rows) + 1
+
+        header = None
+        bodies = []
+        row_counts = []
+        for file in files:
+            with open_raw_file(file) as f:
+                data = f.read()
+
+            # Split the header lines from the data rows
+            pos = 0
+            for _ in range(num_header_lines):
+                pos = data.find(b"\n", pos) + 1
+                if pos == 0:
+                    return None
+
+            if header is None:
+                header = data[:pos]
+            elif data[:pos] != header:
+                return None
+
+            # Ensure the last row of each file is terminated so rows do not run into the next file
+            body = data[pos:]
+            if body and not body.endswith(b"\n"):
+                body += b"\n"
+
+            bodies.append(body)
+            row_counts.append(body.count(b"\n"))
+
+        buffer = io.BytesIO(header + b"".join(bodies))
+        del bodies
+
+        encoding = self.encoding
+        while True:
+            try:
+                df = read_csv(
+                    buffer,
+                    engine=self.csv_engine,
+                    sep=self.delim,
+                    header=self.header_row,
+                    skiprows=self.skip_rows,
+                    skip_blank_lines=False,
+                    encoding=encoding,
+                    usecols=read_plan.cols,
+                    dtype=read_plan.dtypes,
+                    index_col=False,
+                )
+                break
+            # Handle files not of the detected encoding
+            except UnicodeDecodeError:
+                if encoding == "latin1":
+                    raise
+                encoding = self._use_latin1_encoding(buffer)
+            # File columns differ to the plan or channels contain non-numeric data
+            except (ValueError, IndexError):
+                return None
+
+        # Check every row has been parsed so the data can be split back into files
+        if len(df) != sum(row_counts):
+            return None
+
+        df = read_plan.add_missing_cols(df)
+        bounds = np.cumsum([0] + row_counts)
+
+        return [df.iloc[i:j].reset_index(drop=True) for i, j in zip(bounds[:-1], bounds[1:])]
+
+    def read_logger_file_blocks(self, file, block_length, read_plan=None):
+        """
+        Read logger file as a sequence of dataframes of block_length rows (the last block may be short), so that only
+        one block of the file is held in memory.
+        If a read plan is supplied, only the plan columns are read, with dummy columns for any missing columns.
+        Channel columns are not cast to the plan data type when read, as a non-numeric value would otherwise fail the
+        read part way through the file; non-numeric data is converted to nan by wrangle_data.
+        """
+
+        # Decompress compressed csv files and zip archive members as a stream into the csv reader
+        if self.file_format in DEFAULT_ENCODINGS and is_compressed(file):
+            with open_raw_file(file) as f:
+                yield from self.read_logger_file_blocks(f, block_length, read_plan)
+            return
+
+        usecols = None if read_plan is None else read_plan.cols
+        encoding = self.encoding
+        num_rows = 0
+        num_skip_blocks = 0
+        while True:
+            try:
+                blocks = self._read_file_format_blocks(file, block_length, usecols, encoding)
+                for i, df in enumerate(blocks):
+                    # Skip the blocks already read before the file was reopened with latin1 encoding
+                    if i < num_skip_blocks:
+                        continue
+
+                    if read_plan is not None:
+                        if usecols is None:
+                            df = read_plan.project(df)
+                        else:
+                            df = read_plan.add_missing_cols(df)
+
+                    num_rows += len(df)
+                    yield df
+                return
+            # Handle files not of the detected encoding
+            except UnicodeDecodeError:
+                if encoding == "latin1":
+                    raise
+                encoding = self._use_latin1_encoding(file)
+
+                # All blocks read are full length
+                num_skip_blocks = num_rows // block_length
+            # File columns differ to the plan - read all columns and select the plan columns
+            except (ValueError, IndexError):
+                if usecols is None or num_rows > 0:
+                    raise
+                if hasattr(file, "seek"):
+                    file.seek(0)
+                usecols = None
+
+    def _read_file_format_blocks(self, file, block_length, usecols, encoding):
+        """Return an iterator of dataframes of block_length rows of a logger file, reading only usecols if given."""
+
+        if self.file_format == "Custom" or self.file_format == "Fugro-csv":
+            # The Arrow csv engine does not read in blocks of rows, so the pandas parser is used
+            kwargs = dict(usecols=usecols, index_col=False) if usecols is not None else {}
+            return self._read_csv_blocks(file, block_length, encoding, **kwargs)
         elif self.file_format == "Pulse-acc":
-            df = read_pulse_acc(file, multi_header=False)
+            return read_pulse_acc_blocks(file, block_length, usecols=usecols)
         elif self.file_format == "2HPS2-acc":
-            df = read_2hps2_acc(file, multi_header=False)
+            return read_2hps2_acc_blocks(file, block_length, usecols=usecols)
         else:
-            df = pd.DataFrame()
+            return iter([])
+
+    def _read_csv_blocks(self, file, block_length, encoding, **kwargs):
+        """Read a csv logger file in blocks of block_length rows."""
+
+        with pd.read_csv(
+            file,
+            sep=self.delim,
+            header=self.header_row,
+            skiprows=self.skip_rows,
+            skip_blank_lines=False,
+            encoding=encoding,
+            chunksize=block_length,
+            **kwargs,
+        ) as reader:
+            yield from reader
+
+    def screening_block_length(self):
+        """
+        Return the number of rows of each block to read from a file when screening files in blocks.
+        Blocks are the lowest common multiple of the requested stats and spectral sample lengths, so every sample lies
+        within a block. Nearly coprime sample lengths have a very long common multiple, so blocks are limited to a
+        multiple of the longest sample length of about DEFAULT_BLOCK_LENGTH rows; the samples of the other module
+        that span blocks are carried over to the next block (see SampleBlocks).
+        """
+
+        sample_lengths = []
+        if self.stats_requested and self.stats_sample_length > 0:
+            sample_lengths.append(self.stats_sample_length)
+        if self.spect_requested and self.spect_sample_length > 0:
+            sample_lengths.append(self.spect_sample_length)
+
+        if not sample_lengths:
+            return DEFAULT_BLOCK_LENGTH
+
+        block_length = 1
+        for n in sample_lengths:
+            block_length = block_length * n // math.gcd(block_length, n)
+
+        longest = max(sample_lengths)
+        max_block_length = max(DEFAULT_BLOCK_LENGTH // longest, 1) * longest
+
+        return min(block_length, max_block_length)
+
+    def _use_latin1_encoding(self, file):
+        """
+        Read this and subsequent files with latin1 encoding (which decodes any bytes) after a file failed to decode
+        with the detected encoding. Returns the encoding to re-read the file with.
+        Each read uses its own encoding so that files read ahead in other threads are not affected by the switch
+        (latin1 is the only encoding set, so concurrent switches agree).
+        """
+
+        self.encoding = "latin1"
+        if hasattr(file, "seek"):
+            file.seek(0)
+
+        return "latin1"
+
+    def is_file_in_store(self, store, file_idx):
+        """Return True if a logger file is in a campaign store and the raw file is unchanged since it was ingested."""
+
+        file = self.files[file_idx]
+        blob = self.logger.blobs[file_idx] if self.logger.data_on_azure else None
+
+        return store.has_file(os.path.basename(file), raw_file_properties(self.logger, file, blob))
+
+    def read_store_file(self, store, file_idx):
+        """Read a logger file from a campaign store and prepare it for screening."""
+
+        filename = os.path.basename(self.files[file_idx])
+
+        return self._prepare_store_data(store, store.read_file(filename))
+
+    def read_store_window(self, store, start, end):
+        """Read the logger data between two timestamps from a campaign store and prepare it for screening."""
+
+        return self._prepare_store_data(store, store.read_window(start, end))
+
+    def _prepare_store_data(self, store, df):
+        """
+        Select the columns to process of campaign store data and apply column names, unit conversions and the
+        working precision.
+        """
+
+        df = self.read_plan.project(df)
+        df = self.set_column_names(df)
+        df = self.apply_unit_conversions(df)
+        df = self.apply_working_precision(df)
 
         return df
 
-    def wrangle_data(self, df, file_idx=0):
-        """Format the logger raw data so it is suitable for processing."""
+    def wrangle_data(self, df, file_idx=0, columns_selected=False):
+        """
+        Format the logger raw data so it is suitable for processing.
+        columns_selected is True if only the columns to process were read from the file.
+        """
 
         # Copy to prevent SettingWithCopyWarning
         df = df.copy()
-        self.first_col = "Timestamp"
 
         if self.logger.file_format == "Custom":
             # Drop columns that are all nan (can happen with poorly delimited csv files, e.g. trailing commas)
-            df = df.dropna(axis=1, how="all")
+            # (not needed if only the columns to process were read)
+            if not columns_selected:
+                df = df.dropna(axis=1, how="all")
 
             # If no header rows set, the columns index will be Int64Index - instead set custom column names
             if self.header_row is None:
@@ -194,16 +523,11 @@ class DataScreen(object):
                 if self.logger.file_timestamp_embedded is True:
                     ts = df.iloc[:, 0].values
                     start_timestamp = self.logger.file_timestamps[file_idx]
-                    timestamps = [start_timestamp + timedelta(seconds=t) for t in ts]
-                    df.iloc[:, 0] = timestamps
-                else:
-                    self.first_col = "Time"
+                    df.iloc[:, 0] = timestamps_from_offsets(start_timestamp, ts)
             #  Convert first column (should be timestamps string) to datetimes
             else:
                 try:
-                    df.iloc[:, 0] = pd.to_datetime(
-                        df.iloc[:, 0], format=self.logger.datetime_format
-                    )
+                    df.iloc[:, 0] = self.parse_file_timestamps(df.iloc[:, 0], file_idx)
                 # TODO: isinstance error doesn't seem to work - get rid of error
                 # except ValueError as e:
                 #     try:
@@ -221,9 +545,7 @@ class DataScreen(object):
 
         # Convert first column (should be timestamps string) to datetimes
         if self.logger.file_format == "Fugro-csv":
-            df.iloc[:, 0] = pd.to_datetime(
-                df.iloc[:, 0], format=self.logger.datetime_format, errors="coerce"
-            )
+            df.iloc[:, 0] = self.parse_file_timestamps(df.iloc[:, 0], file_idx, errors="coerce")
 
         # Trim column names
         df.columns = [c.strip() for c in df.columns]
@@ -233,6 +555,37 @@ class DataScreen(object):
 
         return df
 
+    def first_col_name(self):
+        """
+        Return the name of the timestamp/time column of wrangled data - "Time" for time steps not converted to
+        timestamps, otherwise "Timestamp".
+        """
+
+        if (
+            self.logger.file_format == "Custom"
+            and self.logger.first_col_data == "Time Step"
+            and self.logger.file_timestamp_embedded is not True
+        ):
+            return "Time"
+
+        return "Timestamp"
+
+    def parse_file_timestamps(self, values, file_idx, errors="raise"):
+        """
+        Convert the timestamp strings of a file to datetimes.
+        In trusted time grid mode the timestamps are created from the first timestamp and the logger sample frequency,
+        and the file is reported as bad (and all timestamps parsed) if spot-checked timestamps are not on the grid.
+        """
+
+        if self.logger.trusted_time_grid is True and self.logger.freq > 0:
+            timestamps = time_grid_timestamps(values, self.logger.datetime_format, self.logger.freq)
+            if timestamps is not None:
+                return timestamps
+
+            self.file_read_errors[file_idx] = "Timestamps not on sample time grid"
+
+        return parse_timestamps(values, self.logger.datetime_format, errors=errors)
+
     def select_columns_to_process(self, df):
         """Select columns to screen on."""
 
@@ -268,15 +621,44 @@ class DataScreen(object):
 
         return df
 
+    def apply_working_precision(self, df):
+        """Convert channel columns to the working precision data type."""
+
+        # Channel data is left as read at float64 precision
+        dtype = np.dtype(self.working_precision)
+        if dtype == np.float64 or (df.dtypes.iloc[1:] == dtype).all():
+            return df
+
+        channels = df.iloc[:, 1:].astype(dtype)
+
+        return pd.concat([df.iloc[:, :1], channels], axis=1)
+
     def screen_data(self, file_num, df):
         """Perform basic data screening operations on dataframe."""
 
-        # Number of rows in file
-        pts = len(df)
+        # Number of rows in file and number of points per channel - ignore timestamp column
+        if self._add_file_points(file_num, len(df), df.count().values[1:]):
+            # Calculate resolution for each channel
+            self.res.append(self._resolution(df))
+
+    def screen_data_blocks(self, file_num, pts, pts_per_channel, res):
+        """
+        Perform basic data screening operations on a file read in blocks, using the number of rows and points per
+        channel summed over the blocks and the block resolutions combined with block_resolution.
+        """
+
+        if self._add_file_points(file_num, pts, pts_per_channel):
+            self.res.append(res)
+
+    def _add_file_points(self, file_num, pts, pts_per_channel):
+        """Store the number of points of a file. Returns True if the file has the expected number of points."""
+
         self.points_per_file.append(pts)
 
-        # Number of points per channel - ignore timestamp column
-        pts_per_channel = df.count().values[1:]
+        # Report any error found reading the file
+        msg = self.file_read_errors.pop(file_num, None)
+        if msg is not None:
+            self.dict_bad_files[self.logger.files[file_num]] = msg
 
         # Cumulative total for all files
         if self.cum_pts_per_channel.size == 0:
@@ -288,9 +670,59 @@ class DataScreen(object):
         if pts != self.logger.expected_data_points:
             filename = self.logger.files[file_num]
             self.dict_bad_files[filename] = "Unexpected number of points"
-        else:
-            # Calculate resolution for each channel
-            self.res.append(self._resolution(df))
+            return False
+
+        return True
+
+    def screening_state(self):
+        """Return the number of screened samples and processed flags, to discard the results of later samples."""
+
+        state = {name: len(getattr(self, name)) for name in SAMPLE_RESULTS}
+        state["stats_processed"] = self.stats_processed
+        state["spect_processed"] = self.spect_processed
+
+        return state
+
+    def restore_screening_state(self, state):
+        """Discard the results of samples screened since the screening state was taken."""
+
+        for name in SAMPLE_RESULTS:
+            del getattr(self, name)[state[name] :]
+
+        self.stats_processed = state["stats_processed"]
+        self.spect_processed = state["spect_processed"]
+
+    def merge_screening_results(self, other):
+        """
+        Append the screening results of another data screen object of the same logger.
+        Used to reassemble the results of files screened in separate tasks; other must contain the later files.
+        """
+
+        self.points_per_file.extend(other.points_per_file)
+        self.res.extend(other.res)
+        self.dict_bad_files.update(other.dict_bad_files)
+
+        # Cumulative total for all files
+        if self.cum_pts_per_channel.size == 0:
+            self.cum_pts_per_channel = other.cum_pts_per_channel
+        elif other.cum_pts_per_channel.size > 0:
+            self.cum_pts_per_channel += other.cum_pts_per_channel
+
+        # Sample file numbers and start and end times
+        self.stats_file_nums.extend(other.stats_file_nums)
+        self.stats_sample_start.extend(other.stats_sample_start)
+        self.stats_sample_end.extend(other.stats_sample_end)
+        self.spect_file_nums.extend(other.spect_file_nums)
+        self.spect_sample_start.extend(other.spect_sample_start)
+        self.spect_sample_end.extend(other.spect_sample_end)
+
+        # Processed flags
+        if other.points_per_file:
+            self.first_col = other.first_col
+        self.stats_processed = self.stats_processed or other.stats_processed
+        self.spect_processed = self.spect_processed or other.spect_processed
+        self.histograms_processed = self.histograms_processed or other.histograms_processed
+        self.integration_processed = self.integration_processed or other.integration_processed
 
     @staticmethod
     def _resolution(df):
@@ -313,6 +745,19 @@ class DataScreen(object):
 
         return res
 
+    @classmethod
+    def block_resolution(cls, df, res=None):
+        """
+        Return the smallest resolution of each column of a block of a file and the resolution of the previous blocks.
+        (The gaps between values of different blocks are not included.)
+        """
+
+        block_res = cls._resolution(df)
+        if res is None:
+            return block_res
+
+        return [pd.concat([a, b], axis=1).min(axis=1) for a, b in zip(res, block_res)]
+
     def calc_data_completeness(self):
         """Calculate the proportion of good data coverage."""
 
@@ -325,49 +770,6 @@ class DataScreen(object):
 
         return self.data_completeness
 
-    def sample_data(self, df_sample, df, sample_length, type):
-        """
-        Extract data sample from file.
-        Move the required rows from data to sample to make len(sample) = sample_length.
-        :param df_sample: Current subset dataframe of main logger file (initially empty)
-        :param df: Current logger file dataframe (sample data gets dropped)
-        :param sample_length: Number of expected data points sample is to have
-        :param type: stats or spectral string
-        :return: Updated sample dataframe and logger file dataframe with sample data dropped
-        """
-
-        # if type == "stats":
-        #     sample_length = self.stats_sample_length
-        # elif type == "spectral":
-        #     sample_length = self.spect_sample_length
-
-        # Current number of points in sample
-        ns = len(df_sample)
-
-        # Number of points in data
-        nd = len(df)
-
-        # Number of points to append to sample - sample_length is the target number of sample points
-        cutoff = min(sample_length - ns, nd)
-
-        if ns < sample_length and nd > 0:
-            # Append data to sample dataframe and drop sample from main dataframe
-            df_sample = df_sample.append(df[:cutoff].copy(), ignore_index=True)
-            df.drop(df.index[:cutoff], inplace=True)
-
-            # TODO: Allowing short sample length (revisit)
-            # Store start and end times of sample data if dataframe contains target length
-            # if len(df_sample) == sample_length:
-            if len(df_sample) <= sample_length:
-                if type == "stats":
-                    self.stats_sample_start.append(df_sample.iloc[0, 0])
-                    self.stats_sample_end.append(df_sample.iloc[-1, 0])
-                elif type == "spectral":
-                    self.spect_sample_start.append(df_sample.iloc[0, 0])
-                    self.spect_sample_end.append(df_sample.iloc[-1, 0])
-
-        return df_sample, df
-
     def filter_data(self, df_sample):
         """Filter out low frequencies (drift) and high frequencies (noise)."""
 
@@ -38,7 +38,8 @@ Example 2HPS2-acc file format is:
 __author__ = "Craig Dickinson"
 
 import os
-from glob import glob
+
+from core.compressed_files import list_raw_files, open_raw_file
 
 
 def set_2hps2_acc_file_format(logger):
@@ -70,7 +71,8 @@ def detect_2hps2_logger_properties(logger):
     """
 
     # TODO: Add Azure support
-    raw_files = glob(logger.logger_path + "/*." + logger.file_ext)
+    raw_files = list_raw_files(logger.logger_path, logger.file_ext)
+    raw_files = [os.path.join(logger.logger_path, f) for f in raw_files]
 
     if len(raw_files) == 0:
         msg = f"No files with the extension {logger.file_ext} found in {logger.logger_path}."
@@ -109,7 +111,7 @@ def read_2hps2_header_info(file):
     channel units
     """
 
-    with open(file, "r") as f:
+    with open_raw_file(file, "r") as f:
         # Read channels header
         [next(f) for _ in range(15)]
         channel_line = f.readline().strip().split(",")
@@ -1,10 +1,11 @@
 __author__ = "Craig Dickinson"
 
+import os
 from datetime import datetime
-from glob import glob
 
 from dateutil.parser import parse
 
+from core.compressed_files import list_raw_files, open_raw_file
 from core.logger_properties import LoggerProperties
 
 
@@ -30,7 +31,7 @@ def get_test_file(logger: LoggerProperties):
     ext = logger.file_ext
 
     # TODO: Add Azure support
-    raw_files = glob(path + "/*." + ext)
+    raw_files = [os.path.join(path, f) for f in list_raw_files(path, ext)]
 
     if len(raw_files) == 0:
         msg = f"No files with the extension {ext} found in {path}."
@@ -42,7 +43,7 @@ def get_test_file(logger: LoggerProperties):
 def read_test_file(file, num_headers):
     """Read test file - skipping header rows."""
 
-    with open(file) as f:
+    with open_raw_file(file, "r") as f:
         [next(f) for _ in range(num_headers)]
         data = f.readlines()
 
@@ -11,7 +11,8 @@ dd-mmm-yyyy HH:MM:SS.FFF,mm/s2,mm/s2,rad/s,rad/s
 17-Mar-2016 02:00:00.000,-48.085023,-1.237695e+002,-7.414453e-004,2.252544e-003
 """
 import os
-from glob import glob
+
+from core.compressed_files import list_raw_files, open_raw_file
 
 
 def set_fugro_csv_file_format(logger):
@@ -40,7 +41,8 @@ def detect_fugro_logger_properties(logger):
     """
 
     # TODO: Add Azure support
-    raw_files = glob(logger.logger_path + "/*." + logger.file_ext)
+    raw_files = list_raw_files(logger.logger_path, logger.file_ext)
+    raw_files = [os.path.join(logger.logger_path, f) for f in raw_files]
 
     if len(raw_files) == 0:
         msg = f"No files with the extension {logger.file_ext} found in {logger.logger_path}."
@@ -70,7 +72,7 @@ def detect_fugro_logger_properties(logger):
 
     # Get expected logging duration
     # Read number of data points
-    with open(test_file) as f:
+    with open_raw_file(test_file, "r", encoding="latin1") as f:
         data = f.readlines()
 
     # Less number of header rows
@@ -88,7 +90,7 @@ def read_fugro_sample_interval(filename):
     """
 
     # Read the first line
-    with open(filename) as f:
+    with open_raw_file(filename, "r", encoding="latin1") as f:
         line = f.readline()
 
     # Select the sample interval assuming header is as expected
@@ -107,7 +109,7 @@ def read_fugro_headers(filename):
     """Return the second and third headers in filename as lists."""
 
     # Skip the first two lines
-    with open(filename) as f:
+    with open_raw_file(filename, "r", encoding="latin1") as f:
         next(f)
         header = f.readline().strip().split(",")
         units = f.readline().strip().split(",")
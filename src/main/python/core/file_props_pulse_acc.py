@@ -31,7 +31,8 @@ Example pulse-acc file format is:
 __author__ = "Craig Dickinson"
 
 import os
-from glob import glob
+
+from core.compressed_files import list_raw_files, open_raw_file
 
 
 def set_pulse_acc_file_format(logger):
@@ -61,7 +62,8 @@ def detect_pulse_logger_properties(logger):
     """
 
     # TODO: Add Azure support
-    raw_files = glob(logger.logger_path + "/*." + logger.file_ext)
+    raw_files = list_raw_files(logger.logger_path, logger.file_ext)
+    raw_files = [os.path.join(logger.logger_path, f) for f in raw_files]
 
     if not raw_files:
         msg = f"No files with the extension {logger.file_ext} found in {logger.logger_path}."
@@ -100,7 +102,7 @@ def read_pulse_header_info(file):
     channel units
     """
 
-    with open(file, "r") as f:
+    with open_raw_file(file, "r") as f:
         # Read sampling frequency
         [next(f) for _ in range(9)]
         fs = f.readline().strip().split(" ")[-1]
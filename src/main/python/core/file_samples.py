@@ -0,0 +1,104 @@
+"""
+Logger file data prepared once for the screening modules.
+The channel data of a file is converted to a single array that is sliced into sample dataframes without copying.
+The stats, spectral and histogram modules all use these shared views, and filtered samples are computed once
+per sample interval.
+"""
+
+__author__ = "Craig Dickinson"
+
+import numpy as np
+import pandas as pd
+
+from core.data_screen import DataScreen
+
+
+class FileSamples(object):
+    """Contiguous arrays of a logger file dataframe and sample views of them shared by the screening modules."""
+
+    def __init__(self, df_file: pd.DataFrame, data_screen: DataScreen):
+        self.data_screen = data_screen
+        self.time_col = df_file.columns[0]
+        self.channels = df_file.columns[1:]
+
+        # Timestamps/time column
+        self.time = df_file.iloc[:, 0].array
+
+        # Channel data stored column-major so that each channel and each row slice of the array is a view
+        # (this matches the pandas block layout, so no copy is made for a file of a single data type)
+        self.values = np.asfortranarray(df_file.iloc[:, 1:].to_numpy())
+
+        # Filtered samples keyed by (start, end) row - shared by the stats and spectral modules
+        self._filtered_samples = {}
+
+    def __len__(self):
+        return len(self.time)
+
+    def sample_bounds(self, sample_length):
+        """Return a list of (start, end) rows of each sample of the file. The last sample may be short."""
+
+        n = len(self)
+        return [(i, min(i + sample_length, n)) for i in range(0, n, sample_length)]
+
+    def sample(self, start, end):
+        """Return a sample dataframe built on views of the file arrays."""
+
+        df_sample = pd.DataFrame(self.values[start:end], columns=self.channels, copy=False)
+        df_sample.insert(loc=0, column=self.time_col, value=self.time[start:end])
+
+        return df_sample
+
+    def filtered_sample(self, start, end):
+        """Return the low/high pass filtered sample, filtering the sample only the first time it is requested."""
+
+        key = (start, end)
+        if key not in self._filtered_samples:
+            self._filtered_samples[key] = self.data_screen.filter_data(self.sample(start, end))
+
+        return self._filtered_samples[key]
+
+    def channel_values(self, channel):
+        """Return a view of the array of a channel for the whole file."""
+
+        return self.values[:, self.channels.get_loc(channel)]
+
+
+class SampleBlocks(object):
+    """
+    Whole samples of a screening module from the blocks of a file read in blocks of rows.
+    The rows of a sample continued in the next block are carried over to it, so samples can span blocks that are not
+    aligned to the module sample length; at most one sample length of rows is held in addition to a block.
+    """
+
+    def __init__(self, sample_length, data_screen: DataScreen):
+        self.sample_length = sample_length
+        self.data_screen = data_screen
+        self.carry = None
+
+    def add(self, df_block: pd.DataFrame, file_samples: FileSamples):
+        """
+        Return the FileSamples of the whole samples to the end of a block, or None if there are none.
+        The FileSamples of the block is returned if the block starts and ends on a sample boundary.
+        """
+
+        if self.carry is None and len(df_block) % self.sample_length == 0:
+            return file_samples
+
+        df = df_block if self.carry is None else pd.concat([self.carry, df_block])
+        n = len(df) - len(df) % self.sample_length
+        self.carry = df.iloc[n:] if n < len(df) else None
+
+        if n == 0:
+            return None
+
+        return FileSamples(df.iloc[:n], self.data_screen)
+
+    def flush(self):
+        """Return the FileSamples of the rows carried over at the end of a file (a short last sample), or None."""
+
+        if self.carry is None:
+            return None
+
+        df, self.carry = self.carry, None
+
+        return FileSamples(df, self.data_screen)
@@ -3,7 +3,6 @@
 __author__ = "Craig Dickinson"
 
 import os
-from glob import glob
 
 from PyQt5.QtCore import QObject, pyqtSignal
 from dateutil.parser import parse
@@ -12,10 +11,12 @@ from natsort import natsorted
 from core.azure_cloud_storage import (
     connect_to_azure_account,
     extract_container_name_and_folders_path,
-    get_blobs,
-    stream_blob,
+    read_blob_head,
 )
+from core.blob_listing import BlobListing
+from core.compressed_files import inner_filename, list_raw_files, open_raw_file
 from core.custom_date import get_date_code_span, make_time_str
+from core.read_files import DEFAULT_ENCODINGS, ENCODING_SAMPLE_BYTES, detect_encoding
 
 
 class Error(Exception):
@@ -63,11 +64,16 @@ class LoggerProperties(QObject):
         self.data_on_azure = False
         self.logger_path = ""
 
-        # Azure account access settings, container name and blobs list
+        # Azure account access settings, container name, blobs list and the ETag of each blob
         self.azure_account_name = ""
         self.azure_account_key = ""
         self.container_name = ""
         self.blobs = []
+        self.blob_etags = {}
+
+        # Folder to store the listing of the logger blobs so that later setups only list new blobs
+        # (not stored if empty)
+        self.azure_listings_path = ""
 
         # File format variables
         self.file_format = "Custom"
@@ -77,6 +83,12 @@ class LoggerProperties(QObject):
         self.file_ext = ""
         self.file_delimiter = ","
 
+        # Encoding of csv logger files, detected once from a test file during logger setup (empty if not detected)
+        self.file_encoding = ""
+
+        # Csv engine to read Custom and Fugro-csv files - "pandas" or "pyarrow" (multithreaded; requires pyarrow)
+        self.csv_engine = "pandas"
+
         # Number of rows/columns expected
         self.num_headers = 0
         self.num_columns = 0
@@ -92,6 +104,10 @@ class LoggerProperties(QObject):
         self.datetime_format = ""
         self.freq = 0
         self.duration = 0
+
+        # Trusted time grid mode - timestamps are created from the first timestamp and sample frequency and only a
+        # few timestamps of each file are parsed to check the file is on the time grid
+        self.trusted_time_grid = False
         self.num_files = 0
         self.expected_data_points = 0
 
@@ -220,6 +236,14 @@ class LoggerProperties(QObject):
         self.ang_rate_x_high_cutoff = 2.0
         self.ang_rate_y_high_cutoff = 2.0
 
+    def __reduce__(self):
+        """
+        Allow logger to be pickled (QObjects cannot be pickled by default), e.g. to send to a worker process.
+        Only the logger properties are copied; signal connections are not.
+        """
+
+        return self.__class__, (self.logger_id,), self.__dict__.copy()
+
     def get_filenames(self):
         """Read all file timestamps and check that they conform to the specified format."""
 
@@ -239,12 +263,14 @@ class LoggerProperties(QObject):
         return filenames
 
     def get_filenames_on_local(self):
-        """Get all filenames with specified extension in logger path."""
+        """
+        Get all filenames with specified extension in logger path.
+        Compressed files (e.g. *.csv.gz) and zip archive members (e.g. bundle.zip/*.csv) are included.
+        """
 
         # Get filenames and use natsort to ensure files are sorted correctly
         # (i.e. not lexicographically e.g. 0, 1, 10, 2)
-        filenames = [os.path.basename(f) for f in glob(self.logger_path + "/*." + self.file_ext)]
-        filenames = natsorted(filenames)
+        filenames = natsorted(list_raw_files(self.logger_path, self.file_ext))
 
         if not filenames:
             msg = f"No {self.logger_id} files with the extension {self.file_ext} found in:\n{self.logger_path}."
@@ -253,10 +279,14 @@ class LoggerProperties(QObject):
         return filenames
 
     def get_filenames_on_azure(self):
-        """Get all filenames with specified extension stored on Azure Cloud Storage container."""
+        """
+        Get all filenames with specified extension stored on Azure Cloud Storage container.
+        The blob listing is stored, if a listings folder is set, and only blobs added since the last scan are listed.
+        """
 
         self.container_name = ""
         self.blobs = []
+        self.blob_etags = {}
 
         try:
             bloc_blob_service = connect_to_azure_account(
@@ -269,18 +299,21 @@ class LoggerProperties(QObject):
             container_name, virtual_folders_path = extract_container_name_and_folders_path(
                 self.logger_path
             )
-            blobs = get_blobs(bloc_blob_service, container_name, virtual_folders_path)
-            blobs = natsorted(blobs)
+            listing = BlobListing(
+                container_name, virtual_folders_path, self.file_ext, self.azure_listings_path
+            )
+            listing.refresh(bloc_blob_service)
+            blobs = natsorted(listing.blobs)
 
-            # Store container name and blobs list
+            # Store container name, blobs list and blob ETags
             self.container_name = container_name
             self.blobs = blobs
+            self.blob_etags = listing.etags
         except Exception:
             msg = f"Could not connect to {container_name} container on Azure Cloud Storage account."
             raise LoggerError(msg)
 
-        ext = "." + self.file_ext.lower()
-        filenames = [os.path.basename(f) for f in blobs if os.path.splitext(f)[1].lower() == ext]
+        filenames = [os.path.basename(f) for f in blobs]
 
         if not filenames:
             msg = (
@@ -314,7 +347,8 @@ class LoggerProperties(QObject):
         self.file_indices = []
 
         for i, f in enumerate(self.raw_filenames):
-            date = self.get_file_timestamp(f)
+            # Parse the timestamp of the uncompressed filename of compressed files
+            date = self.get_file_timestamp(inner_filename(f))
 
             if date is None:
                 self.dict_bad_filenames[f] = "Unable to parse datetime from filename"
@@ -441,27 +475,20 @@ class LoggerProperties(QObject):
             return
 
         # Set test file to read and file format read properties
-        # Create a file stream of blob from Azure
-        if self.data_on_azure:
-            test_blob = self.blobs[0]
-            bloc_blob_service = connect_to_azure_account(
-                self.azure_account_name, self.azure_account_key
-            )
-            test_file = stream_blob(bloc_blob_service, self.container_name, test_blob)
-        # Read local file
-        else:
-            test_file = os.path.join(self.logger_path, self.raw_filenames[0])
-
+        test_file = self._get_test_file()
         file_format = self.file_format
         delim = self.file_delimiter
         c = self.channel_header_row
         u = self.units_header_row
 
+        # Detect the file encoding from the test file so all files can be read in a single pass
+        self.detect_file_encoding(test_file)
+
         # Get column names and units, if exist
-        if file_format == "Custom":
-            channels, units = self.read_column_names(test_file, delim, c, u, decoding="utf-8")
-        elif file_format == "Fugro-csv":
-            channels, units = self.read_column_names(test_file, delim, c, u, decoding="latin1")
+        if file_format == "Custom" or file_format == "Fugro-csv":
+            channels, units = self.read_column_names(
+                test_file, delim, c, u, decoding=self.file_encoding
+            )
         elif file_format == "Pulse-acc":
             channels, units = self.read_columns_pulse(test_file, c)
         elif file_format == "2HPS2-acc":
@@ -470,19 +497,64 @@ class LoggerProperties(QObject):
         # Assign channels and units list to logger - encode and decode to handle ascii characters
         try:
             self.all_channel_names = [c.strip().encode("latin1").decode() for c in channels]
-        except UnicodeDecodeError:
+        except UnicodeError:
             self.all_channel_names = [c.strip() for c in channels]
 
         try:
             self.all_channel_units = [u.strip().encode("latin1").decode() for u in units]
-        except UnicodeDecodeError:
+        except UnicodeError:
             self.all_channel_units = [u.strip() for u in units]
 
         return channels, units
 
+    def _get_test_file(self):
+        """
+        Return the path of the first raw file, or if the data is on Azure a file stream of the start of the first blob
+        (enough to read the file header and detect the file encoding).
+        """
+
+        if self.data_on_azure:
+            bloc_blob_service = connect_to_azure_account(
+                self.azure_account_name, self.azure_account_key
+            )
+            return read_blob_head(
+                bloc_blob_service, self.container_name, self.blobs[0], num_lines=self.num_headers
+            )
+
+        return os.path.join(self.logger_path, self.raw_filenames[0])
+
+    def detect_file_encoding(self, test_file=None):
+        """
+        Detect the encoding of the logger files from the start of a test file and store it.
+        :param test_file: Test file path or stream (returned to the start); the first raw file is used if None
+        """
+
+        # Only csv file formats are read with an encoding
+        if self.file_format not in DEFAULT_ENCODINGS:
+            self.file_encoding = ""
+            return
+
+        if test_file is None:
+            if not self.raw_filenames:
+                return
+            test_file = self._get_test_file()
+
+        if hasattr(test_file, "read"):
+            sample = test_file.read(ENCODING_SAMPLE_BYTES)
+            test_file.seek(0)
+        else:
+            with open_raw_file(test_file) as f:
+                sample = f.read(ENCODING_SAMPLE_BYTES)
+
+        self.file_encoding = detect_encoding(sample, DEFAULT_ENCODINGS[self.file_format])
+
     def read_column_names(self, test_file, delim, c, u, decoding):
         """Retrieve channel and unit names from a general or Fugro-csv file."""
 
+        # Drop any byte order mark from the first channel name
+        if decoding == "utf-8":
+            decoding = "utf-8-sig"
+
         # Read channel and unit name rows, if exist - from Azure file stream or local file
         if self.data_on_azure:
             header_lines = [
@@ -490,7 +562,7 @@ class LoggerProperties(QObject):
                 for _ in range(self.num_headers)
             ]
         else:
-            with open(test_file) as f:
+            with open_raw_file(test_file, "r", encoding=decoding) as f:
                 header_lines = [f.readline().strip().split(delim) for _ in range(self.num_headers)]
 
         # Extract list of channel names and units (drop the first item - expected to be timestamp)
@@ -524,7 +596,7 @@ class LoggerProperties(QObject):
             [test_file.readline() for _ in range(c - 1)]
             header = test_file.readline().decode("latin1").strip().split(":")
         else:
-            with open(test_file, "r") as f:
+            with open_raw_file(test_file, "r") as f:
                 [next(f) for _ in range(c - 1)]
                 header = f.readline().strip().split(":")
 
@@ -547,7 +619,7 @@ class LoggerProperties(QObject):
             channels = test_file.readline().decode().strip().split(delim)
             units = test_file.readline().decode().strip().split(delim)
         else:
-            with open(test_file, "r") as f:
+            with open_raw_file(test_file, "r") as f:
                 [next(f) for _ in range(c - 1)]
                 channels = f.readline().strip().split(delim)
                 units = f.readline().strip().split(delim)
@@ -665,9 +737,12 @@ class LoggerProperties(QObject):
             bloc_blob_service = connect_to_azure_account(
                 self.azure_account_name, self.azure_account_key
             )
-            fs = stream_blob(bloc_blob_service, self.container_name, test_blob)
+            fs = read_blob_head(
+                bloc_blob_service, self.container_name, test_blob, num_lines=self.num_headers + 1
+            )
             [fs.readline() for _ in range(self.num_headers)]
-            first_row = fs.readline().decode().strip().split(self.file_delimiter)
+            first_row = fs.readline().decode(self.file_encoding or "latin1")
+            first_row = first_row.strip().split(self.file_delimiter)
         # Read test file on local drive
         else:
             try:
@@ -677,7 +752,7 @@ class LoggerProperties(QObject):
                 first_row = []
             else:
                 test_path = os.path.join(self.logger_path, test_file)
-                with open(test_path) as f:
+                with open_raw_file(test_path, "r", encoding=self.file_encoding or "latin1") as f:
                     [f.readline() for _ in range(self.num_headers)]
                     first_row = f.readline().strip().split(self.file_delimiter)
 
@@ -0,0 +1,659 @@
+"""
+Routines to screen the files of a single logger.
+Used by the processing hub to screen loggers on the processing thread or in worker processes.
+"""
+
+__author__ = "Craig Dickinson"
+
+import copy
+import os
+
+import numpy as np
+
+from core.azure_cloud_storage import (
+    DOWNLOAD_RETRIES,
+    BlobDownloadPool,
+    connect_to_azure_account,
+    download_blob,
+)
+from core.blob_cache import create_blob_cache
+from core.campaign_store import open_campaign_store
+from core.control import Control
+from core.cycle_histograms import CycleHistograms
+from core.data_screen import DataScreen
+from core.file_samples import FileSamples, SampleBlocks
+from core.memory_budget import MemoryBudget, estimate_file_memory
+from core.parsed_file_cache import create_parsed_file_cache, read_settings_key
+from core.read_ahead import read_ahead
+from core.spectral_screening import SpectralScreening
+from core.stats_screening import StatsScreening
+
+
+class LoggerScreeningResult(object):
+    """Screening results of a logger (or subset of logger files) processed in a worker process."""
+
+    def __init__(self, data_screen: DataScreen, stats_screening, spect_screening, histograms):
+        self.data_screen = data_screen
+
+        # Logger stats objects
+        self.stats_unfilt = None
+        self.stats_filt = None
+
+        # Logger spectrogram objects
+        self.spect_unfilt = None
+        self.spect_filt = None
+
+        # Logger channel histograms dictionary
+        self.dict_df_col_hists = {}
+
+        # Azure blob cache hits and misses of the screening run
+        self.blob_cache_hits = 0
+        self.blob_cache_misses = 0
+
+        if stats_screening is not None:
+            self.stats_unfilt = stats_screening.stats_unfilt
+            self.stats_filt = stats_screening.stats_filt
+
+        if spect_screening is not None:
+            self.spect_unfilt = spect_screening.spect_unfilt
+            self.spect_filt = spect_screening.spect_filt
+
+        if histograms is not None:
+            self.dict_df_col_hists = histograms.dict_df_col_hists
+
+    def merge(self, other):
+        """
+        Append the screening results of another set of files of the same logger.
+        other must contain the results of the files that follow those of this result.
+        """
+
+        self.data_screen.merge_screening_results(other.data_screen)
+
+        # Results cached by earlier versions have no blob cache counts
+        self.blob_cache_hits += getattr(other, "blob_cache_hits", 0)
+        self.blob_cache_misses += getattr(other, "blob_cache_misses", 0)
+
+        if self.stats_unfilt is not None:
+            self.stats_unfilt.merge(other.stats_unfilt)
+            self.stats_filt.merge(other.stats_filt)
+
+        if self.spect_unfilt is not None:
+            self.spect_unfilt.merge(other.spect_unfilt)
+            self.spect_filt.merge(other.spect_filt)
+
+        # Join each channel histograms dataframe in the same way as for each file
+        for channel, df_other in other.dict_df_col_hists.items():
+            if not df_other.empty:
+                df_hist = self.dict_df_col_hists[channel]
+                self.dict_df_col_hists[channel] = df_hist.join(df_other, how="outer")
+
+    def without_logger(self):
+        """
+        Return a copy of the result without the logger object and file paths, which are not required to merge results,
+        to cache the result or send it back from a worker process.
+        """
+
+        data_screen = copy.copy(self.data_screen)
+        data_screen.logger = None
+        data_screen.files = []
+        result = copy.copy(self)
+        result.data_screen = data_screen
+
+        return result
+
+    def set_to_screening_modules(self, stats_screening, spect_screening, histograms):
+        """Map the logger results to the screening modules used for post-processing in the processing hub."""
+
+        if self.data_screen.stats_requested:
+            stats_screening.stats_unfilt = self.stats_unfilt
+            stats_screening.stats_filt = self.stats_filt
+
+        if self.data_screen.spect_requested:
+            spect_screening.spect_unfilt = self.spect_unfilt
+            spect_screening.spect_filt = self.spect_filt
+
+        if self.data_screen.histograms_requested:
+            histograms.init_dataset(self.data_screen)
+            histograms.dict_df_col_hists = self.dict_df_col_hists
+
+
+def init_logger_screening(data_screen: DataScreen, stats_screening, spect_screening, histograms):
+    """Initialise the requested screening modules for a new logger."""
+
+    if data_screen.stats_requested:
+        stats_screening.init_logger_stats()
+    if data_screen.spect_requested:
+        spect_screening.init_logger_spect(data_screen.logger_id)
+    if data_screen.histograms_requested:
+        histograms.init_dataset(data_screen)
+
+
+def read_file_for_screening(data_screen: DataScreen, file, file_idx, parsed_file_cache=None):
+    """
+    Read a logger file to a dataframe and prepare it for the screening modules.
+    If a parsed file cache is given, local files are loaded from the cache when previously parsed.
+    """
+
+    df = _get_cached_file(data_screen, file, parsed_file_cache)
+    if df is not None:
+        return df
+
+    # Read only the columns to process to a dataframe
+    df = data_screen.read_logger_file(file, read_plan=data_screen.read_plan)
+
+    return _prepare_file_for_screening(data_screen, df, file, file_idx, parsed_file_cache)
+
+
+def read_files_for_screening(data_screen: DataScreen, file_indices, parsed_file_cache=None):
+    """
+    Read a batch of consecutive local logger files to dataframes prepared for the screening modules.
+    Files not in the parsed file cache are read with a single parser call where the file format allows, otherwise
+    each file is read separately.
+    :return: List of the dataframe of each file
+    """
+
+    dfs = {}
+    uncached_indices = []
+    for j in file_indices:
+        df = _get_cached_file(data_screen, data_screen.files[j], parsed_file_cache)
+        if df is None:
+            uncached_indices.append(j)
+        else:
+            dfs[j] = df
+
+    files = [data_screen.files[j] for j in uncached_indices]
+    df_files = None
+    if len(files) > 1:
+        df_files = data_screen.read_logger_files(files, data_screen.read_plan)
+    if df_files is None:
+        df_files = [data_screen.read_logger_file(file, read_plan=data_screen.read_plan) for file in files]
+
+    for j, file, df in zip(uncached_indices, files, df_files):
+        dfs[j] = _prepare_file_for_screening(data_screen, df, file, j, parsed_file_cache)
+
+    return [dfs[j] for j in file_indices]
+
+
+def _get_cached_file(data_screen: DataScreen, file, parsed_file_cache):
+    """Return the prepared dataframe of a file from the parsed file cache, or None if not cached."""
+
+    if parsed_file_cache is None:
+        return None
+
+    return parsed_file_cache.get(file, _screening_settings_key(data_screen))
+
+
+def _screening_settings_key(data_screen: DataScreen):
+    """Return the parsed file cache key of the logger settings used to read files for screening."""
+
+    return read_settings_key(
+        data_screen.logger, "screening", working_precision=data_screen.working_precision
+    )
+
+
+def _prepare_file_for_screening(data_screen: DataScreen, df, file, file_idx, parsed_file_cache):
+    """Wrangle a file dataframe read with the read plan for screening and store it in the parsed file cache."""
+
+    # Wrangle data to prepare for processing
+    df = data_screen.wrangle_data(df, file_idx=file_idx, columns_selected=True)
+
+    # Set column names
+    df = data_screen.set_column_names(df)
+    df = data_screen.apply_unit_conversions(df)
+    df = data_screen.apply_working_precision(df)
+
+    # Don't cache files with bad timestamps so that they are reported on later runs
+    if parsed_file_cache is not None and file_idx not in data_screen.file_read_errors:
+        parsed_file_cache.put(file, _screening_settings_key(data_screen), df)
+
+    return df
+
+
+def screen_file(
+    df, data_screen: DataScreen, file_idx, stats_screening, spect_screening, histograms
+):
+    """Run the requested screening modules on a prepared file dataframe."""
+
+    logger = data_screen.logger
+    filename = os.path.basename(data_screen.files[file_idx])
+    processed_file_num = get_processed_file_num(logger, file_idx)
+
+    # Data screening module
+    # Perform basic screening checks on file - check file has expected number of data points
+    data_screen.screen_data(file_num=file_idx, df=df)
+
+    # Ignore file if not of expected length
+    # TODO: Allowing short sample length (revisit)
+    # if data_screen.points_per_file[-1] == logger.expected_data_points:
+    if data_screen.points_per_file[-1] <= logger.expected_data_points:
+        # Convert file data once to arrays sliced into samples shared by all screening modules
+        file_samples = FileSamples(df, data_screen)
+
+        # STATS SCREENING
+        if data_screen.stats_requested:
+            stats_screening.file_stats_processing(file_samples, data_screen, processed_file_num)
+
+        # SPECTRAL SCREENING
+        if data_screen.spect_requested:
+            spect_screening.file_spect_processing(file_samples, data_screen, processed_file_num)
+
+        # CALCULATE HISTOGRAMS
+        if data_screen.histograms_requested:
+            # Compute histograms for each channel in file
+            histograms.calc_file_histograms(file_samples, filename, data_screen)
+
+
+def screen_file_blocks(
+    blocks, data_screen: DataScreen, file_idx, stats_screening, spect_screening, histograms
+):
+    """
+    Run the requested screening modules on a file read as a sequence of prepared row blocks (see
+    DataScreen.screening_block_length), so that only one block of the file is held in memory. Samples that span blocks
+    are carried over to the next block.
+    As for screen_file, the screening results of a file with more than the expected number of points are discarded.
+    """
+
+    logger = data_screen.logger
+    filename = os.path.basename(data_screen.files[file_idx])
+    processed_file_num = get_processed_file_num(logger, file_idx)
+
+    # Store the number of samples screened before the file in case the file results are to be discarded
+    sample_results = []
+    if data_screen.stats_requested:
+        sample_results += [stats_screening.stats_unfilt, stats_screening.stats_filt]
+    if data_screen.spect_requested:
+        sample_results += [spect_screening.spect_unfilt, spect_screening.spect_filt]
+    num_samples = [result.num_samples() for result in sample_results]
+    screening_state = data_screen.screening_state()
+
+    stats_blocks = SampleBlocks(data_screen.stats_sample_length, data_screen)
+    spect_blocks = SampleBlocks(data_screen.spect_sample_length, data_screen)
+    cycle_counters = None
+    if data_screen.histograms_requested:
+        cycle_counters = histograms.create_cycle_counters()
+
+    pts = 0
+    pts_per_channel = np.zeros(len(data_screen.channel_names), dtype=int)
+    res = None
+    for df in blocks:
+        # Data screening module - sum the points of each block
+        pts += len(df)
+        pts_per_channel = pts_per_channel + df.count().values[1:]
+        res = data_screen.block_resolution(df, res)
+
+        # File is longer than expected so its results are discarded - continue to read the file to count its points
+        if pts > logger.expected_data_points:
+            continue
+
+        # Convert block data once to arrays sliced into samples shared by all screening modules
+        file_samples = FileSamples(df, data_screen)
+
+        # STATS SCREENING
+        if data_screen.stats_requested:
+            stats_samples = stats_blocks.add(df, file_samples)
+            if stats_samples is not None:
+                stats_screening.file_stats_processing(stats_samples, data_screen, processed_file_num)
+
+        # SPECTRAL SCREENING
+        if data_screen.spect_requested:
+            spect_samples = spect_blocks.add(df, file_samples)
+            if spect_samples is not None:
+                spect_screening.file_spect_processing(spect_samples, data_screen, processed_file_num)
+
+        # Rainflow count the block of each channel
+        if data_screen.histograms_requested:
+            histograms.count_block_cycles(cycle_counters, file_samples)
+
+    data_screen.screen_data_blocks(file_idx, pts, pts_per_channel, res)
+
+    # TODO: Allowing short sample length (revisit)
+    if pts <= logger.expected_data_points:
+        # Screen the last samples of the file carried over from the last block
+        if data_screen.stats_requested:
+            stats_samples = stats_blocks.flush()
+            if stats_samples is not None:
+                stats_screening.file_stats_processing(stats_samples, data_screen, processed_file_num)
+        if data_screen.spect_requested:
+            spect_samples = spect_blocks.flush()
+            if spect_samples is not None:
+                spect_screening.file_spect_processing(spect_samples, data_screen, processed_file_num)
+
+        # CALCULATE HISTOGRAMS
+        if data_screen.histograms_requested:
+            histograms.calc_counted_file_histograms(cycle_counters, filename, data_screen)
+    else:
+        for result, n in zip(sample_results, num_samples):
+            result.truncate(n)
+        data_screen.restore_screening_state(screening_state)
+
+
+def read_file_blocks_for_screening(data_screen: DataScreen, file, file_idx):
+    """Read a logger file as a sequence of row blocks prepared for the screening modules."""
+
+    block_length = data_screen.screening_block_length()
+    for df in data_screen.read_logger_file_blocks(file, block_length, read_plan=data_screen.read_plan):
+        # Wrangle data to prepare for processing
+        df = data_screen.wrangle_data(df, file_idx=file_idx, columns_selected=True)
+
+        # Set column names
+        df = data_screen.set_column_names(df)
+        df = data_screen.apply_unit_conversions(df)
+        df = data_screen.apply_working_precision(df)
+
+        yield df
+
+
+def get_processed_file_num(logger, file_idx):
+    """Return the file number of a processed file (this is akin to load case number for no timestamp files)."""
+
+    # Get file number of first file to be processed
+    try:
+        first_file_num = logger.file_indices[0] + 1
+    except IndexError:
+        first_file_num = 1
+
+    return first_file_num + file_idx
+
+
+def split_file_indices(num_files, num_chunks):
+    """
+    Split the file indices of a logger into contiguous chunks to be screened as separate tasks.
+    At least one (possibly empty) chunk is always returned.
+    """
+
+    num_chunks = max(1, min(num_chunks, num_files))
+    chunk_size, remainder = divmod(num_files, num_chunks)
+    chunks = []
+    start = 0
+    for i in range(num_chunks):
+        end = start + chunk_size + (1 if i < remainder else 0)
+        chunks.append(list(range(start, end)))
+        start = end
+
+    return chunks
+
+
+def merge_screening_results(results):
+    """Merge a list of screening results of a logger, ordered by file, into a single result."""
+
+    merged = results[0]
+    for result in results[1:]:
+        merged.merge(result)
+
+    return merged
+
+
+def screen_logger_files(
+    data_screen: DataScreen,
+    stats_screening,
+    spect_screening,
+    histograms,
+    bloc_blob_service=None,
+    progress_callback=None,
+    file_indices=None,
+    prefetch_depth=0,
+    memory_budget=None,
+    parsed_file_cache=None,
+    campaign_store=None,
+    read_batch_size=1,
+    block_reading=False,
+    max_downloads=0,
+    download_retries=DOWNLOAD_RETRIES,
+    blob_cache=None,
+):
+    """
+    Screen all files of a logger, or a subset of files.
+    :param data_screen: DataScreen object of logger to screen
+    :param stats_screening: StatsScreening object (None if stats not requested)
+    :param spect_screening: SpectralScreening object (None if spectral screening not requested)
+    :param histograms: CycleHistograms object (None if histograms not requested)
+    :param bloc_blob_service: Azure blob service if logger data is to be streamed from Azure
+    :param progress_callback: Function called with the index and name of each file before it is processed
+    :param file_indices: Indices of logger files to screen (all files if None)
+    :param prefetch_depth: Number of files to read ahead of the file being screened
+    :param memory_budget: Optional MemoryBudget object to limit the files read ahead
+    :param parsed_file_cache: Optional ParsedFileCache object to load previously parsed local files from
+    :param campaign_store: Optional CampaignStore object of the logger to read ingested files from
+    :param read_batch_size: Number of consecutive local files to read with a single parser call
+    :param block_reading: If True, read each file in blocks of rows aligned to the sample lengths (files in the
+    campaign store are read whole and the parsed file cache and read ahead are not used)
+    :param max_downloads: Number of Azure blobs to download in parallel ahead of being read (0 to download each blob
+    when it is read)
+    :param download_retries: Number of times a failed Azure blob download is retried
+    :param blob_cache: Optional BlobCache object to read previously downloaded Azure blobs from
+    """
+
+    logger = data_screen.logger
+    init_logger_screening(data_screen, stats_screening, spect_screening, histograms)
+
+    if file_indices is None:
+        file_indices = range(len(data_screen.files))
+
+    # Files ingested to the campaign store whose raw files are unchanged since
+    stored_files = set()
+    if campaign_store is not None:
+        stored_files = {j for j in file_indices if data_screen.is_file_in_store(campaign_store, j)}
+
+    def in_campaign_store(j):
+        return j in stored_files
+
+    # Download the logger blobs not in the campaign store ahead of them being read
+    download_pool = None
+    if logger.data_on_azure and max_downloads > 0:
+        blob_names = [logger.blobs[j] for j in file_indices if not in_campaign_store(j)]
+        download_pool = BlobDownloadPool(
+            bloc_blob_service,
+            logger.container_name,
+            blob_names,
+            max_downloads=max_downloads,
+            retries=download_retries,
+            blob_cache=blob_cache,
+        )
+
+    def open_file(j):
+        # If streaming data from Azure Cloud read as a file stream
+        if download_pool is not None:
+            return download_pool.get(logger.blobs[j])
+        if logger.data_on_azure:
+            return download_blob(
+                bloc_blob_service,
+                logger.container_name,
+                logger.blobs[j],
+                retries=download_retries,
+                blob_cache=blob_cache,
+            )
+
+        return data_screen.files[j]
+
+    def read_file(j):
+        # READ FILE TO DATA FRAME
+        # Read from the campaign store if the file has been ingested
+        if in_campaign_store(j):
+            return data_screen.read_store_file(campaign_store, j)
+
+        file = open_file(j)
+
+        return read_file_for_screening(data_screen, file, file_idx=j, parsed_file_cache=parsed_file_cache)
+
+    def read_batch(batch):
+        # Read ingested files from the campaign store and the remaining local files as a batch
+        dfs = {j: read_file(j) for j in batch if in_campaign_store(j)}
+        local_indices = [j for j in batch if j not in dfs]
+        df_files = read_files_for_screening(data_screen, local_indices, parsed_file_cache=parsed_file_cache)
+        dfs.update(zip(local_indices, df_files))
+
+        return [dfs[j] for j in batch]
+
+    try:
+        if block_reading is True:
+            for j in file_indices:
+                if progress_callback is not None:
+                    progress_callback(j, os.path.basename(data_screen.files[j]))
+
+                if in_campaign_store(j):
+                    df = data_screen.read_store_file(campaign_store, j)
+                    screen_file(df, data_screen, j, stats_screening, spect_screening, histograms)
+                    continue
+
+                file = open_file(j)
+                blocks = read_file_blocks_for_screening(data_screen, file, j)
+                screen_file_blocks(blocks, data_screen, j, stats_screening, spect_screening, histograms)
+            return
+
+        # Process each file - the next prefetch_depth files (or batches of files) are read in background threads
+        # Expose each sample here; that way it can be sent to different processing modules
+        file_bytes = estimate_file_memory(logger)
+        if read_batch_size > 1 and not logger.data_on_azure:
+            file_indices = list(file_indices)
+            batches = [
+                file_indices[i : i + read_batch_size] for i in range(0, len(file_indices), read_batch_size)
+            ]
+            batch_bytes = file_bytes * read_batch_size
+            file_dfs = (
+                (j, df)
+                for batch, dfs in read_ahead(read_batch, batches, prefetch_depth, memory_budget, batch_bytes)
+                for j, df in zip(batch, dfs)
+            )
+        else:
+            file_dfs = read_ahead(read_file, file_indices, prefetch_depth, memory_budget, file_bytes)
+
+        for j, df in file_dfs:
+            # TODO: If expected file in sequence is missing, store results as nan
+            if progress_callback is not None:
+                progress_callback(j, os.path.basename(data_screen.files[j]))
+
+            # =========================================================
+            # AT THIS POINT WE SPLIT INTO DIFFERENT PROCESSING MODULES
+            # =========================================================
+            screen_file(df, data_screen, j, stats_screening, spect_screening, histograms)
+
+    finally:
+        if download_pool is not None:
+            download_pool.close()
+
+
+def create_task_control(control: Control):
+    """Return a copy of the project control to send to worker tasks, without the logger objects of every logger."""
+
+    control_copy = copy.copy(control)
+    control_copy.loggers = []
+
+    return control_copy
+
+
+def create_data_screen_copy(control: Control, data_screen: DataScreen):
+    """Create a new data screen object for the same logger and screening flags, without any screening results."""
+
+    data_screen_copy = DataScreen(control)
+    data_screen_copy.set_logger(data_screen.logger)
+    data_screen_copy.stats_requested = data_screen.stats_requested
+    data_screen_copy.spect_requested = data_screen.spect_requested
+    data_screen_copy.histograms_requested = data_screen.histograms_requested
+
+    return data_screen_copy
+
+
+def screen_logger(
+    control: Control,
+    data_screen: DataScreen,
+    logger_idx,
+    progress_queue=None,
+    file_indices=None,
+    bloc_blob_service=None,
+    memory_budget_bytes=None,
+):
+    """
+    Worker process task to screen all files of a logger, or a subset of files.
+    The data screen object must not contain any screening results, so that results of subsets can be merged.
+    Progress is reported by putting (logger index, file index, filename) tuples on the progress queue.
+    If a memory budget is given, files are only read ahead while within the budget.
+    :return: LoggerScreeningResult object
+    """
+
+    stats_screening = None
+    spect_screening = None
+    histograms = None
+
+    # Create processing object for requested analysis
+    if data_screen.stats_requested:
+        stats_screening = StatsScreening(control)
+    if data_screen.spect_requested:
+        spect_screening = SpectralScreening(control)
+    if data_screen.histograms_requested:
+        histograms = CycleHistograms(control)
+
+    # Connect to Azure account if to be used and not supplied
+    if data_screen.logger.data_on_azure and bloc_blob_service is None and file_indices != []:
+        bloc_blob_service = connect_to_azure_account(
+            control.azure_account_name, control.azure_account_key
+        )
+
+    memory_budget = None
+    if memory_budget_bytes is not None:
+        memory_budget = MemoryBudget(memory_budget_bytes)
+
+    def report_progress(file_idx, filename):
+        if progress_queue is not None:
+            progress_queue.put((logger_idx, file_idx, filename))
+
+    blob_cache = None
+    if data_screen.logger.data_on_azure:
+        blob_cache = create_blob_cache(control)
+
+    campaign_store = open_campaign_store(control, data_screen.logger)
+    try:
+        screen_logger_files(
+            data_screen,
+            stats_screening,
+            spect_screening,
+            histograms,
+            bloc_blob_service,
+            progress_callback=report_progress,
+            file_indices=file_indices,
+            prefetch_depth=control.prefetch_depth,
+            memory_budget=memory_budget,
+            parsed_file_cache=create_parsed_file_cache(control),
+            campaign_store=campaign_store,
+            read_batch_size=control.read_batch_size,
+            block_reading=control.block_reading,
+            max_downloads=control.azure_max_downloads,
+            download_retries=control.azure_download_retries,
+            blob_cache=blob_cache,
+        )
+    finally:
+        if campaign_store is not None:
+            campaign_store.close()
+
+    result = LoggerScreeningResult(data_screen, stats_screening, spect_screening, histograms)
+    if blob_cache is not None:
+        result.blob_cache_hits = blob_cache.hits
+        result.blob_cache_misses = blob_cache.misses
+
+    return result
+
+
+def screen_logger_files_separately(control: Control, data_screen: DataScreen, logger_idx, file_indices):
+    """
+    Worker process task to screen each of a chunk of files of a logger separately, so that the screening result of
+    each file can be cached.
+    :return: List of (file index, LoggerScreeningResult object without the logger object) tuples
+    """
+
+    bloc_blob_service = None
+    if data_screen.logger.data_on_azure and file_indices:
+        bloc_blob_service = connect_to_azure_account(
+            control.azure_account_name, control.azure_account_key
+        )
+
+    results = []
+    for j in file_indices:
+        result = screen_logger(
+            control,
+            create_data_screen_copy(control, data_screen),
+            logger_idx,
+            file_indices=[j],
+            bloc_blob_service=bloc_blob_service,
+        )
+        results.append((j, result.without_logger()))
+
+    return results
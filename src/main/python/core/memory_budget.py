@@ -0,0 +1,156 @@
+"""
+Routines to keep processing within a memory budget.
+Includes a byte-accounting budget to throttle file readers and a dictionary that spills its values to disk.
+"""
+
+__author__ = "Craig Dickinson"
+
+import os
+import pickle
+import threading
+from collections.abc import MutableMapping
+
+# Approximate number of in-memory copies of a file's data during screening
+# (parsed dataframe, wrangled copy, file sample arrays and filtered samples)
+FILE_MEMORY_FACTOR = 6
+
+# Memory assumed per file if the logger file size cannot be estimated
+DEFAULT_FILE_MEMORY = 64 * 1024**2
+
+# Cache subfolder to store the results of screened loggers when a memory budget is set
+SPILL_FOLDER = "Spilled Results"
+
+MEMORY_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class MemorySizeError(Error):
+    """Exception raised for an invalid memory size string."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def parse_memory_size(size):
+    """
+    Convert a memory size string, e.g. "8G", "512M" or "1.5GB", to bytes.
+    An empty string or None returns None (no memory budget).
+    """
+
+    if size is None or size == "":
+        return None
+
+    if isinstance(size, (int, float)):
+        return int(size)
+
+    s = size.strip().upper()
+    if s.endswith("IB"):
+        s = s[:-2]
+    elif s.endswith("B") and len(s) > 1 and not s[-2].isdigit():
+        s = s[:-1]
+
+    unit = s[-1] if s and s[-1] in MEMORY_UNITS else ""
+    number = s[: len(s) - len(unit)] if unit else s
+
+    try:
+        num_bytes = int(float(number) * MEMORY_UNITS[unit])
+    except ValueError:
+        msg = f"Invalid memory size '{size}'. Use a number with an optional K, M, G or T suffix, e.g. 8G."
+        raise MemorySizeError(msg)
+
+    if num_bytes <= 0:
+        raise MemorySizeError(
+            f"Invalid memory size '{size}'. Memory size must be greater than zero."
+        )
+
+    return num_bytes
+
+
+def estimate_file_memory(logger):
+    """Estimate the peak memory (bytes) required to screen one file of a logger."""
+
+    num_rows = logger.expected_data_points
+    num_cols = len(logger.cols_to_process) + 1
+
+    if not num_rows or num_cols < 2:
+        return DEFAULT_FILE_MEMORY
+
+    # 8 bytes per float64 value
+    return int(num_rows * num_cols * 8 * FILE_MEMORY_FACTOR)
+
+
+class MemoryBudget(object):
+    """
+    Byte-accounting memory budget used to throttle file readers.
+    A request is always granted when nothing is held, so a file larger than the budget can still be processed.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, num_bytes):
+        """Reserve the requested bytes if within the budget and return whether they were reserved."""
+
+        with self._lock:
+            if self.used_bytes > 0 and self.used_bytes + num_bytes > self.max_bytes:
+                return False
+
+            self.used_bytes += num_bytes
+            return True
+
+    def acquire(self, num_bytes):
+        """Reserve the requested bytes regardless of the budget (e.g. for the file currently being processed)."""
+
+        with self._lock:
+            self.used_bytes += num_bytes
+
+    def release(self, num_bytes):
+        with self._lock:
+            self.used_bytes = max(0, self.used_bytes - num_bytes)
+
+
+class SpillDict(MutableMapping):
+    """Dictionary that pickles its values to files in a spill folder, keeping only the keys in memory."""
+
+    def __init__(self, spill_path):
+        self.spill_path = spill_path
+        self._files = {}
+        self._num_spilled = 0
+        os.makedirs(spill_path, exist_ok=True)
+
+    def _new_filepath(self):
+        self._num_spilled += 1
+        return os.path.join(self.spill_path, f"{self._num_spilled}.pkl")
+
+    def __getitem__(self, key):
+        with open(self._files[key], "rb") as f:
+            return pickle.load(f)
+
+    def __setitem__(self, key, value):
+        filepath = self._files.get(key) or self._new_filepath()
+
+        with open(filepath, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._files[key] = filepath
+
+    def __delitem__(self, key):
+        filepath = self._files.pop(key)
+
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self):
+        return len(self._files)
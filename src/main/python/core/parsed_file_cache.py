@@ -0,0 +1,251 @@
+"""
+On-disk cache of parsed logger files.
+Each parsed (read and wrangled) file is stored as a binary columnar file so that re-screening a campaign, or
+inspecting raw data, loads the file without parsing the raw text again.
+Cached files are keyed by the raw file path, size and modified time and the logger read settings, and the least
+recently used cached files are evicted when the cache exceeds its size limit.
+"""
+
+__author__ = "Craig Dickinson"
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.compressed_files import raw_file_stat
+from core.memory_budget import parse_memory_size
+
+# Cache subfolder of parsed files
+PARSED_FILES_FOLDER = "Parsed Files"
+
+# Increment to invalidate cached files if the format of the cached files or parsed dataframes changes
+CACHE_VERSION = 1
+
+# Logger properties that affect the parsed dataframe of a file
+READ_SETTINGS_ATTRIBUTES = [
+    "file_format",
+    "file_timestamp_embedded",
+    "file_timestamp_format",
+    "first_col_data",
+    "file_delimiter",
+    "file_encoding",
+    "num_headers",
+    "channel_header_row",
+    "units_header_row",
+    "datetime_format",
+    "freq",
+    "trusted_time_grid",
+    "cols_to_process",
+    "unit_conv_factors",
+    "channel_names",
+]
+
+
+def create_parsed_file_cache(control):
+    """Return the parsed file cache of the project if enabled, otherwise None."""
+
+    if not control.parsed_file_cache:
+        return None
+
+    cache_path = os.path.join(
+        control.project_path, control.cache_output_folder, PARSED_FILES_FOLDER
+    )
+    max_bytes = parse_memory_size(control.parsed_file_cache_size)
+
+    return ParsedFileCache(cache_path, max_bytes)
+
+
+def read_settings_key(logger, stage, **settings):
+    """
+    Return a string identifying the logger read settings that determine a parsed file.
+    :param logger: LoggerProperties object
+    :param stage: Name of the parsing routine, e.g. "screening" or "raw data", as each produces a different dataframe
+    :param settings: Any other settings that determine the parsed file
+    """
+
+    settings.update({attr: getattr(logger, attr, None) for attr in READ_SETTINGS_ATTRIBUTES})
+    settings["stage"] = stage
+    settings["version"] = CACHE_VERSION
+
+    return json.dumps(settings, sort_keys=True, default=str)
+
+
+def save_frame(filepath, df):
+    """
+    Save a dataframe of numeric and datetime columns to a binary columnar (uncompressed numpy .npz) file.
+    Returns False if the dataframe contains column types that are not stored.
+    """
+
+    arrays = {}
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i].values
+        if not isinstance(values, np.ndarray) or values.dtype.kind not in "biufcmM":
+            return False
+        arrays[f"col_{i}"] = values
+
+    meta = dict(
+        columns=[list(c) if isinstance(c, tuple) else c for c in df.columns],
+        column_names=list(df.columns.names),
+        multi_index=isinstance(df.columns, pd.MultiIndex),
+        index_name=df.index.name,
+    )
+
+    # Store the index unless it is a default range index
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        index = df.index.values
+        if index.dtype.kind not in "biufcmM":
+            return False
+        arrays["index"] = index
+
+    with open(filepath, "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+
+    return True
+
+
+def load_frame(filepath):
+    """Load a dataframe saved with save_frame."""
+
+    with np.load(filepath) as data:
+        meta = json.loads(str(data["meta"]))
+        columns = meta["columns"]
+        df = pd.DataFrame({i: data[f"col_{i}"] for i in range(len(columns))})
+
+        if "index" in data:
+            df.index = data["index"]
+
+    if meta["multi_index"]:
+        df.columns = pd.MultiIndex.from_tuples([tuple(c) for c in columns])
+    else:
+        df.columns = columns
+
+    df.columns.names = meta["column_names"]
+    df.index.name = meta["index_name"]
+
+    return df
+
+
+class ParsedFileCache(object):
+    """Least recently used cache of parsed logger files stored in a cache folder."""
+
+    file_ext = ".npz"
+
+    def __init__(self, cache_path, max_bytes=None):
+        """
+        :param cache_path: Folder to store cached files
+        :param max_bytes: Size limit of the cache (bytes); None for no limit
+        """
+
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_path, exist_ok=True)
+
+        # Cached file sizes ordered from least to most recently used
+        self._files = OrderedDict()
+        self.total_bytes = 0
+        entries = [e for e in os.scandir(cache_path) if e.name.endswith(self.file_ext)]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            self._files[entry.name] = entry.stat().st_size
+            self.total_bytes += entry.stat().st_size
+
+    def _cache_filename(self, filepath, settings_key):
+        """
+        Return the cache filename of a raw file for the read settings,
+        or None if the raw file is not found or is a file stream.
+        """
+
+        if not isinstance(filepath, (str, os.PathLike)):
+            return None
+
+        try:
+            stat = raw_file_stat(filepath)
+        except OSError:
+            return None
+
+        key = "|".join(
+            [os.path.abspath(filepath), str(stat.st_size), str(stat.st_mtime_ns), settings_key]
+        )
+
+        return hashlib.md5(key.encode("utf-8")).hexdigest() + self.file_ext
+
+    def get(self, filepath, settings_key):
+        """Return the cached dataframe of a raw file, or None if the file is not cached."""
+
+        filename = self._cache_filename(filepath, settings_key)
+        cache_file = os.path.join(self.cache_path, filename or "")
+
+        with self._lock:
+            if filename in self._files:
+                self._files.move_to_end(filename)
+            # Check for a file cached by another process
+            elif filename and os.path.exists(cache_file):
+                self._files[filename] = os.path.getsize(cache_file)
+                self.total_bytes += self._files[filename]
+            else:
+                self.misses += 1
+                return None
+
+        try:
+            df = load_frame(cache_file)
+
+            # Mark as recently used for later runs
+            os.utime(cache_file)
+        except (OSError, ValueError, KeyError):
+            # Cached file removed or incomplete
+            with self._lock:
+                self.total_bytes -= self._files.pop(filename, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+
+        return df
+
+    def put(self, filepath, settings_key, df):
+        """Store the parsed dataframe of a raw file and evict the least recently used files above the size limit."""
+
+        filename = self._cache_filename(filepath, settings_key)
+        if filename is None:
+            return
+
+        # Write to a temporary file and rename so that an incomplete file is never loaded
+        cache_file = os.path.join(self.cache_path, filename)
+        temp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if not save_frame(temp_file, df):
+                return
+
+            os.replace(temp_file, cache_file)
+        except OSError:
+            return
+
+        size = os.path.getsize(cache_file)
+        with self._lock:
+            self.total_bytes += size - self._files.pop(filename, 0)
+            self._files[filename] = size
+            self._evict()
+
+    def _evict(self):
+        """Remove the least recently used cached files until within the size limit (keeping at least one)."""
+
+        while (
+            self.max_bytes is not None
+            and self.total_bytes > self.max_bytes
+            and len(self._files) > 1
+        ):
+            filename, size = self._files.popitem(last=False)
+            self.total_bytes -= size
+
+            try:
+                os.remove(os.path.join(self.cache_path, filename))
+            except OSError:
+                pass
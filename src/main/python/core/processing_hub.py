@@ -4,16 +4,53 @@ __author__ = "Craig Dickinson"
 
 import argparse
 import os
-from datetime import timedelta
+import pickle
+import queue
+import shutil
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from multiprocessing import Manager
 from pathlib import Path
-from time import time
+from time import sleep, time
 
 from PyQt5.QtCore import QObject, pyqtSignal
 
-from core.azure_cloud_storage import connect_to_azure_account, stream_blob
-from core.control import Control
+from core.azure_cloud_storage import (
+    BlobDownloadPool,
+    azure_clients,
+    connect_to_azure_account,
+    download_blob,
+)
+from core.blob_cache import create_blob_cache
+from core.campaign_store import campaign_store_path, ingest_logger, open_campaign_store
+from core.compressed_files import raw_file_stat
+from core.control import WORKING_PRECISIONS, Control
 from core.data_screen import DataScreen
 from core.data_screen_report import DataScreenReport
+from core.logger_properties import LoggerProperties, LoggerWarning
+from core.logger_screening import (
+    create_data_screen_copy,
+    create_task_control,
+    merge_screening_results,
+    screen_logger,
+    screen_logger_files,
+    screen_logger_files_separately,
+    split_file_indices,
+)
+from core.memory_budget import (
+    SPILL_FOLDER,
+    MemoryBudget,
+    MemorySizeError,
+    SpillDict,
+    estimate_file_memory,
+    parse_memory_size,
+)
+from core.parsed_file_cache import create_parsed_file_cache
+from core.project_config import ProjectConfigJSONFile
+from core.read_ahead import read_ahead
+from core.screening_manifest import CHECKPOINT_INTERVAL, ScreeningManifest
 from core.cycle_histograms import CycleHistograms
 from core.spectral_screening import SpectralScreening
 from core.stats_screening import StatsScreening
@@ -28,15 +65,255 @@ def parse_args(args):
     parser = argparse.ArgumentParser(prog="DataLab", description=prog_info)
     parser.add_argument("-V", "--version", version="%(prog)s (version 0.1)", action="version")
     parser.add_argument(
-        "datfile",
+        "config_file",
         action="store",
-        type=argparse.FileType("r"),
-        help="specify the controlling *.dat file including extension",
+        help="specify the project config *.json file including extension",
+    )
+    parser.add_argument(
+        "-m",
+        "--mode",
+        choices=["screening", "integration", "ingest"],
+        default="screening",
+        help="type of processing to run (default: screening); ingest converts the raw files of each logger "
+        "to a campaign store",
+    )
+    parser.add_argument(
+        "--parallel-mode",
+        choices=["Serial", "Loggers", "Files"],
+        help="override the parallel processing mode set in the project config",
+    )
+    parser.add_argument(
+        "-j",
+        "--num-workers",
+        type=int,
+        help="override the number of worker processes (0 for one per CPU)",
+    )
+    parser.add_argument(
+        "--prefetch-depth", type=int, help="override the number of files to read ahead"
+    )
+    parser.add_argument(
+        "--read-batch-size",
+        type=int,
+        help="override the number of consecutive csv files of a logger read with a single parser call",
+    )
+    parser.add_argument(
+        "--azure-downloads",
+        type=int,
+        help="override the number of Azure blobs downloaded in parallel ahead of being read",
+    )
+    parser.add_argument(
+        "--azure-blob-cache",
+        action="store_true",
+        help="store downloaded Azure blobs in the project cache folder and read them on later runs",
+    )
+    parser.add_argument(
+        "--block-reading",
+        action="store_true",
+        help="read logger files for screening in blocks of rows aligned to the sample lengths",
+    )
+    parser.add_argument(
+        "--precision",
+        choices=["float64", "float32"],
+        help="override the working precision of channel data",
+    )
+    parser.add_argument(
+        "--max-memory",
+        help="override the memory budget for screening, e.g. 8G (files in flight are limited and "
+        "results of screened loggers are spilled to disk)",
+    )
+    parser.add_argument(
+        "--use-campaign-stores",
+        action="store_true",
+        help="read ingested logger files from the logger campaign stores",
+    )
+    parser.add_argument(
+        "--parsed-file-cache",
+        action="store_true",
+        help="store parsed logger files in the project cache folder and load them on later runs",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and screen new logger files as they arrive (implies --incremental)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        help="seconds between scans of the logger folders in watch mode",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="screen only new or changed files and reuse cached results of unchanged files",
     )
 
     return parser.parse_args(args)
 
 
+def load_project_config(config_file):
+    """Load a project config JSON file and return the mapped control object."""
+
+    config = ProjectConfigJSONFile()
+    config.load_config_data(config_file)
+    control = config.json_to_control(Control())
+
+    # Report any warning messages
+    for warning in config.warnings:
+        print(f"Warning: {warning}")
+
+    # Use the config file location if project location not set
+    if control.project_path == "":
+        control.project_path = os.path.dirname(os.path.abspath(config_file))
+
+    return control
+
+
+def check_processing_setup(control: Control):
+    """Check the setup is valid for processing."""
+
+    logger: LoggerProperties
+
+    # Perform some input checks
+    # Check project path exists
+    if control.project_path == "":
+        msg = "Cannot process: Project location not set."
+        raise LoggerWarning(msg)
+
+    # Check at least one logger exists
+    if not control.loggers:
+        msg = "Cannot process: No loggers exist in setup."
+        raise LoggerWarning(msg)
+
+    # Check all ids are unique
+    control.check_logger_ids()
+
+    # Check logging durations and sample lengths are positive
+    enabled_loggers = (logger for logger in control.loggers if logger.enabled)
+    for logger in enabled_loggers:
+        if logger.duration <= 0:
+            msg = f"Cannot process: Logging duration for logger {logger.logger_id} is {logger.duration}.\n"
+            f"Logging duration must be greater than zero."
+            raise LoggerWarning(msg)
+
+        # TODO: Move to logger properties as a setup function
+        if control.global_process_stats is True and logger.process_stats is True:
+            if logger.stats_interval <= 0:
+                msg = f"Cannot process: Statistics sample length for logger "
+                f"{logger.logger_id} is {logger.stats_interval}.\n"
+                f"Statistics sample length must be greater than zero."
+                raise LoggerWarning(msg)
+
+        if control.global_process_spect is True and logger.process_spect is True:
+            if logger.spect_interval <= 0:
+                msg = f"Cannot process: Spectral sample length for logger "
+                f"{logger.logger_id} is {logger.spect_interval}.\n"
+                f"Spectral sample length must be greater than zero."
+                raise LoggerWarning(msg)
+
+    # Check working precision is valid
+    if control.working_precision not in WORKING_PRECISIONS:
+        msg = (
+            f"Cannot process: Working precision is {control.working_precision}.\n"
+            f"Working precision must be one of {', '.join(WORKING_PRECISIONS)}."
+        )
+        raise LoggerWarning(msg)
+
+    # Check read batch size is valid
+    if not isinstance(control.read_batch_size, int) or control.read_batch_size < 1:
+        msg = (
+            f"Cannot process: Read batch size is {control.read_batch_size}.\n"
+            f"Read batch size must be a whole number of at least 1."
+        )
+        raise LoggerWarning(msg)
+
+    # Check Azure download settings are valid
+    for name, value in [
+        ("Azure maximum downloads", control.azure_max_downloads),
+        ("Azure download retries", control.azure_download_retries),
+    ]:
+        if not isinstance(value, int) or value < 0:
+            msg = f"Cannot process: {name} is {value}.\n{name} must be a whole number of at least 0."
+            raise LoggerWarning(msg)
+
+    # Check memory budget is valid
+    try:
+        parse_memory_size(control.max_memory)
+    except MemorySizeError as e:
+        raise LoggerWarning(f"Cannot process: {e.message}")
+
+    # Check parsed file cache size is valid
+    if control.parsed_file_cache:
+        try:
+            parse_memory_size(control.parsed_file_cache_size)
+        except MemorySizeError as e:
+            raise LoggerWarning(f"Cannot process: Parsed file cache size - {e.message}")
+
+    # Check Azure blob cache size is valid
+    if control.azure_blob_cache:
+        try:
+            parse_memory_size(control.azure_blob_cache_size)
+        except MemorySizeError as e:
+            raise LoggerWarning(f"Cannot process: Azure blob cache size - {e.message}")
+
+
+def prepare_loggers(control: Control, status_callback=None, warning_callback=None):
+    """
+    Get raw filenames, check timestamps and select files in processing datetime range for all enabled loggers.
+    :param control: Control object
+    :param status_callback: Function called with a status message before each logger is prepared
+    :param warning_callback: Function connected to each logger warning signal
+    """
+
+    logger: LoggerProperties
+
+    # Paths to output folders
+    control.set_output_paths()
+
+    enabled_loggers = (logger for logger in control.loggers if logger.enabled)
+    for logger in enabled_loggers:
+        # Store logger filenames and check file timestamps
+        if status_callback is not None:
+            status_callback(
+                f"Checking setup: Checking file names for {logger.logger_id}. Please wait..."
+            )
+        logger.get_filenames()
+
+        # Select files to process and, if applicable, check file timestamps are valid
+        logger.set_files_to_process()
+
+        # Store expected file length
+        logger.expected_data_points = logger.freq * logger.duration
+
+        # Get all channel names and units if not already stored in logger object
+        if len(logger.all_channel_names) == 0 and len(logger.all_channel_units) == 0:
+            logger.get_all_columns()
+
+        # Detect the file encoding once per logger, if not detected when reading the header
+        if not logger.file_encoding:
+            logger.detect_file_encoding()
+
+        # Check requested channels exist
+        # Connect warning signal to warning callback
+        if warning_callback is not None:
+            try:
+                # Disconnect any existing connection to prevent repeated triggerings
+                logger.logger_warning_signal.disconnect()
+            except TypeError:
+                pass
+            logger.logger_warning_signal.connect(warning_callback)
+
+        # Set processed channel names and units as user values, if supplied, or file header values
+        logger.set_selected_column_and_units_names()
+
+        # Check for any columns without any units set and see if the units is embedded in the channel name;
+        # if so extract units from channel name and add to units list
+        logger.check_if_units_in_channel_name()
+
+        # Check number of headers match number of columns to process
+        # TODO: This should already have been enforced earlier so perhaps no longer required?
+        logger.check_headers()
+
+
 def create_output_folder(path_to_folder):
     """Create requested output folder if doesn't exist."""
 
@@ -51,6 +328,9 @@ class ProcessingHub(QObject):
     signal_notify_progress = pyqtSignal(dict)
     signal_update_output_info = pyqtSignal(list)
 
+    # Signal to report screening results have been updated with newly arrived files in watch mode
+    signal_watch_update = pyqtSignal()
+
     def __init__(self, control=Control()):
         super().__init__()
 
@@ -65,17 +345,36 @@ class ProcessingHub(QObject):
         self.any_spect_requested = False
         self.any_histograms_requested = False
 
+        # Azure blob cache hits and misses of the last run
+        self.blob_cache_hits = 0
+        self.blob_cache_misses = 0
+
         # Dictionaries to store all processed logger stats and spectrograms to load to gui after processing is complete
         self.dict_stats = {}
         self.dict_spectrograms = {}
         self.dict_histograms = {}
 
+        # Flag to stop watching logger folders
+        self.stop_watch = False
+
+        # Merged screening result of each logger stored between watch mode runs, keyed by logger id (None if not
+        # watching) - loggers with no new or changed files reuse their stored result instead of re-merging the
+        # cached results of every file
+        self.watch_results = None
+
     def _prepare_screening(self, data_report):
         """Review loggers and set properties for screening."""
 
         total_files = 0
         logger_ids = []
 
+        # Reset data screen sets and flags in case screening has been run before (e.g. in watch mode)
+        self.data_screen_sets = []
+        self.any_data_on_azure = False
+        self.any_stats_requested = False
+        self.any_spect_requested = False
+        self.any_histograms_requested = False
+
         global_process_stats = self.control.global_process_stats
         global_process_spect = self.control.global_process_spect
         global_process_histograms = self.control.global_process_histograms
@@ -149,12 +448,28 @@ class ProcessingHub(QObject):
 
         return total_files, logger_ids
 
-    def run_screening(self):
-        """Process screening setup."""
+    def run_screening(self, incremental=None):
+        """
+        Process screening setup.
+        :param incremental: If True, screen only new or changed files (the project incremental screening setting is
+        used if None)
+        """
 
         # SETUP
+        if incremental is None:
+            incremental = self.control.incremental_screening
         bloc_blob_service = None
+        stats_screening = None
+        spect_screening = None
+        histograms = None
         t0 = time()
+        self.blob_cache_hits = 0
+        self.blob_cache_misses = 0
+
+        # Clear the results of any previous run (including results spilled to disk)
+        self.dict_stats = {}
+        self.dict_spectrograms = {}
+        self.dict_histograms = {}
 
         # Structure to amalgamate data screening results
         data_report = DataScreenReport(
@@ -179,143 +494,125 @@ class ProcessingHub(QObject):
         # Screening report output folder
         create_output_folder(self.control.report_output_path)
 
-        # Connect to Azure account if to be used
-        if self.any_data_on_azure:
-            bloc_blob_service = connect_to_azure_account(
-                self.control.azure_account_name, self.control.azure_account_key
-            )
-
-        # PROCESSING
-        # Process each dataset
-        print("Processing loggers...")
-        file_count = 0
-        for i, data_screen in enumerate(self.data_screen_sets):
-            data_screen: DataScreen
-            logger = data_screen.logger
-            logger_id = logger.logger_id
-
-            # Initialise logger screening objects
-            if data_screen.stats_requested:
-                stats_screening.init_logger_stats()
-            if data_screen.spect_requested:
-                spect_screening.init_logger_spect(logger_id)
-            if data_screen.histograms_requested:
-                histograms.init_dataset(data_screen)
+        # Progress info package to emit to progress bar - updated before each file is processed
+        dict_progress = dict(
+            logger_ids=logger_ids,
+            logger_i=0,
+            file_i=0,
+            filename="",
+            num_logger_files=0,
+            file_count=0,
+            total_files=total_files,
+            elapsed_time="",
+        )
 
-            # Get file number of first file to be processed (this is akin to load case number for no timestamp files)
-            try:
-                first_file_num = logger.file_indices[0] + 1
-            except IndexError:
-                first_file_num = 1
+        def notify_file_progress(logger_i, file_i, filename):
+            """Update console and send progress info package to progress bar."""
 
-            # Initialise file parameters in case there are no files to process
-            j = 0
-            filename = ""
+            data_screen = self.data_screen_sets[logger_i]
             n = len(data_screen.files)
+            progress = f"Processing {data_screen.logger_id} file {file_i + 1} of {n} ({filename})"
+            print(f"\r{progress}", end="")
 
-            # Process each file
-            # Expose each sample here; that way it can be sent to different processing modules
-            for j, file in enumerate(data_screen.files):
-                # TODO: If expected file in sequence is missing, store results as nan
-                # Update console
-                filename = os.path.basename(file)
-                processed_file_num = first_file_num + j
-                progress = f"Processing {logger_id} file {j + 1} of {n} ({filename})"
-                print(f"\r{progress}", end="")
-                t = str(timedelta(seconds=round(time() - t0)))
+            # Number of files started is the count of files already processed
+            if dict_progress["filename"]:
+                dict_progress["file_count"] += 1
 
-                # Progress info package to emit to progress bar
-                dict_progress = dict(
-                    logger_ids=logger_ids,
-                    logger_i=i,
-                    file_i=j,
-                    filename=filename,
-                    num_logger_files=n,
-                    file_count=file_count,
-                    total_files=total_files,
-                    elapsed_time=t,
-                )
+            dict_progress["logger_i"] = logger_i
+            dict_progress["file_i"] = file_i
+            dict_progress["filename"] = filename
+            dict_progress["num_logger_files"] = n
+            dict_progress["elapsed_time"] = str(timedelta(seconds=round(time() - t0)))
+            self.signal_notify_progress.emit(dict(dict_progress))
 
-                # Send data package to progress bar
-                self.signal_notify_progress.emit(dict_progress)
-
-                # READ FILE TO DATA FRAME
-                # If streaming data from Azure Cloud read as a file stream
-                if logger.data_on_azure:
-                    file = stream_blob(bloc_blob_service, logger.container_name, logger.blobs[j])
-
-                # Read the file to a dataframe
-                df = data_screen.read_logger_file(file)
-
-                # Wrangle data to prepare for processing
-                df = data_screen.wrangle_data(df, file_idx=j)
-
-                # Select columns to process
-                df = data_screen.select_columns_to_process(df)
-                df = data_screen.set_column_names(df)
-                df = data_screen.apply_unit_conversions(df)
-
-                # # Filter data if requested
-                # df_filt=pd.DataFrame()
-                # if logger.process_type != "Unfiltered only":
-                #     if data_screen.apply_filters is True:
-                #         df_filt = data_screen.filter_data(df_stats_sample)
-
-                # =========================================================
-                # AT THIS POINT WE SPLIT INTO DIFFERENT PROCESSING MODULES
-                # =========================================================
-                # Data screening module
-                # Perform basic screening checks on file - check file has expected number of data points
-                data_screen.screen_data(file_num=j, df=df)
-
-                # Ignore file if not of expected length
-                # TODO: Allowing short sample length (revisit)
-                # if data_screen.points_per_file[j] == logger.expected_data_points:
-                if data_screen.points_per_file[j] <= logger.expected_data_points:
-                    # STATS SCREENING
-                    if data_screen.stats_requested:
-                        stats_screening.file_stats_processing(df, data_screen, processed_file_num)
-
-                    # SPECTRAL SCREENING
-                    if data_screen.spect_requested:
-                        spect_screening.file_spect_processing(df, data_screen, processed_file_num)
-
-                    # CALCULATE HISTOGRAMS
-                    if data_screen.histograms_requested:
-                        # Compute histograms for each channel in dataframe
-                        histograms.calc_histograms_on_dataframe(df, filename, data_screen)
-
-                file_count += 1
-
-            # Operations for logger i after all logger i files have been processed
-            if logger.files:
-                coverage = data_screen.calc_data_completeness()
-                print(f"\nData coverage for {logger_id} logger = {coverage.min():.1f}%\n")
-
-            # Add any files containing errors to screening report
-            data_report.add_files_with_bad_data(logger_id, data_screen.dict_bad_files)
-
-            # Export logger stats and store in memory to plot in gui
-            if data_screen.stats_requested and data_screen.stats_processed:
-                output_files = stats_screening.logger_stats_post(logger, data_screen)
-                self.signal_update_output_info.emit(output_files)
+        # PROCESSING
+        # Process each dataset
+        print("Processing loggers...")
+        num_workers = self.control.get_num_workers()
+        if self.control.parallel_mode == "Loggers" and not incremental:
+            num_workers = min(num_workers, len(self.data_screen_sets))
+
+        # Limit the number of workers and files read ahead to the memory budget, if set,
+        # and spill the results of screened loggers to disk (nothing to limit if no loggers are enabled)
+        memory_budget_bytes = parse_memory_size(self.control.max_memory)
+        memory_budget = None
+        worker_memory_budget_bytes = None
+        if memory_budget_bytes is not None and self.data_screen_sets:
+            file_bytes = max(estimate_file_memory(ds.logger) for ds in self.data_screen_sets)
+            num_workers = max(1, min(num_workers, memory_budget_bytes // file_bytes))
+            worker_memory_budget_bytes = memory_budget_bytes // num_workers
+            memory_budget = MemoryBudget(memory_budget_bytes)
+            self._spill_screening_results(stats_screening, spect_screening, histograms)
+
+        run_in_parallel = self.control.parallel_mode in ("Loggers", "Files") and num_workers > 1
+
+        if incremental or run_in_parallel:
+            if incremental:
+                # Screen only new or changed files and merge with cached results of unchanged files
+                if self.any_data_on_azure:
+                    bloc_blob_service = connect_to_azure_account(
+                        self.control.azure_account_name, self.control.azure_account_key
+                    )
+                results = self._screen_loggers_incrementally(
+                    num_workers if run_in_parallel else 1, notify_file_progress, bloc_blob_service
+                )
+            else:
+                # Screen loggers in worker processes
+                results = self._screen_loggers_in_parallel(
+                    num_workers, notify_file_progress, worker_memory_budget_bytes
+                )
 
-            # Export logger spectrograms and store in memory to plot in gui
-            if data_screen.spect_requested and data_screen.spect_processed:
-                output_files = spect_screening.logger_spect_post(data_screen)
-                self.signal_update_output_info.emit(output_files)
+            # Post-process the results in logger order
+            for result in results:
+                self._add_blob_cache_counts(result)
+                result.set_to_screening_modules(stats_screening, spect_screening, histograms)
+                self._logger_screening_post(
+                    result.data_screen, data_report, stats_screening, spect_screening, histograms
+                )
+        else:
+            # Connect to Azure account if to be used
+            if self.any_data_on_azure:
+                bloc_blob_service = connect_to_azure_account(
+                    self.control.azure_account_name, self.control.azure_account_key
+                )
 
-            # Export logger histograms and store in memory to plot in gui
-            if data_screen.histograms_requested and data_screen.histograms_processed:
-                # Calculate aggregate histogram for each column
-                histograms.calc_aggregate_histograms()
+            parsed_file_cache = create_parsed_file_cache(self.control)
+            blob_cache = None
+            if self.any_data_on_azure:
+                blob_cache = create_blob_cache(self.control)
+
+            for i, data_screen in enumerate(self.data_screen_sets):
+                campaign_store = open_campaign_store(self.control, data_screen.logger)
+                screen_logger_files(
+                    data_screen,
+                    stats_screening,
+                    spect_screening,
+                    histograms,
+                    bloc_blob_service,
+                    progress_callback=lambda j, filename: notify_file_progress(i, j, filename),
+                    prefetch_depth=self.control.prefetch_depth,
+                    memory_budget=memory_budget,
+                    parsed_file_cache=parsed_file_cache,
+                    campaign_store=campaign_store,
+                    read_batch_size=self.control.read_batch_size,
+                    block_reading=self.control.block_reading,
+                    max_downloads=self.control.azure_max_downloads,
+                    download_retries=self.control.azure_download_retries,
+                    blob_cache=blob_cache,
+                )
+                if campaign_store is not None:
+                    campaign_store.close()
+                self._logger_screening_post(
+                    data_screen, data_report, stats_screening, spect_screening, histograms
+                )
 
-                # Append column histograms dictionary to dataset dictionary
-                self.dict_histograms[logger_id] = histograms.dict_df_col_hists
+            if blob_cache is not None:
+                self.blob_cache_hits += blob_cache.hits
+                self.blob_cache_misses += blob_cache.misses
 
-                # Export dataset histograms
-                output_files = histograms.export_histograms()
-                self.signal_update_output_info.emit(output_files)
+        # Count the last file processed
+        if dict_progress["filename"]:
+            dict_progress["file_count"] += 1
 
         # Publish data screening report and update progress dialog
         output_file = self._publish_screening_report(data_report)
@@ -341,6 +638,7 @@ class ProcessingHub(QObject):
         print("Processing complete")
         t = str(timedelta(seconds=round(time() - t0)))
         print(f"Screening runtime = {t}")
+        self._print_azure_metrics()
 
         # Check and inform user if stats/spectrograms were requested but not calculated (e.g. due to bad files)
         if self.any_stats_requested and not any_stats_processed:
@@ -368,26 +666,394 @@ class ProcessingHub(QObject):
             self.dict_spectrograms = spect_screening.dict_spectrograms
 
         # Final progress info package to emit to progress bar
-        dict_progress = dict(
-            logger_ids=logger_ids,
-            logger_i=i,
-            file_i=j,
-            filename=filename,
-            num_logger_files=n,
-            file_count=file_count,
-            total_files=total_files,
-            elapsed_time=t,
-        )
+        dict_progress["elapsed_time"] = t
 
         # Send data package to progress bar
         self.signal_notify_progress.emit(dict_progress)
 
+    def _screen_loggers_in_parallel(
+        self, num_workers, notify_file_progress, worker_memory_budget_bytes=None
+    ):
+        """
+        Screen loggers in worker processes.
+        In Loggers mode each logger is screened as a single task; in Files mode the files of each logger are split
+        into chunks screened as separate tasks, which may finish in any order, and merged back in file order.
+        The number of tasks submitted but not yet merged is bounded, to bound the memory held by finished tasks.
+        Progress messages from the workers are relayed to the progress bar while the loggers are processed.
+        Yields the screening result of each logger in logger order.
+        """
+
+        # Tasks to screen, in logger and file order
+        tasks = deque()
+        for i, data_screen in enumerate(self.data_screen_sets):
+            if self.control.parallel_mode == "Files":
+                chunks = split_file_indices(len(data_screen.files), num_workers * 4)
+            else:
+                chunks = [None]
+
+            tasks.extend((i, file_indices) for file_indices in chunks)
+
+        max_tasks_in_flight = num_workers * 2
+        pending = deque()
+
+        # Workers do not need the logger objects of every logger in the project
+        control = create_task_control(self.control)
+
+        with Manager() as manager, ProcessPoolExecutor(max_workers=num_workers) as executor:
+            progress_queue = manager.Queue()
+
+            def submit_tasks():
+                # Keep workers busy across loggers, up to the maximum number of tasks in flight
+                while tasks and len(pending) < max_tasks_in_flight:
+                    logger_idx, file_indices = tasks.popleft()
+                    future = executor.submit(
+                        screen_logger,
+                        control,
+                        self.data_screen_sets[logger_idx],
+                        logger_idx,
+                        progress_queue,
+                        file_indices,
+                        None,
+                        worker_memory_budget_bytes,
+                    )
+                    pending.append((logger_idx, future))
+
+            submit_tasks()
+
+            for i in range(len(self.data_screen_sets)):
+                results = []
+
+                while pending and pending[0][0] == i:
+                    future = pending[0][1]
+
+                    # Relay progress until the task is complete
+                    while not future.done() or not progress_queue.empty():
+                        try:
+                            logger_i, file_i, filename = progress_queue.get(timeout=0.1)
+                        except queue.Empty:
+                            continue
+                        notify_file_progress(logger_i, file_i, filename)
+
+                    # Raises any exception encountered in the worker
+                    pending.popleft()
+                    results.append(future.result())
+                    submit_tasks()
+
+                result = merge_screening_results(results)
+
+                # Workers return a copy of the data screen object - reattach the original logger object
+                # and replace the data screen set
+                result.data_screen.logger = self.data_screen_sets[i].logger
+                self.data_screen_sets[i] = result.data_screen
+
+                yield result
+
+    def _screen_loggers_incrementally(
+        self, num_workers, notify_file_progress, bloc_blob_service=None
+    ):
+        """
+        Screen only the files of each logger that are new or have changed since the last screening run.
+        The screening result of each file is cached along with a manifest of the screened files, which is
+        checkpointed as files are screened so that an interrupted run resumes from the last checkpoint.
+        Yields the screening result of each logger, merged from the file results in file order.
+        """
+
+        executor = None
+        if num_workers > 1:
+            executor = ProcessPoolExecutor(max_workers=num_workers)
+
+        try:
+            for i, data_screen in enumerate(self.data_screen_sets):
+                logger = data_screen.logger
+                n = len(data_screen.files)
+                manifest = ScreeningManifest(
+                    self.control.cache_output_path, data_screen, self.control.hash_raw_files
+                )
+                manifest.load()
+
+                # Get file number of first file to be processed
+                try:
+                    first_file_num = logger.file_indices[0] + 1
+                except IndexError:
+                    first_file_num = 1
+
+                # Retrieve cached results of unchanged files
+                file_results = {}
+                for j in range(n):
+                    result = manifest.get_result(j, first_file_num + j)
+                    if result is not None:
+                        file_results[j] = result
+
+                files_to_screen = [j for j in range(n) if j not in file_results]
+                print(f"\n{logger.logger_id}: {n - len(files_to_screen)} of {n} files unchanged")
+
+                # In watch mode, reuse the merged result of the last run if the logger files are unchanged
+                result = self._get_watch_result(data_screen, files_to_screen)
+                if result is not None:
+                    self.data_screen_sets[i] = result.data_screen
+                    yield result
+                    continue
+
+                # Screen new and changed files and checkpoint the manifest periodically
+                try:
+                    screened_files = self._screen_files(
+                        i,
+                        data_screen,
+                        files_to_screen,
+                        executor,
+                        num_workers,
+                        notify_file_progress,
+                        bloc_blob_service,
+                    )
+                    for k, (j, result) in enumerate(screened_files):
+                        # Count blob cache use before the result is cached so it is not counted again on later runs
+                        self._add_blob_cache_counts(result)
+                        manifest.add_result(j, first_file_num + j, result)
+                        file_results[j] = result
+
+                        if (k + 1) % CHECKPOINT_INTERVAL == 0:
+                            manifest.save()
+                finally:
+                    manifest.save()
+
+                # Merge the file results in file order into a new result for the logger
+                result = screen_logger(
+                    self.control,
+                    create_data_screen_copy(self.control, data_screen),
+                    i,
+                    file_indices=[],
+                )
+                result = merge_screening_results([result] + [file_results[j] for j in range(n)])
+                self.data_screen_sets[i] = result.data_screen
+                self._store_watch_result(result)
+
+                yield result
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _get_watch_result(self, data_screen, files_to_screen):
+        """
+        Return a copy of the merged result of a logger stored in the last watch mode run if no files have been added,
+        removed or changed since, otherwise None.
+        """
+
+        if self.watch_results is None or files_to_screen:
+            return None
+
+        stored = self.watch_results.get(data_screen.logger_id)
+        if stored is None or stored[0] != data_screen.files:
+            return None
+
+        # The stored result is unpickled so that post-processing does not modify it for later runs
+        result = pickle.loads(stored[1])
+        result.data_screen.logger = data_screen.logger
+        result.data_screen.files = data_screen.files
+
+        return result
+
+    def _store_watch_result(self, result):
+        """Store the merged result of a logger in watch mode, to reuse if its files are unchanged at the next run."""
+
+        if self.watch_results is None:
+            return
+
+        data_screen = result.data_screen
+        self.watch_results[data_screen.logger_id] = (
+            list(data_screen.files),
+            pickle.dumps(result.without_logger(), protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
+    def _screen_files(
+        self,
+        logger_idx,
+        data_screen,
+        file_indices,
+        executor,
+        num_workers,
+        notify_file_progress,
+        bloc_blob_service,
+    ):
+        """
+        Screen each file of a logger separately, in worker processes if an executor is supplied.
+        In worker processes the files are split into chunks, each screened as a task sent one copy of the logger, and
+        the number of tasks submitted but not yet finished is bounded, as for _screen_loggers_in_parallel.
+        Yields (file index, screening result) tuples as each file is screened.
+        """
+
+        if executor is None:
+            for j in file_indices:
+                notify_file_progress(logger_idx, j, os.path.basename(data_screen.files[j]))
+                result = screen_logger(
+                    self.control,
+                    create_data_screen_copy(self.control, data_screen),
+                    logger_idx,
+                    file_indices=[j],
+                    bloc_blob_service=bloc_blob_service,
+                )
+                yield j, result
+        else:
+            chunks = deque(
+                [file_indices[k] for k in chunk]
+                for chunk in split_file_indices(len(file_indices), num_workers * 4)
+                if chunk
+            )
+            control = create_task_control(self.control)
+            max_tasks_in_flight = num_workers * 2
+            pending = set()
+
+            try:
+                while chunks or pending:
+                    while chunks and len(pending) < max_tasks_in_flight:
+                        pending.add(
+                            executor.submit(
+                                screen_logger_files_separately,
+                                control,
+                                create_data_screen_copy(control, data_screen),
+                                logger_idx,
+                                chunks.popleft(),
+                            )
+                        )
+
+                    # Yield results as they finish - the results are ordered when merged
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for j, result in future.result():
+                            notify_file_progress(logger_idx, j, os.path.basename(data_screen.files[j]))
+                            yield j, result
+            finally:
+                # Cancel any tasks not yet started if screening stops early or an error occurs
+                for future in pending:
+                    future.cancel()
+
+    def _spill_screening_results(self, stats_screening, spect_screening, histograms):
+        """
+        Store the results of each screened logger in files in the cache folder instead of in memory,
+        so that memory use does not grow with the number of loggers screened.
+        """
+
+        spill_path = os.path.join(self.control.cache_output_path, SPILL_FOLDER)
+        if os.path.exists(spill_path):
+            shutil.rmtree(spill_path)
+
+        if stats_screening:
+            stats_screening.dict_stats = SpillDict(os.path.join(spill_path, "Stats"))
+        if spect_screening:
+            spect_screening.dict_spectrograms = SpillDict(os.path.join(spill_path, "Spectrograms"))
+        if histograms:
+            self.dict_histograms = SpillDict(os.path.join(spill_path, "Histograms"))
+
+    def _logger_screening_post(
+        self, data_screen, data_report, stats_screening, spect_screening, histograms
+    ):
+        """Operations for a logger after all the logger files have been processed."""
+
+        logger = data_screen.logger
+        logger_id = logger.logger_id
+
+        if logger.files:
+            coverage = data_screen.calc_data_completeness()
+            print(f"\nData coverage for {logger_id} logger = {coverage.min():.1f}%\n")
+
+        # Add any files containing errors to screening report
+        data_report.add_files_with_bad_data(logger_id, data_screen.dict_bad_files)
+
+        # Export logger stats and store in memory to plot in gui
+        if data_screen.stats_requested and data_screen.stats_processed:
+            output_files = stats_screening.logger_stats_post(logger, data_screen)
+            self.signal_update_output_info.emit(output_files)
+
+        # Export logger spectrograms and store in memory to plot in gui
+        if data_screen.spect_requested and data_screen.spect_processed:
+            output_files = spect_screening.logger_spect_post(data_screen)
+            self.signal_update_output_info.emit(output_files)
+
+        # Export logger histograms and store in memory to plot in gui
+        if data_screen.histograms_requested and data_screen.histograms_processed:
+            # Calculate aggregate histogram for each column
+            histograms.calc_aggregate_histograms()
+
+            # Append column histograms dictionary to dataset dictionary
+            self.dict_histograms[logger_id] = histograms.dict_df_col_hists
+
+            # Export dataset histograms
+            output_files = histograms.export_histograms()
+            self.signal_update_output_info.emit(output_files)
+
+    def run_watch(self, max_polls=None):
+        """
+        Watch the logger folders and screen newly arrived (or changed) files as they land.
+        Screening is run incrementally, so only new files are screened and their results are merged with the cached
+        results of previously screened files to update the stored results and output files.
+        Runs until stop_watch is set or the maximum number of polls is reached.
+        """
+
+        self.stop_watch = False
+        self.watch_results = {}
+
+        try:
+            # Screen any files not yet screened (the folders are scanned first so that files arriving during the run
+            # are detected at the next poll)
+            watched_files = self._get_watched_files()
+            self.run_screening(incremental=True)
+            self.signal_watch_update.emit()
+
+            num_polls = 0
+            while not self.stop_watch and (max_polls is None or num_polls < max_polls):
+                # Wait for the poll interval, checking periodically whether watching has been stopped
+                t_poll = time() + self.control.watch_poll_interval
+                while not self.stop_watch and time() < t_poll:
+                    sleep(min(1, max(0, t_poll - time())))
+
+                if self.stop_watch:
+                    break
+
+                # Screening results and outputs are only updated if files have arrived or changed
+                num_polls += 1
+                files = self._get_watched_files()
+                if files != watched_files:
+                    watched_files = files
+                    print(f"\nNew logger files detected at {datetime.now():%Y-%m-%d %H:%M:%S}")
+                    self.run_screening(incremental=True)
+                    self.signal_watch_update.emit()
+        finally:
+            self.watch_results = None
+
+    def _get_watched_files(self):
+        """
+        Scan the logger folders and return a dictionary of the files to process for each enabled logger.
+        For local files the file size and modified time are included so that files still being written are detected.
+        """
+
+        dict_files = {}
+        enabled_loggers = (logger for logger in self.control.loggers if logger.enabled)
+        for logger in enabled_loggers:
+            logger.get_filenames()
+            logger.set_files_to_process()
+
+            if logger.data_on_azure:
+                dict_files[logger.logger_id] = list(logger.files)
+            else:
+                files = []
+                for f in logger.files:
+                    try:
+                        stat = raw_file_stat(os.path.join(logger.logger_path, f))
+                        files.append((f, stat.st_size, stat.st_mtime))
+                    except FileNotFoundError:
+                        pass
+                dict_files[logger.logger_id] = files
+
+        return dict_files
+
     def run_ts_integration(self):
         """Run time series integration setup."""
 
         # SETUP
         bloc_blob_service = None
+        blob_cache = None
         t0 = time()
+        self.blob_cache_hits = 0
+        self.blob_cache_misses = 0
         ts_integration = IntegrateTimeSeries(self.control)
 
         # Scan loggers to get total # files, list of logger names, files source (local or Azure)
@@ -399,6 +1065,7 @@ class ProcessingHub(QObject):
             bloc_blob_service = connect_to_azure_account(
                 self.control.azure_account_name, self.control.azure_account_key
             )
+            blob_cache = create_blob_cache(self.control)
 
         # PROCESSING
         # Process each dataset
@@ -410,15 +1077,63 @@ class ProcessingHub(QObject):
 
             # Initialise integrations object
             ts_integration.set_logger(logger)
+            campaign_store = open_campaign_store(self.control, logger)
 
             # Initialise file parameters in case there are no files to process
             j = 0
             filename = ""
             n = len(data_screen.files)
 
-            # Process each file
+            # Files ingested to the campaign store whose raw files are unchanged since
+            stored_files = set()
+            if campaign_store is not None:
+                stored_files = {j for j in range(n) if data_screen.is_file_in_store(campaign_store, j)}
+
+            # Download the logger blobs not in the campaign store ahead of them being read
+            download_pool = None
+            if logger.data_on_azure and self.control.azure_max_downloads > 0:
+                blob_names = [logger.blobs[j] for j in range(n) if j not in stored_files]
+                download_pool = BlobDownloadPool(
+                    bloc_blob_service,
+                    logger.container_name,
+                    blob_names,
+                    max_downloads=self.control.azure_max_downloads,
+                    retries=self.control.azure_download_retries,
+                    blob_cache=blob_cache,
+                )
+
+            def read_file(file_idx):
+                # READ FILE TO DATA FRAME
+                # Read from the campaign store if the file has been ingested
+                if file_idx in stored_files:
+                    return campaign_store.read_file(os.path.basename(data_screen.files[file_idx]))
+
+                # If streaming data from Azure Cloud read as a file stream
+                if download_pool is not None:
+                    file_stream = download_pool.get(logger.blobs[file_idx])
+                elif logger.data_on_azure:
+                    file_stream = download_blob(
+                        bloc_blob_service,
+                        logger.container_name,
+                        logger.blobs[file_idx],
+                        retries=self.control.azure_download_retries,
+                        blob_cache=blob_cache,
+                    )
+                else:
+                    file_stream = data_screen.files[file_idx]
+
+                # Read the file into a pandas dataframe
+                df_file = data_screen.read_logger_file(file_stream)
+
+                # Wrangle data to prepare for processing
+                return data_screen.wrangle_data(df_file, file_idx=file_idx)
+
+            # Process each file - the next prefetch_depth files are read in background threads
             # Expose each sample here; that way it can be sent to different processing modules
-            for j, file in enumerate(data_screen.files):
+            file_indices = range(n)
+            for j, df in read_ahead(read_file, file_indices, self.control.prefetch_depth):
+                file = data_screen.files[j]
+
                 # For first file, create logger output folder
                 if j == 0:
                     folder = os.path.basename(os.path.dirname(data_screen.files[0]))
@@ -444,17 +1159,6 @@ class ProcessingHub(QObject):
                 )
                 self.signal_notify_progress.emit(dict_progress)
 
-                # READ FILE TO DATA FRAME
-                # If streaming data from Azure Cloud read as a file stream
-                if logger.data_on_azure:
-                    file = stream_blob(bloc_blob_service, logger.container_name, logger.blobs[j])
-
-                # Read the file into a pandas dataframe
-                df = data_screen.read_logger_file(file)
-
-                # Wrangle data to prepare for processing
-                df = data_screen.wrangle_data(df, file_idx=j)
-
                 # TIME SERIES INTEGRATION
                 # Acceleration and/or angular rate conversion
                 if logger.process_integration:
@@ -470,14 +1174,24 @@ class ProcessingHub(QObject):
                 # Update progress dialog
                 self.signal_update_output_info.emit([out_filename])
 
+            if campaign_store is not None:
+                campaign_store.close()
+            if download_pool is not None:
+                download_pool.close()
+
             # Export RMS summary of all logger files, if requested, and update progress dialog
             if ts_integration.output_rms_summary is True:
                 out_filename = ts_integration.export_rms_summary(logger_id)
                 self.signal_update_output_info.emit([out_filename])
 
+        if blob_cache is not None:
+            self.blob_cache_hits = blob_cache.hits
+            self.blob_cache_misses = blob_cache.misses
+
         print("Processing complete")
         t = str(timedelta(seconds=round(time() - t0)))
         print(f"Screening runtime = {t}")
+        self._print_azure_metrics()
 
         # Final progress info dict to emit to progress bar
         dict_progress = dict(
@@ -492,6 +1206,87 @@ class ProcessingHub(QObject):
         )
         self.signal_notify_progress.emit(dict_progress)
 
+    def run_ingest(self):
+        """Ingest the files of each enabled logger to a campaign store."""
+
+        # SETUP
+        bloc_blob_service = None
+        t0 = time()
+        self.blob_cache_hits = 0
+        self.blob_cache_misses = 0
+        total_files, logger_ids = self._prepare_ts_int_screening()
+
+        # Connect to Azure account if to be used
+        if self.any_data_on_azure:
+            bloc_blob_service = connect_to_azure_account(
+                self.control.azure_account_name, self.control.azure_account_key
+            )
+
+        print("Ingesting loggers...")
+        file_count = 0
+        for i, data_screen in enumerate(self.data_screen_sets):
+            logger_id = data_screen.logger_id
+            n = len(data_screen.files)
+
+            def notify_file_progress(j, filename):
+                nonlocal file_count
+
+                progress = f"Ingesting {logger_id} file {j + 1} of {n} ({filename})"
+                print(f"\r{progress}", end="")
+                dict_progress = dict(
+                    logger_ids=logger_ids,
+                    logger_i=i,
+                    file_i=j,
+                    filename=filename,
+                    num_logger_files=n,
+                    file_count=file_count,
+                    total_files=total_files,
+                    elapsed_time=str(timedelta(seconds=round(time() - t0))),
+                )
+                self.signal_notify_progress.emit(dict_progress)
+                file_count += 1
+
+            if n == 0:
+                continue
+
+            store_path = campaign_store_path(self.control, data_screen.logger)
+            ingest_logger(
+                data_screen,
+                store_path,
+                bloc_blob_service,
+                progress_callback=notify_file_progress,
+                prefetch_depth=self.control.prefetch_depth,
+            )
+            self.signal_update_output_info.emit([store_path])
+
+        print("\nIngest complete")
+        t = str(timedelta(seconds=round(time() - t0)))
+        print(f"Ingest runtime = {t}")
+        self._print_azure_metrics()
+
+    def _print_azure_metrics(self):
+        """Report the requests made to Azure by the shared client of the account in this process."""
+
+        if not self.any_data_on_azure:
+            return
+
+        metrics = azure_clients.metrics(self.control.azure_account_name, self.control.azure_account_key)
+        if metrics is not None:
+            print(f"Azure: {metrics.summary()}")
+
+        if self.blob_cache_hits or self.blob_cache_misses:
+            print(f"Azure blob cache: {self.blob_cache_hits} hits, {self.blob_cache_misses} misses")
+
+    def _add_blob_cache_counts(self, result):
+        """Add the Azure blob cache hits and misses of a worker screening result to the run totals."""
+
+        self.blob_cache_hits += result.blob_cache_hits
+        self.blob_cache_misses += result.blob_cache_misses
+
+        # Reset so the counts are not added again when the result is merged or cached
+        result.blob_cache_hits = 0
+        result.blob_cache_misses = 0
+
     def _publish_screening_report(self, data_report):
         """Compile and export Excel data screening report."""
 
@@ -504,3 +1299,100 @@ class ProcessingHub(QObject):
 
         # Needs to be a list to update progress window
         return [output_file]
+
+
+class ConsoleProgress(object):
+    """Report processing throughput and estimated time remaining to the console when running without the gui."""
+
+    def __init__(self):
+        self.t0 = time()
+
+    def update_progress(self, dict_progress):
+        """Append throughput and ETA to the current console progress line."""
+
+        file_count = dict_progress["file_count"]
+        total_files = dict_progress["total_files"]
+        elapsed = time() - self.t0
+
+        if file_count > 0 and elapsed > 0:
+            rate = file_count / elapsed
+            eta = str(timedelta(seconds=round((total_files - file_count) / rate)))
+            print(f" [{file_count}/{total_files} files, {rate:.2f} files/s, ETA {eta}]", end="")
+
+    @staticmethod
+    def add_output_files(output_files):
+        """Report output files written."""
+
+        for output_file in output_files:
+            if output_file:
+                print(f"\n{output_file}", end="")
+
+
+def main(args):
+    """Run screening or time series integration on a project config without the gui."""
+
+    args = parse_args(args)
+
+    try:
+        control = load_project_config(args.config_file)
+        control.processing_mode = args.mode
+
+        # Command line overrides of processing settings
+        if args.parallel_mode is not None:
+            control.parallel_mode = args.parallel_mode
+        if args.num_workers is not None:
+            control.num_workers = args.num_workers
+        if args.prefetch_depth is not None:
+            control.prefetch_depth = args.prefetch_depth
+        if args.read_batch_size is not None:
+            control.read_batch_size = args.read_batch_size
+        if args.block_reading:
+            control.block_reading = True
+        if args.azure_downloads is not None:
+            control.azure_max_downloads = args.azure_downloads
+        if args.azure_blob_cache:
+            control.azure_blob_cache = True
+        if args.incremental:
+            control.incremental_screening = True
+        if args.poll_interval is not None:
+            control.watch_poll_interval = args.poll_interval
+        if args.max_memory is not None:
+            control.max_memory = args.max_memory
+        if args.precision is not None:
+            control.working_precision = args.precision
+        if args.parsed_file_cache:
+            control.parsed_file_cache = True
+        if args.use_campaign_stores:
+            control.use_campaign_stores = True
+
+        check_processing_setup(control)
+        prepare_loggers(
+            control, status_callback=print, warning_callback=lambda msg: print(f"Warning: {msg}")
+        )
+    except Exception as e:
+        print(f"Error checking setup: {e}", file=sys.stderr)
+        return 1
+
+    processing_hub = ProcessingHub(control=control)
+    console = ConsoleProgress()
+    processing_hub.signal_notify_progress.connect(console.update_progress)
+    processing_hub.signal_update_output_info.connect(console.add_output_files)
+
+    if control.processing_mode == "integration":
+        processing_hub.run_ts_integration()
+    elif control.processing_mode == "ingest":
+        processing_hub.run_ingest()
+    elif args.watch:
+        try:
+            processing_hub.run_watch()
+        except KeyboardInterrupt:
+            print("\nStopped watching logger folders")
+    else:
+        processing_hub.run_screening()
+    print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
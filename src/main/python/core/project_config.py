@@ -7,6 +7,7 @@ import os
 
 from dateutil.parser import parse
 
+from core.blob_listing import get_listings_path
 from core.control import Control
 from core.logger_properties import LoggerProperties
 from core.calc_seascatter import Seascatter
@@ -98,6 +99,18 @@ class ProjectConfigJSONFile(object):
         control.azure_account_key = self._get_key_value(
             section=key, data=data, key="azure_account_key", attr=control.azure_account_key
         )
+        control.azure_max_downloads = self._get_key_value(
+            section=key, data=data, key="azure_max_downloads", attr=control.azure_max_downloads
+        )
+        control.azure_download_retries = self._get_key_value(
+            section=key, data=data, key="azure_download_retries", attr=control.azure_download_retries
+        )
+        control.azure_blob_cache = self._get_key_value(
+            section=key, data=data, key="azure_blob_cache", attr=control.azure_blob_cache
+        )
+        control.azure_blob_cache_size = self._get_key_value(
+            section=key, data=data, key="azure_blob_cache_size", attr=control.azure_blob_cache_size
+        )
         control.filter_type = self._get_key_value(
             section=key, data=data, key="filter_type", attr=control.filter_type
         )
@@ -149,6 +162,51 @@ class ProjectConfigJSONFile(object):
         control.hist_to_h5 = self._get_key_value(
             section=key, data=data, key="histogram_to_h5", attr=control.hist_to_h5
         )
+        control.parallel_mode = self._get_key_value(
+            section=key, data=data, key="parallel_mode", attr=control.parallel_mode
+        )
+        control.num_workers = self._get_key_value(
+            section=key, data=data, key="num_workers", attr=control.num_workers
+        )
+        control.prefetch_depth = self._get_key_value(
+            section=key, data=data, key="prefetch_depth", attr=control.prefetch_depth
+        )
+        control.read_batch_size = self._get_key_value(
+            section=key, data=data, key="read_batch_size", attr=control.read_batch_size
+        )
+        control.block_reading = self._get_key_value(
+            section=key, data=data, key="block_reading", attr=control.block_reading
+        )
+        control.max_memory = self._get_key_value(
+            section=key, data=data, key="max_memory", attr=control.max_memory
+        )
+        control.incremental_screening = self._get_key_value(
+            section=key,
+            data=data,
+            key="incremental_screening",
+            attr=control.incremental_screening,
+        )
+        control.hash_raw_files = self._get_key_value(
+            section=key, data=data, key="hash_raw_files", attr=control.hash_raw_files
+        )
+        control.working_precision = self._get_key_value(
+            section=key, data=data, key="working_precision", attr=control.working_precision
+        )
+        control.parsed_file_cache = self._get_key_value(
+            section=key, data=data, key="parsed_file_cache", attr=control.parsed_file_cache
+        )
+        control.parsed_file_cache_size = self._get_key_value(
+            section=key,
+            data=data,
+            key="parsed_file_cache_size",
+            attr=control.parsed_file_cache_size,
+        )
+        control.use_campaign_stores = self._get_key_value(
+            section=key, data=data, key="use_campaign_stores", attr=control.use_campaign_stores
+        )
+        control.watch_poll_interval = self._get_key_value(
+            section=key, data=data, key="watch_poll_interval", attr=control.watch_poll_interval
+        )
 
         return control
 
@@ -182,6 +240,7 @@ class ProjectConfigJSONFile(object):
             # Map Azure account settings (if any) to logger
             logger.azure_account_name = control.azure_account_name
             logger.azure_account_key = control.azure_account_key
+            logger.azure_listings_path = get_listings_path(control)
 
             # Finally, assign logger to control object
             control.logger_ids.append(logger_id)
@@ -305,6 +364,15 @@ class ProjectConfigJSONFile(object):
             key="file_delimiter",
             attr=logger.file_delimiter,
         )
+        logger.csv_engine = self._get_key_value(
+            section=logger.logger_id, data=dict_logger, key="csv_engine", attr=logger.csv_engine
+        )
+        logger.trusted_time_grid = self._get_key_value(
+            section=logger.logger_id,
+            data=dict_logger,
+            key="trusted_time_grid",
+            attr=logger.trusted_time_grid,
+        )
         logger.num_headers = self._get_key_value(
             section=logger.logger_id,
             data=dict_logger,
@@ -673,6 +741,10 @@ class ProjectConfigJSONFile(object):
         d["project_location"] = control.project_path
         d["azure_account_name"] = control.azure_account_name
         d["azure_account_key"] = control.azure_account_key
+        d["azure_max_downloads"] = control.azure_max_downloads
+        d["azure_download_retries"] = control.azure_download_retries
+        d["azure_blob_cache"] = control.azure_blob_cache
+        d["azure_blob_cache_size"] = control.azure_blob_cache_size
         d["filter_type"] = control.filter_type
         d["butterworth_order"] = control.butterworth_order
         d["global_process_stats"] = control.global_process_stats
@@ -690,6 +762,19 @@ class ProjectConfigJSONFile(object):
         d["histogram_to_csv"] = control.hist_to_csv
         d["histogram_to_xlsx"] = control.hist_to_xlsx
         d["histogram_to_h5"] = control.hist_to_h5
+        d["parallel_mode"] = control.parallel_mode
+        d["num_workers"] = control.num_workers
+        d["prefetch_depth"] = control.prefetch_depth
+        d["read_batch_size"] = control.read_batch_size
+        d["block_reading"] = control.block_reading
+        d["max_memory"] = control.max_memory
+        d["incremental_screening"] = control.incremental_screening
+        d["hash_raw_files"] = control.hash_raw_files
+        d["working_precision"] = control.working_precision
+        d["parsed_file_cache"] = control.parsed_file_cache
+        d["parsed_file_cache_size"] = control.parsed_file_cache_size
+        d["use_campaign_stores"] = control.use_campaign_stores
+        d["watch_poll_interval"] = control.watch_poll_interval
 
         self.data["general"] = d
 
@@ -760,6 +845,8 @@ class ProjectConfigJSONFile(object):
         dict_props["first_col_data"] = logger.first_col_data
         dict_props["file_ext"] = logger.file_ext
         dict_props["file_delimiter"] = logger.file_delimiter
+        dict_props["csv_engine"] = logger.csv_engine
+        dict_props["trusted_time_grid"] = logger.trusted_time_grid
         dict_props["num_header_rows"] = logger.num_headers
         dict_props["channel_header_row"] = logger.channel_header_row
         dict_props["units_header_row"] = logger.units_header_row
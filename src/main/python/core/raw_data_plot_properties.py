@@ -3,13 +3,18 @@
 __author__ = "Craig Dickinson"
 
 import os
+from contextlib import nullcontext
 
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
 
+from core.arrow_csv import read_csv
+from core.compressed_files import is_compressed, open_raw_file
 from core.logger_properties import LoggerProperties
-from core.read_files import read_2hps2_acc, read_fugro_csv, read_pulse_acc
+from core.parsed_file_cache import read_settings_key
+from core.read_files import DEFAULT_ENCODINGS, read_2hps2_acc, read_fugro_csv, read_pulse_acc
+from core.timestamps import parse_timestamps
 
 
 class RawDataRead(object):
@@ -27,12 +32,18 @@ class RawDataRead(object):
         self.file_format = ""
         self.first_col_data = ""
         self.delim = ""
+        self.csv_engine = "pandas"
+        self.encoding = None
         self.datetime_format = ""
         self.header_rows = 0
         self.skip_rows = []
+        self.has_units_header = False
         self.channel_names = []
         self.channel_units = []
 
+        # Logger read settings identifying files in the parsed file cache
+        self.settings_key = ""
+
         # Initialise with current logger settings
         self.set_logger(logger)
 
@@ -49,6 +60,8 @@ class RawDataRead(object):
         self.file_format = logger.file_format
         self.first_col_data = logger.first_col_data
         self.delim = logger.file_delimiter
+        self.csv_engine = logger.csv_engine
+        self.encoding = logger.file_encoding or DEFAULT_ENCODINGS.get(self.file_format)
         self.datetime_format = logger.datetime_format
         header_row = logger.channel_header_row - 1
         units_row = logger.units_header_row - 1
@@ -64,38 +77,85 @@ class RawDataRead(object):
         else:
             self.header_rows = [header_row, units_row]
 
-    def read_file(self, file):
-        """Read time series file into dataframe using logger file format settings."""
+        # Files with a units header are read with channel and units column levels (the units of each file are not
+        # held in a campaign store)
+        self.has_units_header = self.file_format != "Custom" or isinstance(self.header_rows, list)
 
-        # Read data to dataframe
-        if self.file_format == "Custom":
-            try:
-                df = pd.read_csv(
-                    file,
-                    sep=self.delim,
-                    header=self.header_rows,
-                    skiprows=self.skip_rows,
-                    skip_blank_lines=False,
-                )
-            # Attempt to handle non-utf-8 encoded files
-            except UnicodeDecodeError:
-                df = pd.read_csv(
-                    file,
-                    sep=self.delim,
-                    header=self.header_rows,
-                    skiprows=self.skip_rows,
-                    skip_blank_lines=False,
-                    encoding="latin1",
-                )
-            df = self.wrangle_data(df, os.path.basename(file))
-        elif self.file_format == "Fugro-csv":
-            df = read_fugro_csv(file)
-        elif self.file_format == "Pulse-acc":
-            df = read_pulse_acc(file, multi_header=True)
-        elif self.file_format == "2HPS2-acc":
-            df = read_2hps2_acc(file, multi_header=True)
+        self.settings_key = read_settings_key(logger, "raw data")
+
+    def read_file(self, file, parsed_file_cache=None):
+        """
+        Read time series file into dataframe using logger file format settings.
+        If a parsed file cache is given, the file is loaded from the cache when previously parsed.
+        """
+
+        if parsed_file_cache is not None:
+            df = parsed_file_cache.get(file, self.settings_key)
+            if df is not None:
+                return df
+
+        # Decompress compressed csv files and zip archive members as a stream into the csv readers
+        # (the acc file readers open compressed files themselves)
+        if self.file_format in DEFAULT_ENCODINGS and is_compressed(file):
+            source = open_raw_file(file)
+        else:
+            source = nullcontext(file)
+
+        with source as f:
+            # Read data to dataframe
+            if self.file_format == "Custom":
+                try:
+                    df = read_csv(
+                        f,
+                        engine=self.csv_engine,
+                        sep=self.delim,
+                        header=self.header_rows,
+                        skiprows=self.skip_rows,
+                        skip_blank_lines=False,
+                        encoding=self.encoding,
+                    )
+                # Handle files not of the detected encoding
+                except UnicodeDecodeError:
+                    self.encoding = "latin1"
+                    if hasattr(f, "seek"):
+                        f.seek(0)
+                    df = read_csv(
+                        f,
+                        engine=self.csv_engine,
+                        sep=self.delim,
+                        header=self.header_rows,
+                        skiprows=self.skip_rows,
+                        skip_blank_lines=False,
+                        encoding="latin1",
+                    )
+                df = self.wrangle_data(df, os.path.basename(file))
+            elif self.file_format == "Fugro-csv":
+                df = read_fugro_csv(f, engine=self.csv_engine, encoding=self.encoding)
+            elif self.file_format == "Pulse-acc":
+                df = read_pulse_acc(f, multi_header=True)
+            elif self.file_format == "2HPS2-acc":
+                df = read_2hps2_acc(f, multi_header=True)
+            else:
+                df = pd.DataFrame()
+
+        if parsed_file_cache is not None and not df.empty:
+            parsed_file_cache.put(file, self.settings_key, df)
+
+        return df
+
+    def read_store_file(self, store, filename):
+        """Read a file from a logger campaign store into a dataframe indexed by time in seconds."""
+
+        df = store.read_file(filename)
+
+        # Create time index
+        if store.is_timestamp:
+            t = (df.iloc[:, 0] - df.iloc[0, 0]).dt.total_seconds().values.round(3)
+            df = df.set_index(t)
         else:
-            df = pd.DataFrame()
+            df.index = df.iloc[:, 0]
+
+        df.index.name = "Time (s)"
 
         return df
 
@@ -119,7 +179,7 @@ class RawDataRead(object):
         # Convert first column (should be timestamps string) to datetimes
         else:
             try:
-                df.iloc[:, 0] = pd.to_datetime(df.iloc[:, 0], format=self.datetime_format)
+                df.iloc[:, 0] = parse_timestamps(df.iloc[:, 0], self.datetime_format)
 
                 # Create time stamps index
                 t = (df.iloc[:, 0] - df.iloc[0, 0]).dt.total_seconds().values.round(3)
@@ -0,0 +1,66 @@
+"""
+Read-ahead pipeline to overlap reading logger files with processing.
+Files are read in background threads while the current file is processed on the calling thread.
+"""
+
+__author__ = "Craig Dickinson"
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def read_ahead(read_func, items, depth=0, memory_budget=None, item_bytes=0):
+    """
+    Generator to apply a read function to each item, reading up to depth items ahead in background threads.
+    Results are yielded in the order of items. Any exception raised reading an item is raised when it is yielded.
+    :param read_func: Function that takes an item and returns the read data
+    :param items: Iterable of items to read (e.g. file paths)
+    :param depth: Number of items to read ahead of the item being processed (0 to read on the calling thread)
+    :param memory_budget: Optional MemoryBudget object - items are only read ahead while within the budget
+    :param item_bytes: Estimated memory (bytes) held by each item until it has been processed
+    :return: Generator of (item, read data) tuples
+    """
+
+    if depth < 1:
+        for item in items:
+            yield item, read_func(item)
+        return
+
+    items = iter(items)
+    pending = deque()
+    next_item = next(items, StopIteration)
+    held_bytes = 0
+
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        try:
+            while True:
+                # Fill the queue with the current item plus up to depth items ahead, while within the memory budget
+                while next_item is not StopIteration and len(pending) <= depth:
+                    if memory_budget is not None:
+                        # The current item is always read, even if it exceeds the budget
+                        if pending and not memory_budget.try_acquire(item_bytes):
+                            break
+                        if not pending:
+                            memory_budget.acquire(item_bytes)
+                        held_bytes += item_bytes
+
+                    pending.append((next_item, executor.submit(read_func, next_item)))
+                    next_item = next(items, StopIteration)
+
+                if not pending:
+                    break
+
+                item, future = pending.popleft()
+                yield item, future.result()
+
+                # Item has been processed so release its memory
+                if memory_budget is not None:
+                    memory_budget.release(item_bytes)
+                    held_bytes -= item_bytes
+        finally:
+            # Cancel any reads not yet started if the consumer stops early or an error occurs
+            for _, future in pending:
+                future.cancel()
+
+            if memory_budget is not None:
+                memory_budget.release(held_bytes)
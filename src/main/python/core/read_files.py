@@ -2,12 +2,44 @@
 
 __author__ = "Craig Dickinson"
 
-import csv
+import codecs
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import pandas as pd
 
+from core.arrow_csv import read_csv
+from core.compressed_files import open_raw_file
+from core.timestamps import parse_timestamps, timestamps_from_offsets
+
+# Encodings of csv logger file formats used unless a different encoding is detected
+DEFAULT_ENCODINGS = {"Custom": "utf-8", "Fugro-csv": "latin1"}
+
+# Number of bytes read from the start of a file to detect its encoding
+ENCODING_SAMPLE_BYTES = 65536
+
+
+def detect_encoding(sample, default="utf-8"):
+    """
+    Detect the encoding of a file from a sample of bytes from its start.
+    Returns the default encoding if the sample is ASCII, "utf-8" if the sample is valid UTF-8, else "latin1" (which
+    decodes any bytes).
+    """
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8"
+
+    if sample.isascii():
+        return default
+
+    # Use an incremental decoder so a multi-byte character cut off at the end of the sample is not an error
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "latin1"
+
+    return "utf-8"
+
 
 def read_general_file(
     file, delim=",", header_rows="infer", skip_rows=None, skip_blank_lines=True, encoding=None
@@ -26,13 +58,18 @@ def read_general_file(
     return df
 
 
-def read_fugro_csv(file):
-    """Raw data module: Read Fugro-csv file to dataframe. Index is time steps."""
+def read_fugro_csv(file, engine="pandas", encoding="latin1"):
+    """
+    Raw data module: Read Fugro-csv file to dataframe. Index is time steps.
+    :param engine: Csv engine to use - "pandas" or "pyarrow"
+    :param encoding: File encoding
+    """
 
-    df = pd.read_csv(file, header=[1, 2], index_col=0, encoding="latin1")
+    df = read_csv(file, engine=engine, header=[1, 2], index_col=0, encoding=encoding)
 
     try:
-        df.index = pd.to_datetime(df.index, format="%d-%b-%Y %H:%M:%S.%f")
+        timestamps = parse_timestamps(df.index, "%d-%b-%Y %H:%M:%S.%f")
+        df.index = pd.DatetimeIndex(timestamps, name=df.index.name)
     except ValueError:
         raise ValueError("Could not convert timestamps to datetime. Expect dates in UTC format.")
 
@@ -47,7 +84,34 @@ def read_fugro_csv(file):
     return df
 
 
-def read_pulse_acc(filename, multi_header=True):
+def read_acc_headers(f, num_headers, header_rows):
+    """
+    Read the file info header lines of an acc file.
+    :param f: File object positioned at the start of the file
+    :param num_headers: Number of header lines preceding the data
+    :param header_rows: Dictionary of header line numbers (1-based) to return
+    :return: Dictionary of the requested header lines split by single spaces
+    """
+
+    headers = {}
+    for i in range(1, num_headers + 1):
+        line = f.readline()
+        if i in header_rows.values():
+            headers[i] = line.rstrip("\r\n").split(" ")
+
+    return {key: headers.get(row, []) for key, row in header_rows.items()}
+
+
+def read_acc_body(f, usecols=None, chunksize=None):
+    """
+    Read the space-delimited numeric body of an acc file (or only the columns in usecols) to a float dataframe.
+    If chunksize is given, an iterator of dataframes of chunksize rows is returned.
+    """
+
+    return pd.read_csv(f, sep=r"\s+", header=None, usecols=usecols, dtype="float", chunksize=chunksize)
+
+
+def read_pulse_acc(filename, multi_header=True, usecols=None):
     """
     Read Pulse-acc file to dataframe.
     single-index header is used for screening module:
@@ -59,39 +123,81 @@ def read_pulse_acc(filename, multi_header=True):
         Index is time steps.
     :param filename: *.acc file
     :param multi_header: If true header is a two-row multi-index, otherwise is a single row
+    :param usecols: Optional list of column positions to read (must include the time steps column 0)
     :return: df
     """
 
     # TODO: Add Azure support
+    with open_raw_file(filename, "r") as f:
+        # Skip file info headers but extract header row and timestamp row data
+        header, dt_start = read_pulse_acc_header(f, usecols)
+
+        # Read body
+        df = read_acc_body(f, usecols)
+
+    # For raw data module
+    if multi_header is True:
+        # Create timestamps using start timestamp marker and time steps column
+        timestamps = timestamps_from_offsets(dt_start, df.iloc[:, 0].values)
+
+        # Create multi-index header of channel names and units and time steps index
+        channels = [col.split("(")[0].strip() for col in header]
+        units = [col.split("(")[1][:-1] for col in header]
+        header = list(zip(channels, units))
+        header.insert(0, ("Timestamp", ""))
+        header = pd.MultiIndex.from_tuples(header, names=["channels", "units"])
+        df = df.set_index(df.columns[0])
+        df.index.name = "Time (s)"
+        df.insert(loc=0, column="Timestamp", value=timestamps)
+        df.columns = header
+    # For screening module
+    else:
+        # Create single row header of only channel names (i.e. strip out the units)
+        channels = [col.split("(")[0].strip() for col in header]
+        df = set_acc_screening_columns(df, channels, dt_start)
+
+    return df
+
+
+def read_pulse_acc_blocks(filename, block_length, usecols=None):
+    """
+    Screening module: Read Pulse-acc file as a sequence of dataframes of block_length rows (the last block may be
+    short), with the same header and timestamps as read_pulse_acc with a single-row header.
+    """
+
+    with open_raw_file(filename, "r") as f:
+        header, dt_start = read_pulse_acc_header(f, usecols)
+        channels = [col.split("(")[0].strip() for col in header]
+
+        for df in read_acc_body(f, usecols, chunksize=block_length):
+            yield set_acc_screening_columns(df, channels, dt_start)
+
+
+def read_pulse_acc_header(f, usecols=None):
+    """
+    Read the header of a Pulse-acc file, leaving the file positioned at the start of the data.
+    :return: List of "channel (units)" column names (excluding the time steps column) and start datetime
+    """
+
     num_headers = 20
     header_row = 18
     timestamp_row = 20
 
-    with open(filename, "r") as f:
-        accreader = csv.reader(f, delimiter=" ")
-
-        # Skip file info headers but extract header row and timestamp row data
-        for i in range(num_headers):
-            # Read columns header
-            if i == header_row - 1:
-                header = next(accreader)
-            # Read the start timestamp
-            elif i == timestamp_row - 1:
-                ts_start = next(accreader)
-            else:
-                next(accreader)
-
-        # Read body - drop blanks
-        data = [[x for x in line if x != ""] for line in accreader]
+    # Skip file info headers but extract header row and timestamp row data
+    headers = read_acc_headers(f, num_headers, dict(header=header_row, ts_start=timestamp_row))
 
     # Convert column names list so that split by ":" not " "
-    header = " ".join(header).split(":")
+    header = " ".join(headers["header"]).split(":")
 
     # Drop "%Data," from the first column
     header[0] = header[0].split(",")[1]
 
+    # Keep the headers of the columns read (header excludes the time steps column)
+    if usecols is not None:
+        header = [header[c - 1] for c in sorted(usecols) if c > 0]
+
     # Extract and convert start timestamp to datetime
-    ts_start = [int(i) for i in ts_start[1:]]
+    ts_start = [int(i) for i in headers["ts_start"][1:]]
     dt_start = datetime(
         ts_start[5],  # year
         ts_start[4],  # month
@@ -101,49 +207,71 @@ def read_pulse_acc(filename, multi_header=True):
         ts_start[0],  # second
     )
 
-    # Create dataframe and timestamps using start timestamp marker and time steps column
-    df = pd.DataFrame(data, dtype="float")
-    ts = df.iloc[:, 0].values
-    timestamps = [dt_start + timedelta(seconds=t) for t in ts]
+    return header, dt_start
+
+
+def read_2hps2_acc(filename, multi_header=True, usecols=None):
+    """
+    Read old-school Pulse-acc file format generated by 2HPS2.
+    text-based files that are space-delimited to dataframe.
+    single-index header is used for screening module:
+        Header is channel names only (units are omitted);
+        Index is range index (note time steps column is replaced by timestamps).
+    multi-header is used for raw data module:
+        Header is channel names and units as a multi-index header;
+        Timestamps columns added;
+        Index is time steps.
+    :param filename: *.acc file
+    :param multi_header: If true header is a two-row multi-index, otherwise is a single row
+    :param usecols: Optional list of column positions to read (must include the time steps column 0)
+    :return: df
+    """
+
+    with open_raw_file(filename, "r") as f:
+        # Skip file info headers but extract channels, units and timestamp row data
+        channels, units, dt_start = read_2hps2_acc_header(f, usecols)
+
+        # Read body
+        df = read_acc_body(f, usecols)
 
     # For raw data module
     if multi_header is True:
+        # Create timestamps using start timestamp marker and time steps column
+        timestamps = timestamps_from_offsets(dt_start, df.iloc[:, 0].values)
+
         # Create multi-index header of channel names and units and time steps index
-        channels = [col.split("(")[0].strip() for col in header]
-        units = [col.split("(")[1][:-1] for col in header]
+        units = [i.strip().split("(")[1][:-1] for i in units]
         header = list(zip(channels, units))
         header.insert(0, ("Timestamp", ""))
         header = pd.MultiIndex.from_tuples(header, names=["channels", "units"])
         df = df.set_index(df.columns[0])
         df.index.name = "Time (s)"
         df.insert(loc=0, column="Timestamp", value=timestamps)
+        df.columns = header
     # For screening module
     else:
-        # Create single row header of only channel names (i.e. strip out the units)
-        # Replace time steps column with timestamps and use range index
-        header = ["Timestamp"] + [col.split("(")[0].strip() for col in header]
-        df.iloc[:, 0] = timestamps
-
-    # Set desired header (single or multi-index)
-    df.columns = header
+        df = set_acc_screening_columns(df, channels, dt_start)
 
     return df
 
 
-def read_2hps2_acc(filename, multi_header=True):
+def read_2hps2_acc_blocks(filename, block_length, usecols=None):
     """
-    Read old-school Pulse-acc file format generated by 2HPS2.
-    text-based files that are space-delimited to dataframe.
-    single-index header is used for screening module:
-        Header is channel names only (units are omitted);
-        Index is range index (note time steps column is replaced by timestamps).
-    multi-header is used for raw data module:
-        Header is channel names and units as a multi-index header;
-        Timestamps columns added;
-        Index is time steps.
-    :param filename: *.acc file
-    :param multi_header: If true header is a two-row multi-index, otherwise is a single row
-    :return: df
+    Screening module: Read 2HPS2-acc file as a sequence of dataframes of block_length rows (the last block may be
+    short), with the same header and timestamps as read_2hps2_acc with a single-row header.
+    """
+
+    with open_raw_file(filename, "r") as f:
+        channels, _, dt_start = read_2hps2_acc_header(f, usecols)
+
+        for df in read_acc_body(f, usecols, chunksize=block_length):
+            yield set_acc_screening_columns(df, channels, dt_start)
+
+
+def read_2hps2_acc_header(f, usecols=None):
+    """
+    Read the header of a 2HPS2-acc file, leaving the file positioned at the start of the data.
+    :return: Lists of channel names and units (excluding the time steps column) and start datetime
     """
 
     num_headers = 27
@@ -151,29 +279,25 @@ def read_2hps2_acc(filename, multi_header=True):
     units_row = 17
     timestamp_row = 20
 
-    with open(filename, "r") as f:
-        accreader = csv.reader(f, delimiter=" ")
-
-        # Skip file info headers
-        for i in range(num_headers):
-            if i == header_row - 1:
-                channels = next(accreader)
-            elif i == units_row - 1:
-                units = next(accreader)
-            elif i == timestamp_row - 1:
-                ts_start = next(accreader)
-            else:
-                next(accreader)
-
-        # Read body - drop blanks
-        data = [[x for x in line if x != ""] for line in accreader]
+    # Skip file info headers but extract channels, units and timestamp row data
+    headers = read_acc_headers(
+        f,
+        num_headers,
+        dict(channels=header_row, units=units_row, ts_start=timestamp_row),
+    )
 
     # Convert column names list so that split by "," not " ", drop "Time" item and trim
-    channels = " ".join(channels).split(",")[1:]
+    channels = " ".join(headers["channels"]).split(",")[1:]
     channels = [c.strip() for c in channels]
+    units = " ".join(headers["units"]).split(",")[1:]
+
+    # Keep the channels and units of the columns read (lists exclude the time steps column)
+    if usecols is not None:
+        channels = [channels[c - 1] for c in sorted(usecols) if c > 0]
+        units = [units[c - 1] for c in sorted(usecols) if c > 0]
 
     # Read the start timestamp marker and get start datetime
-    ts_start = [int(i) for i in ts_start[5:]]
+    ts_start = [int(i) for i in headers["ts_start"][5:]]
     dt_start = datetime(
         ts_start[5],  # year
         ts_start[4],  # month
@@ -183,31 +307,17 @@ def read_2hps2_acc(filename, multi_header=True):
         ts_start[0],  # second
     )
 
-    # Create dataframe and timestamps using start timestamp marker and time steps column
-    df = pd.DataFrame(data, dtype="float")
-    ts = df.iloc[:, 0].values
-    timestamps = [dt_start + timedelta(seconds=t) for t in ts]
+    return channels, units, dt_start
 
-    # For raw data module
-    if multi_header is True:
-        # Create multi-index header of channel names and units and time steps index
-        units = " ".join(units).split(",")[1:]
-        units = [i.strip().split("(")[1][:-1] for i in units]
-        header = list(zip(channels, units))
-        header.insert(0, ("Timestamp", ""))
-        header = pd.MultiIndex.from_tuples(header, names=["channels", "units"])
-        df = df.set_index(df.columns[0])
-        df.index.name = "Time (s)"
-        df.insert(loc=0, column="Timestamp", value=timestamps)
-    # For screening module
-    else:
-        # Create single row header of only channel names (i.e. strip out the units)
-        # Replace time steps column with timestamps and use range index
-        header = ["Timestamp"] + channels
-        df.iloc[:, 0] = timestamps
 
-    # Set desired header (single or multi-index)
-    df.columns = header
+def set_acc_screening_columns(df, channels, dt_start):
+    """
+    Replace the time steps column of acc file data with timestamps, using the start timestamp marker, and set a
+    single row header of the channel names (range index is kept).
+    """
+
+    df[df.columns[0]] = timestamps_from_offsets(dt_start, df.iloc[:, 0].values)
+    df.columns = ["Timestamp"] + channels
 
     return df
 
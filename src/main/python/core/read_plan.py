@@ -0,0 +1,61 @@
+"""
+Compiled plan of the columns of a logger file to read for screening.
+Used by the file readers so that columns not to be processed are never parsed or held in memory.
+"""
+
+__author__ = "Craig Dickinson"
+
+import numpy as np
+
+
+class ReadPlan(object):
+    """Columns of a logger file to read and the data types to parse them as."""
+
+    def __init__(self, use_cols, num_file_cols=0, dtype="float64"):
+        """
+        :param use_cols: Zero-based positions of the columns to process, including the timestamp/time column 0
+        :param num_file_cols: Expected number of columns in the logger files (0 if unknown)
+        :param dtype: Data type to parse the channel columns as
+        """
+
+        cols = sorted(set(use_cols))
+
+        # Columns beyond the expected number of file columns are created as dummy columns after reading
+        if num_file_cols > 0:
+            self.cols = [c for c in cols if c < num_file_cols]
+            self.missing_cols = [c for c in cols if c >= num_file_cols]
+        else:
+            self.cols = cols
+            self.missing_cols = []
+
+        # Parse channel columns directly to floats - the timestamp/time column is left to be inferred
+        self.dtypes = {c: dtype for c in self.cols if c > 0}
+
+    def project(self, df):
+        """
+        Select the plan columns of a dataframe of all file columns and create dummy data for missing columns.
+        Used when the columns could not be selected by the file reader.
+        """
+
+        # Check all requested columns exist in file
+        n = len(df.columns)
+        cols = self.cols + self.missing_cols
+        missing_cols = [x for x in cols if x >= n]
+        valid_cols = [x for x in cols if x < n]
+
+        # Slice valid columns
+        df = df.iloc[:, valid_cols].copy()
+
+        # Create dummy data for missing columns
+        for i in missing_cols:
+            df["Dummy " + str(i + 1)] = np.nan
+
+        return df
+
+    def add_missing_cols(self, df):
+        """Create dummy data for the plan columns that are not in the logger files."""
+
+        for i in self.missing_cols:
+            df["Dummy " + str(i + 1)] = np.nan
+
+        return df
@@ -0,0 +1,190 @@
+"""
+Manifest of the files screened for a logger and the cached screening results of each file.
+Used to screen only new or changed files when a campaign is re-screened and to resume an interrupted screening run.
+"""
+
+__author__ = "Craig Dickinson"
+
+import hashlib
+import json
+import os
+import pickle
+
+from core.compressed_files import open_raw_file, raw_file_stat
+
+# Number of screened files between saving the manifest
+CHECKPOINT_INTERVAL = 10
+
+# Logger properties that affect the screening results of a file
+# (processing date/index range is not included as it only affects which files are screened)
+FINGERPRINT_ATTRIBUTES = [
+    "file_format",
+    "file_timestamp_embedded",
+    "file_timestamp_format",
+    "first_col_data",
+    "file_delimiter",
+    "file_encoding",
+    "num_headers",
+    "channel_header_row",
+    "units_header_row",
+    "datetime_format",
+    "trusted_time_grid",
+    "freq",
+    "duration",
+    "cols_to_process",
+    "unit_conv_factors",
+    "channel_names",
+    "channel_units",
+    "process_type",
+    "low_cutoff_freq",
+    "high_cutoff_freq",
+    "stats_interval",
+    "spect_interval",
+    "psd_nperseg",
+    "psd_window",
+    "psd_overlap",
+    "channel_bin_sizes",
+    "channel_num_bins",
+]
+
+
+def screening_fingerprint(data_screen):
+    """Return a hash of the logger settings and screening flags that determine the screening results of a file."""
+
+    logger = data_screen.logger
+    settings = {attr: getattr(logger, attr, None) for attr in FINGERPRINT_ATTRIBUTES}
+    settings["filter_type"] = data_screen.filter_type
+    settings["butterworth_order"] = data_screen.butterworth_order
+    settings["working_precision"] = data_screen.working_precision
+    settings["stats_requested"] = data_screen.stats_requested
+    settings["spect_requested"] = data_screen.spect_requested
+    settings["histograms_requested"] = data_screen.histograms_requested
+    settings_str = json.dumps(settings, sort_keys=True, default=str)
+
+    return hashlib.md5(settings_str.encode("utf-8")).hexdigest()
+
+
+def file_content_hash(filepath, block_size=2**20):
+    """Return the md5 hash of a file's contents."""
+
+    md5 = hashlib.md5()
+    with open_raw_file(filepath) as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            md5.update(block)
+
+    return md5.hexdigest()
+
+
+class ScreeningManifest(object):
+    """Manifest of screened files of a logger stored with the pickled screening result of each file."""
+
+    manifest_filename = "manifest.json"
+
+    def __init__(self, cache_path, data_screen, hash_files=False):
+        self.data_screen = data_screen
+        self.logger_id = data_screen.logger_id
+        self.logger_cache_path = os.path.join(cache_path, self.logger_id)
+        self.manifest_file = os.path.join(self.logger_cache_path, self.manifest_filename)
+        self.fingerprint = screening_fingerprint(data_screen)
+        self.hash_files = hash_files
+
+        # Dictionary of manifest entries for each screened file, keyed by file path relative to the logger folder
+        self.files = {}
+
+    def load(self):
+        """Load manifest if it exists and was created with the same screening settings; otherwise start afresh."""
+
+        self.files = {}
+
+        try:
+            with open(self.manifest_file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+
+        if data.get("fingerprint") == self.fingerprint:
+            self.files = data.get("files", {})
+
+    def save(self):
+        """Write manifest to file (written to a temporary file first so a crash cannot corrupt it)."""
+
+        os.makedirs(self.logger_cache_path, exist_ok=True)
+        data = dict(logger_id=self.logger_id, fingerprint=self.fingerprint, files=self.files)
+        temp_file = self.manifest_file + ".tmp"
+
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+
+        os.replace(temp_file, self.manifest_file)
+
+    def file_properties(self, file_idx, file_num):
+        """
+        Return the properties used to detect whether a logger file is new or has changed.
+        Azure blobs are identified by the ETag recorded when the blobs were listed, which changes when a blob is
+        overwritten.
+        """
+
+        props = dict(file_num=file_num, size=None, mtime=None, hash=None, etag=None)
+        logger = self.data_screen.logger
+
+        if logger.data_on_azure:
+            props["etag"] = logger.blob_etags.get(logger.blobs[file_idx])
+        else:
+            filepath = self.data_screen.files[file_idx]
+            stat = raw_file_stat(filepath)
+            props["size"] = stat.st_size
+            props["mtime"] = stat.st_mtime
+
+            if self.hash_files is True:
+                props["hash"] = file_content_hash(filepath)
+
+        return props
+
+    def file_key(self, file_idx):
+        """
+        Return the manifest key of a file - its path relative to the logger folder, so that files of the same name in
+        subfolders or zip archives, or with different extensions, have their own entries.
+        """
+
+        filepath = self.data_screen.files[file_idx]
+        logger_path = self.data_screen.logger.logger_path
+
+        return os.path.relpath(filepath, logger_path).replace("\\", "/") if logger_path else filepath
+
+    def get_result(self, file_idx, file_num):
+        """Return the cached screening result of a file if the file is unchanged, otherwise None."""
+
+        entry = self.files.get(self.file_key(file_idx))
+
+        if entry is None:
+            return None
+
+        props = self.file_properties(file_idx, file_num)
+        if any(entry.get(k) != v for k, v in props.items()):
+            return None
+
+        try:
+            with open(os.path.join(self.logger_cache_path, entry["result_file"]), "rb") as f:
+                result = pickle.load(f)
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            return None
+
+        return result
+
+    def add_result(self, file_idx, file_num, result):
+        """Cache the screening result of a file and add the file to the manifest."""
+
+        # Results are stored in a file named by a hash of the file key
+        key = self.file_key(file_idx)
+        result_file = hashlib.md5(key.encode("utf-8")).hexdigest() + ".pkl"
+        os.makedirs(self.logger_cache_path, exist_ok=True)
+
+        # Store only the screening results - the logger object is not required to merge results
+        result = result.without_logger()
+
+        with open(os.path.join(self.logger_cache_path, result_file), "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        entry = self.file_properties(file_idx, file_num)
+        entry["result_file"] = result_file
+        self.files[key] = entry
@@ -131,7 +131,11 @@ def apply_butterworth_filter(df, sos_filter):
     if sos_filter is None:
         return pd.DataFrame()
 
-    data = signal.sosfiltfilt(sos_filter, df.values, axis=0)
+    # Filter coefficients are kept at float64 precision; filtered float32 data is returned as float32
+    values = df.values
+    data = signal.sosfiltfilt(sos_filter, values, axis=0)
+    if values.dtype == np.float32:
+        data = data.astype(np.float32)
 
     return pd.DataFrame(data, index=df.index, columns=df.columns)
 
@@ -166,6 +170,8 @@ def apply_rectangular_filter(df, fs=1, low_cutoff=None, high_cutoff=None, detren
 
     # ifft
     filtered = np.fft.ifft(fft, axis=0).real
+    if np.asarray(df).dtype == np.float32:
+        filtered = filtered.astype(np.float32)
     df_filtered = pd.DataFrame(filtered, index=df.index, columns=df.columns)
 
     return df_filtered
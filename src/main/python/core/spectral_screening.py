@@ -36,22 +36,20 @@ class SpectralScreening(object):
         self.spect_unfilt = Spectrogram(logger_id, self.control.spect_output_path)
         self.spect_filt = Spectrogram(logger_id, self.control.spect_output_path)
 
-    def file_spect_processing(self, df_file, data_screen, processed_file_num):
+    def file_spect_processing(self, file_samples, data_screen, processed_file_num):
         """Spectral processing module."""
 
         logger = data_screen.logger
         sample_length = data_screen.spect_sample_length
-        df_spect = df_file.copy()
-        df_spect_sample = pd.DataFrame()
 
-        while len(df_spect) > 0:
+        for start, end in file_samples.sample_bounds(sample_length):
             # Store the file number of processed sample (only of use for time step indexes)
             data_screen.spect_file_nums.append(processed_file_num)
 
-            # Extract sample data frame from main dataset
-            df_spect_sample, df_spect = data_screen.sample_data(
-                df_spect_sample, df_spect, sample_length, type="spectral"
-            )
+            # Extract sample data frame from file data and store start and end times of sample
+            df_spect_sample = file_samples.sample(start, end)
+            data_screen.spect_sample_start.append(df_spect_sample.iloc[0, 0])
+            data_screen.spect_sample_end.append(df_spect_sample.iloc[-1, 0])
 
             # Process sample if meets required length
             # if len(df_spect_sample) <= sample_length:
@@ -69,8 +67,8 @@ class SpectralScreening(object):
             # Filtered data
             if logger.process_type != "Unfiltered only":
                 if data_screen.apply_filters is True:
-                    # Apply low/high pass filtering
-                    df_filt = data_screen.filter_data(df_spect_sample)
+                    # Low/high pass filtered sample (shared with stats screening)
+                    df_filt = file_samples.filtered_sample(start, end)
 
                     # Calculate sample PSD and add to spectrogram array
                     self.spect_filt.add_data(
@@ -81,9 +79,6 @@ class SpectralScreening(object):
                     )
                     data_screen.spect_processed = True
 
-            # Clear sample data frame ready for next sample set
-            df_spect_sample = pd.DataFrame()
-
         return data_screen.spect_processed
 
     def logger_spect_post(self, data_screen):
@@ -232,6 +227,42 @@ class Spectrogram(object):
                     # TODO: Compile warnings to control object to report to GUI at the end and write to Screening Report
                     # raise ValueError(msg)
 
+    def merge(self, other):
+        """Append the spectrograms of another spectrogram object (containing later samples)."""
+
+        if other.freq.size > 0:
+            self.freq = other.freq
+        if self.expected_length == 0:
+            self.expected_length = other.expected_length
+
+        for channel, spect in other.spectrograms.items():
+            if channel not in self.spectrograms:
+                self.spectrograms[channel] = spect
+            else:
+                self.spectrograms[channel] = np.row_stack([self.spectrograms[channel], spect])
+
+    def num_samples(self):
+        """Return the number of samples processed (the spectrogram of a single sample is a 1d array)."""
+
+        if not self.spectrograms:
+            return 0
+
+        return np.atleast_2d(next(iter(self.spectrograms.values()))).shape[0]
+
+    def truncate(self, num_samples):
+        """Discard the spectrogram rows of the samples after the first num_samples."""
+
+        if num_samples == 0:
+            self.spectrograms = {}
+            self.freq = np.array([])
+            self.expected_length = 0
+            return
+
+        for channel, spect in self.spectrograms.items():
+            if spect.ndim == 2:
+                spect = spect[:num_samples]
+                self.spectrograms[channel] = spect[0] if num_samples == 1 else spect
+
     def set_spectrogram_index(self, dates, file_nums):
         """Store all sample start dates if timestamps used, or file numbers if not."""
 
@@ -3,6 +3,7 @@
 __author__ = "Craig Dickinson"
 
 import os.path
+import warnings
 
 import numpy as np
 import pandas as pd
@@ -39,27 +40,24 @@ class StatsScreening(object):
         self.stats_unfilt = LoggerStats()
         self.stats_filt = LoggerStats()
 
-    def file_stats_processing(self, df_file, data_screen, processed_file_num):
+    def file_stats_processing(self, file_samples, data_screen, processed_file_num):
         """Stats processing module."""
 
         logger = data_screen.logger
         sample_length = data_screen.stats_sample_length
-        df_stats = df_file.copy()
-        df_stats_sample = pd.DataFrame()
 
-        while len(df_stats) > 0:
+        for start, end in file_samples.sample_bounds(sample_length):
             # Store the file number of processed sample (only of use for time step indexes)
             data_screen.stats_file_nums.append(processed_file_num)
 
-            # Extract sample dataframe from main dataset
-            df_stats_sample, df_stats = data_screen.sample_data(
-                df_stats_sample, df_stats, sample_length, type="stats"
-            )
+            # Extract sample dataframe from file data and store start and end times of sample
+            df_stats_sample = file_samples.sample(start, end)
+            data_screen.stats_sample_start.append(df_stats_sample.iloc[0, 0])
+            data_screen.stats_sample_end.append(df_stats_sample.iloc[-1, 0])
 
             # Process sample if meets required length
             # TODO: Allowing short sample length (revisit)
             # if len(df_stats_sample) == sample_length:
-            # if len(df_stats_sample) <= sample_length:
             # Unfiltered data
             if logger.process_type != "Filtered only":
                 # Calculate sample stats
@@ -69,16 +67,13 @@ class StatsScreening(object):
             # Filtered data
             if logger.process_type != "Unfiltered only":
                 if data_screen.apply_filters is True:
-                    # Apply low/high pass filtering
-                    df_filt = data_screen.filter_data(df_stats_sample)
+                    # Low/high pass filtered sample (shared with spectral screening)
+                    df_filt = file_samples.filtered_sample(start, end)
 
                     # Calculate sample stats
                     self.stats_filt.calc_stats(df_filt)
                     data_screen.stats_processed = True
 
-            # Clear sample dataframe ready for next sample set
-            df_stats_sample = pd.DataFrame()
-
         return data_screen.stats_processed
 
     def logger_stats_post(self, logger, data_screen):
@@ -159,8 +154,14 @@ class LoggerStats(object):
         # Calculate min, max, mean and std for each channel
         mn = data.min()
         mx = data.max()
-        ave = data.mean()
-        std = data.std()
+
+        # Mean and std of float32 data are accumulated and returned at float64 precision (intended, so that the
+        # float32 working precision only reduces the memory of the channel data, not the accuracy of the stats)
+        if len(data.columns) > 0 and (data.dtypes == np.float32).all():
+            ave, std = float64_mean_std(data)
+        else:
+            ave = data.mean()
+            std = data.std()
 
         # Append to internal list
         self.min.append(mn.values)
@@ -175,6 +176,25 @@ class LoggerStats(object):
         # m = calc_slope(x, y)
         # self.std.append(np.array([m, m, m]))
 
+    def merge(self, other):
+        """Append the stats of another logger stats object (containing later samples)."""
+
+        self.min.extend(other.min)
+        self.max.extend(other.max)
+        self.mean.extend(other.mean)
+        self.std.extend(other.std)
+
+    def num_samples(self):
+        """Return the number of samples processed."""
+
+        return len(self.min)
+
+    def truncate(self, num_samples):
+        """Discard the stats of the samples after the first num_samples."""
+
+        for stats in (self.min, self.max, self.std, self.mean):
+            del stats[num_samples:]
+
 
 def calc_slope(x, y):
     """Calculate the slope between two time series."""
@@ -184,6 +204,21 @@ def calc_slope(x, y):
     return m
 
 
+def float64_mean_std(data):
+    """
+    Calculate the mean and sample standard deviation of each column of a dataframe using float64 accumulators.
+    Used for float32 data; the results are float64, as for float64 data (the promotion is intended).
+    """
+
+    # Suppress warnings of all-nan columns, which give nan as for pandas
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        ave = np.nanmean(data.values, axis=0, dtype=np.float64)
+        std = np.nanstd(data.values, axis=0, dtype=np.float64, ddof=1)
+
+    return pd.Series(ave, index=data.columns), pd.Series(std, index=data.columns)
+
+
 class StatsOutput(object):
     """Class to compile and export logger stats."""
 
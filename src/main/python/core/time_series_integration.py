@@ -8,6 +8,7 @@ import numpy as np
 import pandas as pd
 from scipy.constants import g
 
+from core.compressed_files import inner_filename, split_archive_path
 from core.control import Control
 from core.logger_properties import LoggerProperties
 from core.signal_processing import (
@@ -25,6 +26,7 @@ class IntegrateTimeSeries(object):
         # Filter settings
         self.filter_type = control.filter_type
         self.butterworth_order = control.butterworth_order
+        self.working_precision = control.working_precision
 
         self.apply_g_correction = True
         self.gravity_correction_check = True
@@ -132,7 +134,7 @@ class IntegrateTimeSeries(object):
         # We calculate angles first as need angles for gravity correction of accelerations
         if self.ang_rate_x_col != "Not used":
             angle_cols.append("Angle X (deg)")
-            ang_rates = df[self.ang_rate_x_col].values
+            ang_rates = self._channel_values(df, self.ang_rate_x_col)
 
             # Apply unit conversion if requested
             if self.ang_rate_x_units_conv == "rad to deg":
@@ -150,7 +152,7 @@ class IntegrateTimeSeries(object):
 
         if self.ang_rate_y_col != "Not used":
             angle_cols.append("Angle Y (deg)")
-            ang_rates = df[self.ang_rate_y_col].values
+            ang_rates = self._channel_values(df, self.ang_rate_y_col)
 
             # Apply unit conversion if requested
             if self.ang_rate_y_units_conv == "rad to deg":
@@ -169,7 +171,7 @@ class IntegrateTimeSeries(object):
         # Convert accelerations to displacements (with optional gravity correction)
         if self.acc_x_col != "Not used":
             disp_cols.append("Disp X (m)")
-            accels = df[self.acc_x_col].values
+            accels = self._channel_values(df, self.acc_x_col)
 
             # Apply unit conversion if requested
             if self.acc_x_units_conv == "mm to m":
@@ -197,7 +199,7 @@ class IntegrateTimeSeries(object):
 
         if self.acc_y_col != "Not used":
             disp_cols.append("Disp Y (m)")
-            accels = df[self.acc_y_col].values
+            accels = self._channel_values(df, self.acc_y_col)
 
             # Apply unit conversion if requested
             if self.acc_y_units_conv == "mm to m":
@@ -225,7 +227,7 @@ class IntegrateTimeSeries(object):
 
         if self.acc_z_col != "Not used":
             disp_cols.append("Disp Z (m)")
-            accels = df[self.acc_z_col].values
+            accels = self._channel_values(df, self.acc_z_col)
 
             # Apply unit conversion if requested
             if self.acc_z_units_conv == "mm to m":
@@ -259,6 +261,11 @@ class IntegrateTimeSeries(object):
             rel_filepath = export_integrated_time_series(df_int, file, self.output_path)
             return rel_filepath
 
+    def _channel_values(self, df, col):
+        """Return the values of a channel at the working precision."""
+
+        return np.asarray(df[col].values, dtype=self.working_precision)
+
     def _filter_time_series(self, x, y, low_cutoff, high_cutoff, detrend=True):
         """Calculate filtered signal of a single series."""
 
@@ -405,13 +412,14 @@ def gravity_correction(accels, angles, g_sign=-1):
 def export_integrated_time_series(df, src_filepath, output_path):
     """Export all integrated time series of a file to csv."""
 
-    # New filename
-    filename = os.path.basename(src_filepath)
+    # New filename (of the uncompressed filename of compressed files)
+    filename = inner_filename(src_filepath)
     filename = os.path.splitext(filename)[0]
     filename += "_Converted.csv"
 
-    # Extract logger folder
-    folder = os.path.split(os.path.dirname(src_filepath))[-1]
+    # Extract logger folder (the folder of the archive of zip archive members)
+    archive_path = split_archive_path(src_filepath)[0]
+    folder = os.path.split(os.path.dirname(archive_path))[-1]
 
     # Create file path for converted file using the folder name of the source file and export dataframe to csv
     filepath = os.path.join(output_path, folder, filename)
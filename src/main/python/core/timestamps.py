@@ -0,0 +1,245 @@
+"""
+Vectorised construction of timestamp arrays for logger files.
+Timestamps are built either from a start time plus time step offsets, or by parsing fixed-format timestamp strings
+with a parser compiled from the logger datetime format; both produce a datetime64[ns] array in a single operation.
+"""
+
+__author__ = "Craig Dickinson"
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Fixed widths of the datetime format directives supported by the compiled parser
+DIRECTIVE_WIDTHS = {"%Y": 4, "%y": 2, "%m": 2, "%d": 2, "%H": 2, "%M": 2, "%S": 2, "%b": 3}
+
+MONTH_ABBRS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+# Maximum value of each time field
+FIELD_MAX = {"%H": 23, "%M": 59, "%S": 59}
+
+# Number of timestamps of a file parsed to check the file is on the sample time grid
+TIME_GRID_CHECK_POINTS = 10
+
+# ISO 8601 formats are already parsed by a fast path in pandas
+ISO_FORMAT = re.compile(r"%Y-%m-%d([ T]%H(:%M(:%S(\.%f)?)?)?)?")
+
+
+def timestamps_from_offsets(start, offsets):
+    """
+    Create a datetime64[ns] array from a start datetime and an array of time offsets (seconds).
+    Offsets are rounded to microseconds, as for start + timedelta(seconds=offset).
+    """
+
+    offsets = np.asarray(offsets, dtype=np.float64)
+    offsets = np.round(offsets * 1e6).astype("timedelta64[us]")
+
+    return (np.datetime64(start, "us") + offsets).astype("datetime64[ns]")
+
+
+def time_grid_timestamps(values, datetime_format, freq, num_checks=TIME_GRID_CHECK_POINTS):
+    """
+    Create the timestamps of a file from the first timestamp and the sample frequency, without parsing all of them.
+    The first and last timestamps and evenly spaced timestamps between are parsed to check they are within half a
+    sample of the time grid.
+    Returns None if any checked timestamp is invalid or not on the grid.
+    """
+
+    values = np.asarray(values)
+    n = len(values)
+    if n == 0:
+        return np.array([], dtype="datetime64[ns]")
+
+    # Parse the check timestamps
+    rows = np.unique(np.linspace(0, n - 1, num=min(num_checks, n)).round().astype(int))
+    checks = parse_timestamps(values[rows], datetime_format, errors="coerce")
+    if np.isnat(checks).any():
+        return None
+
+    offsets = np.arange(n) / freq
+    timestamps = timestamps_from_offsets(checks[0], offsets)
+
+    tolerance = np.timedelta64(int(0.5e9 / freq), "ns")
+    if (np.abs(timestamps[rows] - checks) > tolerance).any():
+        return None
+
+    return timestamps
+
+
+def parse_timestamps(values, datetime_format, errors="raise"):
+    """
+    Parse an array of timestamp strings to a datetime64[ns] array.
+    Strings that match the fixed-width layout of the datetime format are parsed with a compiled parser; any others
+    (and ISO 8601 formats) are parsed with pandas.to_datetime, which raises or coerces invalid timestamps.
+    :param values: Array or Series of timestamp strings
+    :param datetime_format: strptime datetime format, e.g. from custom_date.get_datetime_format
+    :param errors: "raise" or "coerce" (invalid timestamps set to NaT), as for pandas.to_datetime
+    """
+
+    values = np.asarray(values)
+    parser = compile_datetime_format(datetime_format)
+
+    if parser is None or values.dtype.kind not in "OUS":
+        return _to_datetime(values, datetime_format, errors)
+
+    return parser.parse(values, errors)
+
+
+def _to_datetime(values, datetime_format, errors):
+    """Parse timestamps with pandas."""
+
+    return pd.to_datetime(values, format=datetime_format, errors=errors).values.astype(
+        "datetime64[ns]"
+    )
+
+
+def compile_datetime_format(datetime_format):
+    """Return a FixedFormatParser for a datetime format, or None if the format is not fixed width."""
+
+    if not datetime_format or ISO_FORMAT.fullmatch(datetime_format):
+        return None
+
+    try:
+        return FixedFormatParser(datetime_format)
+    except ValueError:
+        return None
+
+
+class FixedFormatParser(object):
+    """Parses timestamp strings of a fixed-width datetime format by slicing the character fields of all strings."""
+
+    def __init__(self, datetime_format):
+        self.datetime_format = datetime_format
+
+        # Character positions of each directive field and the literal characters between them
+        self.fields = {}
+        self.literals = []
+        self.frac_start = None
+        self.width = 0
+
+        pos = 0
+        for token in re.findall(r"%.|[^%]", datetime_format):
+            if self.frac_start is not None:
+                raise ValueError("Microseconds must be the last field of the format.")
+
+            if token == "%f":
+                self.frac_start = pos
+            elif token in DIRECTIVE_WIDTHS:
+                if token in self.fields or (token == "%y" and "%Y" in self.fields):
+                    raise ValueError(f"Repeated directive {token}.")
+                width = DIRECTIVE_WIDTHS[token]
+                self.fields[token] = (pos, pos + width)
+                pos += width
+            elif token.startswith("%") and token != "%%":
+                raise ValueError(f"Directive {token} is not fixed width.")
+            else:
+                char = "%" if token == "%%" else token
+                if ord(char) > 127:
+                    raise ValueError("Format contains non-ASCII characters.")
+                self.literals.append((pos, ord(char)))
+                pos += 1
+
+        self.width = pos
+        if not any(f in self.fields for f in ("%Y", "%y")) or "%d" not in self.fields:
+            raise ValueError("Format does not contain a date.")
+        if not any(f in self.fields for f in ("%m", "%b")):
+            raise ValueError("Format does not contain a month.")
+
+    def parse(self, values, errors="raise"):
+        """Parse an array of timestamp strings, falling back to pandas for strings not of the format layout."""
+
+        n = len(values)
+        if n == 0:
+            return np.array([], dtype="datetime64[ns]")
+
+        try:
+            chars = np.array(values, dtype="S")
+        except (UnicodeEncodeError, ValueError, TypeError):
+            return _to_datetime(values, self.datetime_format, errors)
+
+        # View the strings as a 2D array of character codes (strings shorter than the longest are null padded)
+        max_len = chars.dtype.itemsize
+        if max_len < self.width:
+            return _to_datetime(values, self.datetime_format, errors)
+        codes = chars.view(np.uint8).reshape(n, max_len)
+
+        valid = np.ones(n, dtype=bool)
+        for pos, code in self.literals:
+            valid &= codes[:, pos] == code
+
+        def digits(start, end):
+            field = codes[:, start:end].astype(np.int64) - 48
+            valid_digits = ((field >= 0) & (field <= 9)).all(axis=1)
+            return field @ (10 ** np.arange(end - start - 1, -1, -1)), valid_digits
+
+        def field_value(directive, default=0):
+            nonlocal valid
+
+            if directive not in self.fields:
+                return np.full(n, default, dtype=np.int64)
+
+            start, end = self.fields[directive]
+            value, valid_digits = digits(start, end)
+            valid &= valid_digits
+
+            return value
+
+        # Date fields
+        if "%Y" in self.fields:
+            year = field_value("%Y")
+        else:
+            # Two digit years as for strptime
+            year = field_value("%y")
+            year = np.where(year < 69, year + 2000, year + 1900)
+
+        if "%b" in self.fields:
+            start, end = self.fields["%b"]
+            abbrs = np.char.lower(
+                codes[:, start:end].copy().view(f"S{end - start}").ravel().astype("U3")
+            )
+            month = np.zeros(n, dtype=np.int64)
+            for i, abbr in enumerate(MONTH_ABBRS):
+                month[abbrs == abbr] = i + 1
+        else:
+            month = field_value("%m")
+
+        day = field_value("%d")
+        valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+
+        # Time fields
+        time_ns = np.zeros(n, dtype=np.int64)
+        for directive, unit in (("%H", 3600), ("%M", 60), ("%S", 1)):
+            value = field_value(directive)
+            valid &= value <= FIELD_MAX[directive]
+            time_ns += value * unit * 10**9
+
+        # Fractional seconds field of 1 to 9 digits to the end of the string
+        lengths = np.char.str_len(chars)
+        if self.frac_start is None:
+            valid &= lengths == self.width
+        else:
+            frac_len = lengths - self.frac_start
+            valid &= (frac_len >= 1) & (frac_len <= 9)
+            for length in np.unique(frac_len[valid]):
+                rows = valid & (frac_len == length)
+                value, valid_digits = digits(self.frac_start, self.frac_start + length)
+                time_ns[rows] += value[rows] * 10 ** (9 - length)
+                valid[rows] &= valid_digits[rows]
+
+        # Compose dates from the first day of each month, then check the day is in the month
+        year = np.where(valid, year, 1970)
+        month = np.where(valid, month, 1)
+        day = np.where(valid, day, 1)
+        months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+        dates = months.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+        valid &= dates.astype("datetime64[M]") == months
+
+        timestamps = dates.astype("datetime64[ns]") + time_ns.astype("timedelta64[ns]")
+
+        # Parse any strings not of the format layout with pandas
+        if not valid.all():
+            invalid = ~valid
+            timestamps[invalid] = _to_datetime(values[invalid], self.datetime_format, errors)
+
+        return timestamps
@@ -16,8 +16,8 @@ from fbs_runtime.application_context.PyQt5 import ApplicationContext
 # import datalab_gui_layout
 from core.control import InputError
 from core.custom_exception_logger import set_exception_logger
-from core.logger_properties import LoggerProperties, LoggerError, LoggerWarning
-from core.processing_hub import ProcessingHub
+from core.logger_properties import LoggerError, LoggerWarning
+from core.processing_hub import ProcessingHub, check_processing_setup, prepare_loggers
 from core.read_files import (
     read_spectrograms_csv,
     read_spectrograms_excel,
@@ -77,6 +77,7 @@ class DataLab(DataLabGui):
         # Process menu
         self.processScreeningAction.triggered.connect(self.process_screening)
         self.runIntegrationAction.triggered.connect(self.process_ts_integration)
+        self.watchLoggersAction.triggered.connect(self.process_watch)
         self.calcSeascatterAction.triggered.connect(self.calc_seascatter)
         self.calcTFAction.triggered.connect(self.calc_transfer_functions)
         self.calcFatigueAction.triggered.connect(self.calc_fatigue)
@@ -466,6 +467,12 @@ class DataLab(DataLabGui):
         self.control.processing_mode = "integration"
         self.process_loggers()
 
+    def process_watch(self):
+        """Watch logger folders and screen new files as they arrive, updating the dashboards."""
+
+        self.control.processing_mode = "watch"
+        self.process_loggers()
+
     def process_loggers(self):
         """Set up and run logger processing for all enabled loggers."""
 
@@ -505,92 +512,25 @@ class DataLab(DataLabGui):
         """Prepare and check screening setup."""
 
         control = self.control
-        logger: LoggerProperties
 
         # Perform some input checks
-        # Check project path exists
-        if control.project_path == "":
-            msg = "Cannot process: Project location not set."
-            raise LoggerWarning(msg)
-
-        # Check at least one logger exists
-        if not control.loggers:
-            msg = "Cannot process: No loggers exist in setup."
-            raise LoggerWarning(msg)
-
-        # Check all ids are unique
-        control.check_logger_ids()
-
-        # Check logging durations and sample lengths are positive
-        enabled_loggers = (logger for logger in control.loggers if logger.enabled)
-        for logger in enabled_loggers:
-            if logger.duration <= 0:
-                msg = f"Cannot process: Logging duration for logger {logger.logger_id} is {logger.duration}.\n"
-                f"Logging duration must be greater than zero."
-                raise LoggerWarning(msg)
-
-            # TODO: Move to logger properties as a setup function
-            if control.global_process_stats is True and logger.process_stats is True:
-                if logger.stats_interval <= 0:
-                    msg = f"Cannot process: Statistics sample length for logger "
-                    f"{logger.logger_id} is {logger.stats_interval}.\n"
-                    f"Statistics sample length must be greater than zero."
-                    raise LoggerWarning(msg)
-
-            if control.global_process_spect is True and logger.process_spect is True:
-                if logger.spect_interval <= 0:
-                    msg = f"Cannot process: Spectral sample length for logger "
-                    f"{logger.logger_id} is {logger.spect_interval}.\n"
-                    f"Spectral sample length must be greater than zero."
-                    raise LoggerWarning(msg)
-
-        # Paths to output folders
-        control.set_output_paths()
+        check_processing_setup(control)
 
-        # Get raw filenames, check timestamps and select files in processing datetime range
-        enabled_loggers = (logger for logger in control.loggers if logger.enabled)
-        for logger in enabled_loggers:
-            # Store logger filenames and check file timestamps
-            self.statusbar.showMessage(
-                f"Checking setup: Checking file names for {logger.logger_id}. Please wait..."
-            )
+        def show_status(msg):
+            self.statusbar.showMessage(msg)
             self.repaint()
-            logger.get_filenames()
 
-            # Select files to process and, if applicable, check file timestamps are valid
-            logger.set_files_to_process()
-
-            # Store expected file length
-            logger.expected_data_points = logger.freq * logger.duration
-
-            # Get all channel names and units if not already stored in logger object
-            if len(logger.all_channel_names) == 0 and len(logger.all_channel_units) == 0:
-                logger.get_all_columns()
-
-                # Update column list in config dashboard if this logger is the one selected
-                if logger.logger_id == self.inputDataModule.loggerList.currentItem().text():
+        # Get raw filenames, check timestamps and select files in processing datetime range
+        # Connect logger warning signals to warning message box in DataLab class
+        prepare_loggers(control, status_callback=show_status, warning_callback=self.warning)
+
+        # Update column list in config dashboard for the selected logger
+        item = self.inputDataModule.loggerList.currentItem()
+        if item is not None:
+            for logger in control.loggers:
+                if logger.enabled and logger.logger_id == item.text():
                     self.inputDataModule.set_logger_columns_list(logger)
 
-            # Check requested channels exist
-            # Connect warning signal to warning message box in DataLab class
-            try:
-                # Disconnect any existing connection to prevent repeated triggerings
-                logger.logger_warning_signal.disconnect()
-            except TypeError:
-                pass
-            logger.logger_warning_signal.connect(self.warning)
-
-            # Set processed channel names and units as user values, if supplied, or file header values
-            logger.set_selected_column_and_units_names()
-
-            # Check for any columns without any units set and see if the units is embedded in the channel name;
-            # if so extract units from channel name and add to units list
-            logger.check_if_units_in_channel_name()
-
-            # Check number of headers match number of columns to process
-            # TODO: This should already have been enforced earlier so perhaps no longer required?
-            logger.check_headers()
-
     def create_and_run_worker(self):
         """Create worker thread to setup and run processing."""
 
@@ -769,18 +709,27 @@ class ProcessingWorker(QtCore.QThread):
         self.pb.signal_quit_worker.connect(self.quit_worker)
         self.processing_hub.signal_notify_progress.connect(self.pb.update_progress_bar)
         self.processing_hub.signal_update_output_info.connect(self.pb.add_output_files)
+        self.processing_hub.signal_watch_update.connect(self.on_watch_update)
+
+    def on_watch_update(self):
+        """Emit updated screening results to present in gui while watching logger folders."""
+
+        self.signal_screening_output_to_gui.emit(self.processing_hub)
 
     def run(self):
         """Override of QThread's run method to process control file."""
 
         try:
-            self.parent.setEnabled(False)
-
             # Run DataLab processing; compute and write requested logger statistics and spectrograms
             if self.processing_mode == "screening":
+                self.parent.setEnabled(False)
                 self.processing_hub.run_screening()
             elif self.processing_mode == "integration":
+                self.parent.setEnabled(False)
                 self.processing_hub.run_ts_integration()
+            elif self.processing_mode == "watch":
+                # Gui remains enabled so that dashboards can be viewed as results are updated
+                self.processing_hub.run_watch()
 
             # Emit processed results to outside worker to present in gui
             self.signal_screening_output_to_gui.emit(self.processing_hub)
@@ -806,9 +755,24 @@ class ProcessingWorker(QtCore.QThread):
         """Quit thread on progress bar cancel button clicked."""
 
         if self.isRunning():
-            # TODO: Should find a better way of doing this by setting an external flag
-            self.terminate()
-            self.wait()
+            # Stop watching at the end of the current screening run - the progress bar is closed when the worker
+            # finishes, rather than waiting for the run to complete here and blocking the gui
+            if self.processing_mode == "watch":
+                self.processing_hub.stop_watch = True
+                self.finished.connect(self.close_progress_bar)
+                if self.isRunning():
+                    self.parent.statusbar.showMessage("Stopping watch mode at the end of the current run...")
+                    return
+            else:
+                # TODO: Should find a better way of doing this by setting an external flag
+                self.terminate()
+                self.wait()
+
+        self.close_progress_bar()
+
+    @pyqtSlot()
+    def close_progress_bar(self):
+        """Close progress bar and re-enable gui once the worker has stopped."""
 
         self.pb.close()
         self.parent.setEnabled(True)
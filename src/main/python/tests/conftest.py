@@ -0,0 +1,136 @@
+"""Fixtures shared by the tests."""
+__author__ = "Craig Dickinson"
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from azure.common import AzureHttpError, AzureMissingResourceHttpError
+from testfixtures import TempDirectory
+
+
+class FakeProperties(object):
+    def __init__(self, etag=None, last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class FakeBlob(object):
+    def __init__(self, name, content=None, etag=None, last_modified=None):
+        self.name = name
+        self.content = content
+        self.properties = FakeProperties(etag, last_modified)
+
+
+class FakeBlobService(object):
+    """
+    In-process stand-in for BlockBlobService serving blobs from a dictionary of blob name and contents.
+    Records the blobs and byte ranges requested. The first requests of a blob can be failed with a server busy error
+    (failures is a dictionary of blob name and number of requests to fail) and each request delayed.
+    Blobs are listed in name order, with at most page_size blobs per page; markers are the name of the first blob of
+    the next page.
+    """
+
+    def __init__(self, blobs=None, failures=None, delay=0.0, page_size=3):
+        self.blobs = {} if blobs is None else blobs
+        self.etags = {}
+        self.last_modified = {}
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.page_size = page_size
+        self.requests = []
+        self.markers = []
+        self.ranges = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def add_blob(self, blob_name, data=b"", last_modified=None):
+        """Add or overwrite a blob, giving it a new ETag."""
+
+        self._version += 1
+        self.blobs[blob_name] = data
+        self.etags[blob_name] = f'"{self._version}"'
+        self.last_modified[blob_name] = last_modified or datetime.now(timezone.utc)
+
+    def get_blob_properties(self, container_name, blob_name):
+        return self._blob(blob_name)
+
+    def get_blob_to_stream(self, container_name, blob_name, stream, start_range=None, end_range=None):
+        stream.write(self._request(blob_name, start_range, end_range))
+
+        return self._blob(blob_name)
+
+    def get_blob_to_bytes(self, container_name, blob_name, start_range=None, end_range=None):
+        content = self._request(blob_name, start_range, end_range)
+
+        return self._blob(blob_name, content)
+
+    def list_blobs(self, container_name, prefix=None, num_results=None, marker=None):
+        self.markers.append(marker)
+        if marker is not None and not marker.startswith(prefix):
+            raise AzureHttpError("Invalid marker", 400)
+
+        names = sorted(n for n in self.blobs if n.startswith(prefix) and (marker is None or n >= marker))
+        n = min(self.page_size, num_results)
+        items = [self._blob(name) for name in names[:n]]
+        next_marker = names[n] if len(names) > n else None
+
+        return FakePage(items, next_marker)
+
+    def _blob(self, blob_name, content=None):
+        etag = self.etags.get(blob_name, '"0"')
+        last_modified = self.last_modified.get(blob_name)
+
+        return FakeBlob(blob_name, content, etag, last_modified)
+
+    def _request(self, blob_name, start_range, end_range):
+        """Return the requested byte range (inclusive of end_range) of a blob."""
+
+        with self._lock:
+            self.requests.append(blob_name)
+            self.ranges.append((blob_name, start_range, end_range))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            time.sleep(self.delay)
+
+            # Fail the first requests of a blob with a server busy error
+            with self._lock:
+                if self.failures.get(blob_name, 0) > 0:
+                    self.failures[blob_name] -= 1
+                    raise AzureHttpError("Server busy", 503)
+
+            if blob_name not in self.blobs:
+                raise AzureMissingResourceHttpError("Not found", 404)
+
+            data = self.blobs[blob_name]
+            start = start_range or 0
+            if start_range is not None and start >= len(data):
+                raise AzureHttpError("The range specified is invalid", 416)
+
+            end = len(data) if end_range is None else end_range + 1
+            return data[start:end]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakePage(object):
+    def __init__(self, items, next_marker):
+        self.items = items
+        self.next_marker = next_marker
+
+
+@pytest.fixture
+def temp_dir():
+    with TempDirectory() as d:
+        yield d
+
+
+@pytest.fixture
+def blob_service():
+    return FakeBlobService()
@@ -0,0 +1,68 @@
+"""Tests for the Arrow csv engine."""
+__author__ = "Craig Dickinson"
+
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from core.arrow_csv import ArrowCSVError, read_csv, read_csv_arrow
+
+pytest.importorskip("pyarrow")
+
+FUGRO_FILE = os.path.join(os.path.dirname(__file__), "test_data", "dd09", "dd09_2016_0317_0000.csv")
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(header=1, skiprows=[2], skip_blank_lines=False, encoding="latin1"),
+        dict(header=[1, 2], index_col=0, encoding="latin1"),
+        dict(header=None, skiprows=[0, 1, 2], encoding="latin1"),
+        dict(
+            header=1,
+            skiprows=[2],
+            encoding="latin1",
+            usecols=[0, 3],
+            dtype={3: "float64"},
+            index_col=False,
+        ),
+    ],
+)
+def test_read_csv_arrow_matches_pandas(kwargs):
+    df = read_csv_arrow(FUGRO_FILE, **kwargs)
+    pd.testing.assert_frame_equal(df, pd.read_csv(FUGRO_FILE, **kwargs), check_exact=True)
+
+
+@pytest.mark.parametrize("kwargs", [dict(), dict(usecols=[0, 3], dtype={3: "float64"}, index_col=False)])
+def test_read_csv_arrow_timestamps_match_pandas(kwargs):
+    # Timestamp, date and time columns are read as strings, as for pandas
+    data = (
+        b"Timestamp,Date,Time,A\n"
+        b"2020-01-01 00:00:00.100,2020-01-01,12:00:01,1.5\n"
+        b"2020-01-01 00:00:00.200,2020-01-02,12:00:02,2.5\n"
+    )
+    df = read_csv_arrow(io.BytesIO(data), **kwargs)
+    pd.testing.assert_frame_equal(df, pd.read_csv(io.BytesIO(data), **kwargs), check_exact=True)
+    assert df["Timestamp"].tolist() == ["2020-01-01 00:00:00.100", "2020-01-01 00:00:00.200"]
+
+
+def test_read_csv_arrow_unsupported_layout():
+    with pytest.raises(ArrowCSVError):
+        read_csv_arrow(FUGRO_FILE, header=1, skiprows=[5], encoding="latin1")
+
+
+def test_read_csv_falls_back_to_pandas():
+    # Text streams and non-numeric data in float columns are read by the pandas parser
+    stream = io.StringIO("Time,A\n0,1.5\n1,2.5\n")
+    df = read_csv(stream, engine="pyarrow")
+    assert df["A"].tolist() == [1.5, 2.5]
+
+    stream = io.BytesIO(b"Time,A\n0,1.5\n1,x\n")
+    with pytest.raises(ValueError):
+        read_csv(stream, engine="pyarrow", dtype={"A": "float64"})
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,201 @@
+"""Tests for the Azure blob download routines, using an in-process fake blob service."""
+__author__ = "Craig Dickinson"
+
+import gzip
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from azure.common import AzureHttpError, AzureMissingResourceHttpError
+
+import core.azure_cloud_storage as azure_cloud_storage
+from core.azure_cloud_storage import (
+    AzureClientRegistry,
+    BlobDownloadPool,
+    count_connections,
+    download_blob,
+    read_blob_head,
+    stream_blob,
+)
+
+
+@pytest.fixture
+def service(blob_service):
+    for i in range(8):
+        blob_service.blobs[f"dd10/file_{i}.csv"] = f"Timestamp,AccelX\n{i},1.0\n".encode()
+
+    return blob_service
+
+
+def test_download_blob_retries_transient_errors(service):
+    service.failures = {"dd10/file_0.csv": 2}
+    f = download_blob(service, "container", "dd10/file_0.csv", retries=2, backoff=0)
+
+    assert f.read() == service.blobs["dd10/file_0.csv"]
+    assert service.requests.count("dd10/file_0.csv") == 3
+
+    service.failures = {"dd10/file_0.csv": 2}
+    with pytest.raises(AzureHttpError):
+        download_blob(service, "container", "dd10/file_0.csv", retries=1, backoff=0)
+
+    # Missing blobs are not retried
+    with pytest.raises(AzureMissingResourceHttpError):
+        download_blob(service, "container", "dd10/missing.csv", retries=2, backoff=0)
+    assert service.requests.count("dd10/missing.csv") == 1
+
+
+def test_stream_blob(service, monkeypatch):
+    blobs = service.blobs
+    f = stream_blob(service, "container", "dd10/file_0.csv")
+
+    # Small blobs are read into memory with a single request
+    assert isinstance(f, io.BytesIO)
+    assert f.read() == blobs["dd10/file_0.csv"]
+    assert service.requests == ["dd10/file_0.csv"]
+
+    # Larger blobs are read in two requests, including a blob exactly the in-memory size
+    monkeypatch.setattr(azure_cloud_storage, "IN_MEMORY_BLOB_BYTES", 10)
+    blobs["dd10/file_10.csv"] = b"0123456789"
+    for blob_name in ["dd10/file_1.csv", "dd10/file_10.csv"]:
+        service.ranges = []
+        f = stream_blob(service, "container", blob_name)
+        assert not isinstance(f, io.BytesIO)
+        assert f.read() == blobs[blob_name]
+        assert service.ranges == [(blob_name, 0, 9), (blob_name, 10, None)]
+
+
+def test_read_blob_head(service):
+    blobs = service.blobs
+    header = b"Timestamp,AccelX\n"
+    blobs["dd10/long.csv"] = header + b"2020-01-01 00:00:00,1.0\n" * 1000
+
+    # Only the start of the blob is downloaded, doubling the range until it holds the requested lines
+    f = read_blob_head(service, "container", "dd10/long.csv", num_lines=3, num_bytes=20)
+    assert f.readline() == header
+    assert f.readline() == b"2020-01-01 00:00:00,1.0\n"
+    assert service.ranges == [("dd10/long.csv", 0, 19), ("dd10/long.csv", 0, 39), ("dd10/long.csv", 0, 79)]
+
+    # A short blob is returned in full
+    f = read_blob_head(service, "container", "dd10/file_0.csv", num_lines=5, num_bytes=20)
+    assert f.read() == blobs["dd10/file_0.csv"]
+
+    # Empty blob
+    blobs["dd10/empty.csv"] = b""
+    assert read_blob_head(service, "container", "dd10/empty.csv", num_lines=1).read() == b""
+
+    # Compressed blobs are downloaded in full and decompressed
+    blobs["dd10/long.csv.gz"] = gzip.compress(blobs["dd10/long.csv"])
+    f = read_blob_head(service, "container", "dd10/long.csv.gz", num_lines=1, num_bytes=20)
+    assert f.readline() == header
+
+
+def test_blob_download_pool(service):
+    blob_names = sorted(service.blobs)
+    service.failures = {blob_names[3]: 1}
+    service.delay = 0.02
+
+    with BlobDownloadPool(service, "container", blob_names, max_downloads=3, backoff=0) as pool:
+        for blob_name in blob_names:
+            assert pool.get(blob_name).read() == service.blobs[blob_name]
+
+    # Each blob is downloaded once (plus one retry) with no more than 3 downloads at a time
+    assert sorted(service.requests) == sorted(blob_names + [blob_names[3]])
+    assert 1 < service.max_in_flight <= 3
+
+
+def test_blob_download_pool_downloads_ahead(service):
+    blob_names = sorted(service.blobs)
+
+    with BlobDownloadPool(service, "container", blob_names, max_downloads=2) as pool:
+        pool.get(blob_names[0])
+        time.sleep(0.1)
+
+        # The next two blobs are downloaded while the first is processed
+        assert sorted(service.requests) == blob_names[:3]
+
+        # A blob outside the pool is downloaded on request
+        assert pool.get(blob_names[6]).read() == service.blobs[blob_names[6]]
+
+    assert blob_names[7] not in service.requests
+
+
+class FakeClient(object):
+    """Stand-in for BlockBlobService that makes its requests through the given session."""
+
+    def __init__(self, account_name, account_key, request_session=None):
+        self.account_name = account_name
+        self.request_session = request_session
+        self.request_callback = None
+        self.response_callback = None
+
+    def get(self, url):
+        self.request_callback(url)
+        response = self.request_session.get(url)
+        response.status = response.status_code
+        self.response_callback(response)
+
+        return response
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status = 404 if self.path == "/missing" else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_azure_client_registry():
+    registry = AzureClientRegistry(client_factory=FakeClient)
+
+    # One client per account, shared by concurrent callers
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: registry.get_client("acct", "key"), range(32)))
+    assert all(c is clients[0] for c in clients)
+    assert registry.get_client("acct", "other_key") is not clients[0]
+    assert registry.metrics("acct", "missing_key") is None
+
+    registry.clear()
+    assert registry.get_client("acct", "key") is not clients[0]
+
+
+def test_azure_client_metrics(server_url):
+    registry = AzureClientRegistry(client_factory=FakeClient, pool_connections=4)
+    client = registry.get_client("acct", "key")
+
+    # Requests from several threads reuse the keep-alive connections of the shared client
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: client.get(f"{server_url}/blob"), range(20)))
+    client.get(f"{server_url}/missing")
+
+    metrics = registry.metrics("acct", "key")
+    assert metrics.requests == 21
+    assert metrics.errors == 1
+    assert 1 <= metrics.connections <= 4
+    assert metrics.connections == count_connections(client.request_session)
+    assert 0 < metrics.mean_time <= metrics.max_time
+    assert "21 requests (1 errors)" in metrics.summary()
+    registry.clear()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,89 @@
+"""Tests for the Azure blob cache, using an in-process fake blob service."""
+__author__ = "Craig Dickinson"
+
+import gzip
+import os
+
+import pytest
+
+from core.azure_cloud_storage import BlobDownloadPool, download_blob
+from core.blob_cache import BlobCache
+
+
+@pytest.fixture
+def service(blob_service):
+    for i in range(4):
+        blob_service.add_blob(f"dd10/file_{i}.csv", f"Timestamp,AccelX\n{i},1.0\n".encode())
+
+    return blob_service
+
+
+def test_blob_cache_hits_and_misses(temp_dir, service):
+    cache = BlobCache(temp_dir.path)
+    blob_name = "dd10/file_0.csv"
+
+    for _ in range(3):
+        with cache.open(service, "container", blob_name) as f:
+            assert f.read() == service.blobs[blob_name]
+
+    assert service.requests == [blob_name]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    # A blob overwritten on Azure has a new ETag and is downloaded again
+    service.add_blob(blob_name, b"Timestamp,AccelX\n0,2.0\n")
+    with cache.open(service, "container", blob_name) as f:
+        assert f.read() == b"Timestamp,AccelX\n0,2.0\n"
+    assert service.requests == [blob_name, blob_name]
+
+    # Blobs cached by an earlier run are read
+    cache = BlobCache(temp_dir.path)
+    with cache.open(service, "container", blob_name) as f:
+        assert f.read() == b"Timestamp,AccelX\n0,2.0\n"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_blob_cache_compressed_blob(temp_dir, service):
+    service.add_blob("dd10/file_9.csv.gz", gzip.compress(b"Timestamp,AccelX\n9,1.0\n"))
+    cache = BlobCache(temp_dir.path)
+
+    for _ in range(2):
+        with cache.open(service, "container", "dd10/file_9.csv.gz") as f:
+            assert f.read() == b"Timestamp,AccelX\n9,1.0\n"
+
+    assert service.requests == ["dd10/file_9.csv.gz"]
+
+
+def test_blob_cache_eviction(temp_dir, service):
+    blob_size = len(service.blobs["dd10/file_0.csv"])
+    cache = BlobCache(temp_dir.path, max_bytes=2 * blob_size)
+
+    for blob_name in ["dd10/file_0.csv", "dd10/file_1.csv", "dd10/file_0.csv", "dd10/file_2.csv"]:
+        cache.open(service, "container", blob_name).close()
+
+    # The least recently used blob (file_1) is evicted
+    assert len(os.listdir(temp_dir.path)) == 2
+    assert cache.total_bytes == 2 * blob_size
+    cache.open(service, "container", "dd10/file_0.csv").close()
+    cache.open(service, "container", "dd10/file_1.csv").close()
+    assert service.requests.count("dd10/file_1.csv") == 2
+    assert service.requests.count("dd10/file_0.csv") == 1
+
+
+def test_download_through_blob_cache(temp_dir, service):
+    cache = BlobCache(temp_dir.path)
+    blob_names = sorted(service.blobs)
+
+    with BlobDownloadPool(service, "container", blob_names, max_downloads=2, blob_cache=cache) as pool:
+        for blob_name in blob_names:
+            assert pool.get(blob_name).read() == service.blobs[blob_name]
+
+    for blob_name in blob_names:
+        with download_blob(service, "container", blob_name, blob_cache=cache) as f:
+            assert f.read() == service.blobs[blob_name]
+
+    assert sorted(service.requests) == blob_names
+    assert (cache.hits, cache.misses) == (4, 4)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,102 @@
+"""Tests for the persisted Azure blob listing, using an in-process fake blob service."""
+__author__ = "Craig Dickinson"
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import core.blob_listing as blob_listing
+import core.logger_properties as logger_properties
+from core.azure_cloud_storage import get_blobs
+from core.blob_listing import BlobListing
+from core.logger_properties import LoggerProperties
+
+T0 = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def service(blob_service):
+    for i in range(8):
+        blob_service.add_blob(f"dd10/dd10_2020_0101_{i:02d}00.csv", last_modified=T0 + timedelta(minutes=i))
+    blob_service.add_blob("dd10/readme.txt", last_modified=T0)
+    blob_service.add_blob("dd11/dd11_2020_0101_0000.csv", last_modified=T0)
+
+    return blob_service
+
+
+def test_get_blobs(service):
+    assert get_blobs(service, "container", "dd10/") == sorted(n for n in service.blobs if n.startswith("dd10/"))
+    assert service.markers[0] is None and len(service.markers) == 3
+
+
+def test_blob_listing_refresh(temp_dir, service):
+    listing = BlobListing("container", "dd10/", "csv", temp_dir.path)
+    new_blobs = listing.refresh(service)
+
+    expected = [f"dd10/dd10_2020_0101_{i:02d}00.csv" for i in range(8)]
+    assert listing.blobs == expected
+    assert new_blobs == expected
+    assert listing.watermark == (T0 + timedelta(minutes=7)).isoformat()
+
+    # A later setup lists only from the last page of the previous scan
+    service.add_blob("dd10/dd10_2020_0101_0800.csv", last_modified=T0 + timedelta(minutes=8))
+    service.markers = []
+    listing = BlobListing("container", "dd10/", "csv", temp_dir.path)
+    new_blobs = listing.refresh(service)
+
+    assert service.markers == ["dd10/dd10_2020_0101_0600.csv", "dd10/readme.txt"]
+    assert new_blobs == ["dd10/dd10_2020_0101_0800.csv"]
+    assert listing.blobs == expected + ["dd10/dd10_2020_0101_0800.csv"]
+
+    # A full scan picks up overwritten and deleted blobs
+    etag = listing.etags["dd10/dd10_2020_0101_0100.csv"]
+    service.add_blob("dd10/dd10_2020_0101_0100.csv", last_modified=T0 + timedelta(minutes=9))
+    del service.blobs["dd10/dd10_2020_0101_0000.csv"]
+    listing.refresh(service)
+    assert "dd10/dd10_2020_0101_0000.csv" in listing.blobs
+    assert listing.refresh(service, full_scan=True) == ["dd10/dd10_2020_0101_0100.csv"]
+    assert "dd10/dd10_2020_0101_0000.csv" not in listing.blobs
+    assert listing.etags["dd10/dd10_2020_0101_0100.csv"] != etag
+
+
+def test_blob_listing_full_scan_due(temp_dir, service, monkeypatch):
+    listing = BlobListing("container", "dd10/", "csv", temp_dir.path)
+    listing.refresh(service)
+
+    monkeypatch.setattr(blob_listing, "FULL_SCAN_INTERVAL", -1)
+    service.markers = []
+    BlobListing("container", "dd10/", "csv", temp_dir.path).refresh(service)
+    assert service.markers[0] is None
+
+
+def test_blob_listing_invalid_marker(temp_dir, service):
+    listing = BlobListing("container", "dd10/", "csv", temp_dir.path)
+    listing.refresh(service)
+
+    # Marker not accepted by the service
+    listing.resume_marker = "other/"
+    service.markers = []
+    listing.refresh(service)
+    assert service.markers[:2] == ["other/", None]
+    assert len(listing.blobs) == 8
+
+
+def test_get_filenames_on_azure(temp_dir, service, monkeypatch):
+    monkeypatch.setattr(logger_properties, "connect_to_azure_account", lambda name, key: service)
+
+    logger = LoggerProperties("dd10")
+    logger.data_on_azure = True
+    logger.logger_path = "container/dd10"
+    logger.file_ext = "csv"
+    logger.azure_listings_path = temp_dir.path
+    filenames = logger.get_filenames()
+
+    # Blobs of other extensions are not listed, so blobs and filenames are aligned
+    assert filenames == [f"dd10_2020_0101_{i:02d}00.csv" for i in range(8)]
+    assert logger.blobs == [f"dd10/{f}" for f in filenames]
+    assert all(logger.blob_etags[blob] == service.etags[blob] for blob in logger.blobs)
+    assert logger.container_name == "container"
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,158 @@
+"""Tests for the logger campaign store."""
+__author__ = "Craig Dickinson"
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from testfixtures import TempDirectory
+
+import core.logger_screening as logger_screening
+from core.campaign_store import CampaignStore, CampaignStoreError, ingest_logger, store_settings_key
+from core.data_screen import DataScreen
+from core.logger_properties import LoggerProperties
+from core.logger_screening import screen_logger_files
+from core.raw_data_plot_properties import RawDataRead
+
+FILE_STARTS = ["2020-01-01 00:00", "2020-01-01 00:10", "2020-01-01 00:20"]
+
+
+@pytest.fixture
+def data_screen():
+    """Create a logger of three 10 minute csv files at 1 Hz and return a data screen object of the logger."""
+
+    with TempDirectory() as d:
+        logger = LoggerProperties("test")
+        logger.logger_path = d.path
+        logger.file_format = "Custom"
+        logger.file_timestamp_embedded = False
+        logger.first_col_data = "Timestamp"
+        logger.file_delimiter = ","
+        logger.num_headers = 1
+        logger.channel_header_row = 1
+        logger.units_header_row = 0
+        logger.datetime_format = "%Y-%m-%d %H:%M:%S"
+        logger.freq = 10
+        logger.cols_to_process = [3]
+        logger.all_channel_names = ["AccelX", "AccelY"]
+        logger.channel_names = ["AccelY"]
+        logger.unit_conv_factors = [0.001]
+
+        for i, start in enumerate(FILE_STARTS):
+            t = pd.date_range(start, periods=600, freq="1s")
+            df = pd.DataFrame({"Timestamp": t, "AccelX": np.arange(600.0) + i, "AccelY": -1.0 * i})
+            filename = f"test_{i}.csv"
+            df.to_csv(os.path.join(d.path, filename), index=False)
+            logger.files.append(filename)
+
+        data_screen = DataScreen()
+        data_screen.set_logger(logger)
+        yield data_screen
+
+
+def read_raw_file(data_screen, file_idx):
+    df = data_screen.read_logger_file(data_screen.files[file_idx])
+    return data_screen.wrangle_data(df, file_idx=file_idx)
+
+
+def test_ingest_logger(data_screen):
+    store_path = os.path.join(data_screen.logger.logger_path, "Campaign Stores", "test.h5")
+    assert ingest_logger(data_screen, store_path) == 3
+
+    with CampaignStore(store_path) as store:
+        assert len(store) == 3
+        assert store.num_rows == 1800
+        assert store.index["row_offset"].tolist() == [0, 600, 1200]
+        assert store.index["length"].tolist() == [600, 600, 600]
+        assert store.index["start_timestamp"].tolist() == [pd.Timestamp(t) for t in FILE_STARTS]
+
+        # Read by store file index and filename
+        assert_frame_equal(store.read_file(1), read_raw_file(data_screen, 1))
+        assert_frame_equal(store.read_file("test_2.csv"), read_raw_file(data_screen, 2))
+
+        with pytest.raises(CampaignStoreError):
+            store.read_file("test_3.csv")
+
+
+def test_read_window(data_screen):
+    store_path = os.path.join(data_screen.logger.logger_path, "test.h5")
+    ingest_logger(data_screen, store_path)
+
+    with CampaignStore(store_path) as store:
+        # Window spanning two files
+        df = store.read_window("2020-01-01 00:09:50", "2020-01-01 00:10:10")
+        assert len(df) == 20
+        assert df["Timestamp"].iloc[0] == pd.Timestamp("2020-01-01 00:09:50")
+        assert df["AccelY"].tolist() == [0] * 10 + [-1] * 10
+
+        assert store.read_window("2020-01-02", "2020-01-03").empty
+        assert len(store.read_files(0, 2)) == 1200
+
+
+def test_read_store_file_for_screening(data_screen):
+    store_path = os.path.join(data_screen.logger.logger_path, "test.h5")
+    ingest_logger(data_screen, store_path)
+
+    with CampaignStore(store_path) as store:
+        df = data_screen.read_store_file(store, 1)
+
+    df_raw = read_raw_file(data_screen, 1)
+    df_raw = data_screen.select_columns_to_process(df_raw)
+    df_raw = data_screen.apply_unit_conversions(data_screen.set_column_names(df_raw))
+    assert_frame_equal(df, df_raw)
+    assert df.columns.tolist() == ["Timestamp", "AccelY"]
+
+
+def test_store_settings_key(data_screen):
+    logger = data_screen.logger
+    key = store_settings_key(logger)
+
+    # Files decoded with a different encoding parse to different channel names
+    logger.file_encoding = "latin1"
+    assert store_settings_key(logger) != key
+
+
+def test_raw_file_changed_after_ingest(data_screen, monkeypatch):
+    store_path = os.path.join(data_screen.logger.logger_path, "test.h5")
+    ingest_logger(data_screen, store_path)
+
+    # Corrected file delivered after ingest
+    filepath = data_screen.files[1]
+    df = pd.read_csv(filepath)
+    df["AccelY"] = -10.0
+    df.to_csv(filepath, index=False)
+
+    screened_dfs = {}
+    monkeypatch.setattr(
+        logger_screening, "screen_file", lambda df, data_screen, j, *args: screened_dfs.update({j: df})
+    )
+
+    with CampaignStore(store_path) as store:
+        assert [data_screen.is_file_in_store(store, j) for j in range(3)] == [True, False, True]
+        screen_logger_files(data_screen, None, None, None, campaign_store=store)
+
+    # The changed file is read from the raw file, not the store
+    assert np.allclose(screened_dfs[1]["AccelY"], -0.01)
+    assert np.allclose(screened_dfs[2]["AccelY"], -0.002)
+
+
+def test_raw_data_dashboard_store_reads(data_screen):
+    logger = data_screen.logger
+
+    # Files without a units header can be read from the store by the raw data dashboard
+    assert RawDataRead(logger).has_units_header is False
+
+    # Files with a units header are read from the raw files to show the units of each file
+    logger.num_headers = 2
+    logger.units_header_row = 2
+    assert RawDataRead(logger).has_units_header is True
+
+    logger.units_header_row = 0
+    logger.file_format = "Pulse-acc"
+    assert RawDataRead(logger).has_units_header is True
+
+
+if __name__ == "__main__":
+    pytest.main()
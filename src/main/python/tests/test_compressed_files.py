@@ -0,0 +1,118 @@
+"""Tests for streaming reads of compressed logger files."""
+__author__ = "Craig Dickinson"
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zipfile
+from datetime import datetime
+
+import pytest
+from pandas.testing import assert_frame_equal
+from testfixtures import TempDirectory
+
+from core.compressed_files import (
+    decompress_stream,
+    inner_filename,
+    list_raw_files,
+    open_raw_file,
+    raw_file_stat,
+)
+from core.data_screen import DataScreen
+from core.logger_properties import LoggerProperties
+
+TEXT = "Timestamp,AccelX\n2020-01-01 00:00:00,1.0\n2020-01-01 00:00:01,2.0\n"
+
+
+@pytest.fixture
+def logger_dir():
+    """Create a logger folder of a plain, gzip, bz2 and xz file and a zip archive of two files."""
+
+    with TempDirectory() as d:
+        d.write("dd10_2020_0101_0000.csv", TEXT.encode())
+        d.write("dd10_2020_0101_0100.csv.gz", gzip.compress(TEXT.encode()))
+        d.write("dd10_2020_0101_0200.csv.bz2", bz2.compress(TEXT.encode()))
+        d.write("dd10_2020_0101_0300.csv.xz", lzma.compress(TEXT.encode()))
+        d.write("notes.txt.gz", gzip.compress(b"notes"))
+
+        with zipfile.ZipFile(os.path.join(d.path, "dd10_2020_0102.zip"), "w") as archive:
+            archive.writestr("dd10_2020_0102_0000.csv", TEXT)
+            archive.writestr("daily/dd10_2020_0102_0100.csv", TEXT)
+            archive.writestr("readme.txt", "readme")
+
+        yield d.path
+
+
+def test_list_raw_files(logger_dir):
+    assert sorted(list_raw_files(logger_dir, "csv")) == [
+        "dd10_2020_0101_0000.csv",
+        "dd10_2020_0101_0100.csv.gz",
+        "dd10_2020_0101_0200.csv.bz2",
+        "dd10_2020_0101_0300.csv.xz",
+        "dd10_2020_0102.zip/daily/dd10_2020_0102_0100.csv",
+        "dd10_2020_0102.zip/dd10_2020_0102_0000.csv",
+    ]
+    assert list_raw_files(os.path.join(logger_dir, "missing"), "csv") == []
+
+
+def test_open_raw_file(logger_dir):
+    for filename in list_raw_files(logger_dir, "csv"):
+        filepath = os.path.join(logger_dir, filename)
+
+        with open_raw_file(filepath) as f:
+            assert f.read() == TEXT.encode()
+
+        with open_raw_file(filepath, "r", encoding="utf-8") as f:
+            assert f.readline() == "Timestamp,AccelX\n"
+
+    member = os.path.join(logger_dir, "dd10_2020_0102.zip", "dd10_2020_0102_0000.csv")
+    assert raw_file_stat(member).st_size == os.path.getsize(os.path.dirname(member))
+
+    with pytest.raises(FileNotFoundError):
+        open_raw_file(os.path.join(logger_dir, "dd10_2020_0102.zip", "missing.csv"))
+
+
+def test_inner_filename():
+    assert inner_filename("dd10_2020_0101_0100.csv.gz") == "dd10_2020_0101_0100.csv"
+    assert inner_filename("bundle.zip/daily/dd10_2020_0102_0100.csv") == "dd10_2020_0102_0100.csv"
+    assert inner_filename("dd10_2020_0101_0000.csv") == "dd10_2020_0101_0000.csv"
+
+
+def test_decompress_stream():
+    stream = io.BytesIO(gzip.compress(TEXT.encode()))
+    assert decompress_stream(stream, "folder/dd10_2020_0101_0100.csv.gz").read() == TEXT.encode()
+
+    stream = io.BytesIO(TEXT.encode())
+    assert decompress_stream(stream, "folder/dd10_2020_0101_0000.csv") is stream
+
+
+def test_logger_file_timestamps_and_reads(logger_dir):
+    logger = LoggerProperties("dd10")
+    logger.logger_path = logger_dir
+    logger.file_ext = "csv"
+    logger.file_timestamp_format = "xxxxxYYYYxmmDDxHHMM"
+    logger.channel_header_row = 1
+    logger.num_headers = 1
+    logger.freq = 10
+    logger.get_filenames()
+    logger.set_files_to_process()
+
+    assert len(logger.files) == 6
+    assert logger.file_timestamps[0] == datetime(2020, 1, 1, 0, 0)
+    assert max(logger.file_timestamps) == datetime(2020, 1, 2, 1, 0)
+
+    data_screen = DataScreen()
+    data_screen.set_logger(logger)
+    df_plain = data_screen.read_logger_file(data_screen.files[0])
+    for file in data_screen.files[1:]:
+        assert_frame_equal(data_screen.read_logger_file(file), df_plain)
+        assert_frame_equal(
+            data_screen.read_logger_file(file, data_screen.read_plan),
+            data_screen.read_logger_file(data_screen.files[0], data_screen.read_plan),
+        )
+
+
+if __name__ == "__main__":
+    pytest.main()
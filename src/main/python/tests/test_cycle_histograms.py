@@ -7,6 +7,7 @@ import rainflow
 from numpy.testing import assert_allclose
 
 from core.cycle_histograms import (
+    RainflowCounter,
     rainflow_cycles,
     calc_number_of_bins,
     bin_cycles,
@@ -22,6 +23,19 @@ def test_rainflow_counting():
     assert_allclose(num_cycles, [1, 0.5])
 
 
+@pytest.mark.parametrize("block_length", [1, 2, 7, 1000])
+def test_rainflow_counter_blocks(block_length):
+    y = np.round(np.random.default_rng(0).normal(size=1000).cumsum(), 1)
+    counter = RainflowCounter()
+    for i in range(0, len(y), block_length):
+        counter.add_points(y[i : i + block_length])
+
+    ranges, num_cycles = counter.cycles()
+    expected_ranges, expected_cycles = rainflow_cycles(y)
+    np.testing.assert_array_equal(ranges, expected_ranges)
+    np.testing.assert_array_equal(num_cycles, expected_cycles)
+
+
 def test_bin_cycles():
     ranges = [2, 4]
     cycles = [1, 0.5]
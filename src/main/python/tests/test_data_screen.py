@@ -13,6 +13,7 @@ import pandas.testing as pdt
 import pytest
 
 from core.data_screen import DataScreen
+from core.read_plan import ReadPlan
 
 
 def example_data_file():
@@ -128,6 +129,72 @@ class Test(unittest.TestCase):
 
         pdt.assert_frame_equal(data1, data)
 
+    def test_read_logger_file_columns(self):
+        """Test reading only the columns of a read plan gives the same data as selecting them after reading."""
+
+        test_stream = io.StringIO(example_data_file())
+        self.logger_stats.header_row = 1
+        self.logger_stats.skip_rows = [2]
+
+        # Process columns 2 and 4 and a column not in the file
+        read_plan = ReadPlan([0, 1, 3, 6], num_file_cols=5)
+        data = self.logger_stats.read_logger_file(test_stream, read_plan)
+
+        test_stream.seek(0)
+        data1 = self.logger_stats.read_logger_file(test_stream)
+        data1 = read_plan.project(data1)
+
+        self.assertEqual(list(data.columns), ["Timestamp", "AccelX", "RateX", "Dummy 7"])
+        pdt.assert_frame_equal(data1, data)
+
+    def test_read_logger_file_columns_non_numeric(self):
+        """Test columns with non-numeric data are read when reading only the columns of a read plan."""
+
+        test_stream = io.StringIO("Time,A,B,C\n0,1.0,2.0,3.0\n1,x,2.5,3.5\n")
+        read_plan = ReadPlan([0, 1, 3], num_file_cols=4)
+        data = self.logger_stats.read_logger_file(test_stream, read_plan)
+
+        self.assertEqual(list(data.columns), ["Time", "A", "C"])
+        self.assertEqual(data["A"].tolist(), ["1.0", "x"])
+
+    def test_read_file_not_of_detected_encoding(self):
+        """Test a latin1 file read with utf-8 encoding is re-read with latin1, which is then used for later files."""
+
+        text = "Time,Temp (\u00b0C)\n0,1.0\n1,2.0\n"
+        self.logger_stats.encoding = "utf-8"
+        data = self.logger_stats.read_logger_file(io.BytesIO(text.encode("latin1")))
+
+        self.assertEqual(list(data.columns), ["Time", "Temp (\u00b0C)"])
+        self.assertEqual(self.logger_stats.encoding, "latin1")
+
+    def test_trusted_time_grid_timestamps(self):
+        """Test timestamps created in trusted time grid mode and a file with a gap reported as a bad file."""
+
+        self.logger_stats.logger.file_format = "Fugro-csv"
+        self.logger_stats.logger.datetime_format = "%d-%b-%Y %H:%M:%S.%f"
+        self.logger_stats.logger.files = ["file1.csv", "file2.csv"]
+        self.logger_stats.logger.freq = 10
+        self.logger_stats.logger.trusted_time_grid = True
+        t = pd.date_range("2016-03-17 01:00", periods=100, freq="100ms")
+        df = pd.DataFrame({"Timestamp": t.strftime("%d-%b-%Y %H:%M:%S.%f").str[:-3], "AccelX": 1.0})
+
+        data = self.logger_stats.wrangle_data(df, file_idx=0)
+        self.assertTrue((data["Timestamp"].values == t.values).all())
+        self.assertEqual(self.logger_stats.file_read_errors, {})
+
+        # Remove a sample
+        data = self.logger_stats.wrangle_data(df.drop(50), file_idx=1)
+        self.assertTrue((data["Timestamp"].values == t.drop(t[50]).values).all())
+        self.assertEqual(self.logger_stats.file_read_errors, {1: "Timestamps not on sample time grid"})
+
+        # Read errors are reported as bad files when the file is screened
+        self.logger_stats.logger.expected_data_points = 99
+        self.logger_stats.screen_data(file_num=1, df=data)
+        self.assertEqual(self.logger_stats.file_read_errors, {})
+        self.assertEqual(
+            self.logger_stats.dict_bad_files, {"file2.csv": "Timestamps not on sample time grid"}
+        )
+
     def test_process_data(self):
         """Test function to convert data from string to numbers."""
         pass
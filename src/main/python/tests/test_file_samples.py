@@ -0,0 +1,46 @@
+"""Tests for the file samples shared by the screening modules."""
+__author__ = "Craig Dickinson"
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.data_screen import DataScreen
+from core.file_samples import FileSamples
+
+
+@pytest.fixture
+def df_file():
+    t = np.arange(0, 10, 0.1)
+    return pd.DataFrame({"Time": t, "X": np.sin(t), "Y": np.cos(t)})
+
+
+def test_sample_bounds(df_file):
+    file_samples = FileSamples(df_file, DataScreen())
+    assert file_samples.sample_bounds(40) == [(0, 40), (40, 80), (80, 100)]
+
+
+def test_sample_is_view_of_file_data(df_file):
+    file_samples = FileSamples(df_file, DataScreen())
+    df_sample = file_samples.sample(40, 80)
+
+    pd.testing.assert_frame_equal(df_sample, df_file[40:80].reset_index(drop=True))
+    assert np.shares_memory(df_sample["X"].values, file_samples.values)
+    assert np.shares_memory(file_samples.channel_values("Y"), file_samples.values)
+
+
+def test_filtered_sample_computed_once(df_file):
+    data_screen = DataScreen()
+    data_screen.file_timestamp_embedded = False
+    data_screen.filter_type = "Rectangular"
+    data_screen.low_cutoff = 0.05
+    data_screen.high_cutoff = 0.5
+    file_samples = FileSamples(df_file, data_screen)
+
+    df_filt = file_samples.filtered_sample(0, 40)
+    pd.testing.assert_frame_equal(df_filt, data_screen.filter_data(df_file[:40]))
+    assert file_samples.filtered_sample(0, 40) is df_filt
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -3,6 +3,7 @@ Tests for logger properties routines.
 """
 __author__ = "Craig Dickinson"
 
+import pickle
 import unittest
 
 import pytest
@@ -55,6 +56,38 @@ class TestLogger(unittest.TestCase):
         dates = [parse(date, yearfirst=True) for date in self.test_dates]
         self.assertEqual(logger.file_timestamps, dates)
 
+    def test_detect_file_encoding(self):
+        """Check the encoding of a test file is detected and used to read the header."""
+
+        header = "Timestamp,Temp,Pressure\n-,\u00b0C,bar\n"
+        self.temp_dir.write("/".join([self.test_dir, self.test_filenames[0]]), header.encode("latin1"))
+
+        logger = LoggerProperties("test_logger")
+        logger.logger_path = self.test_dir
+        logger.file_ext = "csv"
+        logger.num_headers = 2
+        logger.channel_header_row = 1
+        logger.units_header_row = 2
+        logger.get_filenames()
+        logger.get_all_columns()
+
+        self.assertEqual(logger.file_encoding, "latin1")
+        self.assertEqual(logger.all_channel_names, ["Temp", "Pressure"])
+        self.assertEqual(logger.all_channel_units, ["\u00b0C", "bar"])
+
+    def test_pickle_logger(self):
+        """Check logger properties survive pickling, as required to screen loggers in worker processes."""
+
+        logger = LoggerProperties("test_logger")
+        logger.logger_path = self.test_dir
+        logger.file_ext = "csv"
+        logger.get_filenames()
+
+        logger_copy = pickle.loads(pickle.dumps(logger))
+        self.assertEqual(logger_copy.logger_id, "test_logger")
+        self.assertEqual(logger_copy.logger_path, self.test_dir)
+        self.assertEqual(logger_copy.raw_filenames, self.test_filenames)
+
 
 if __name__ == "__main__":
     pytest.main()
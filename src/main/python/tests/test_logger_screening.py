@@ -0,0 +1,305 @@
+"""Tests for the routines to screen logger files in separate tasks."""
+__author__ = "Craig Dickinson"
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_allclose
+from pandas.testing import assert_frame_equal
+from testfixtures import TempDirectory
+
+import core.data_screen as data_screen_module
+from core.control import Control
+from core.cycle_histograms import CycleHistograms
+from core.data_screen import DataScreen
+from core.logger_properties import LoggerProperties
+from core.logger_screening import (
+    read_file_for_screening,
+    read_files_for_screening,
+    screen_logger_files,
+    split_file_indices,
+)
+from core.processing_hub import ProcessingHub
+from core.spectral_screening import SpectralScreening, Spectrogram
+from core.stats_screening import LoggerStats, StatsScreening
+
+
+def test_split_file_indices():
+    assert split_file_indices(5, 2) == [[0, 1, 2], [3, 4]]
+    assert split_file_indices(2, 8) == [[0], [1]]
+    assert split_file_indices(0, 4) == [[]]
+
+
+def test_merge_logger_stats():
+    df = pd.DataFrame({"Time": np.arange(10), "X": np.arange(10.0)})
+    serial_stats = LoggerStats()
+    stats1 = LoggerStats()
+    stats2 = LoggerStats()
+
+    for df_sample, stats in zip([df[:5], df[5:]], [stats1, stats2]):
+        serial_stats.calc_stats(df_sample)
+        stats.calc_stats(df_sample)
+
+    stats1.merge(stats2)
+    assert_allclose(stats1.min, serial_stats.min)
+    assert_allclose(stats1.max, serial_stats.max)
+    assert_allclose(stats1.mean, serial_stats.mean)
+    assert_allclose(stats1.std, serial_stats.std)
+
+
+def test_merge_spectrograms():
+    t = np.arange(0, 100, 0.1)
+    df = pd.DataFrame({"Time": t, "X": np.sin(t), "Y": np.cos(t)})
+    samples = [df[:500], df[500:]]
+    serial_spect = Spectrogram()
+    spects = []
+
+    for df_sample in samples:
+        serial_spect.add_data(df_sample)
+        spect = Spectrogram()
+        spect.add_data(df_sample)
+        spects.append(spect)
+
+    spects[0].merge(spects[1])
+    assert_allclose(spects[0].freq, serial_spect.freq)
+    for channel in ["X", "Y"]:
+        assert_allclose(spects[0].spectrograms[channel], serial_spect.spectrograms[channel])
+
+
+def create_batch_data_screen(path):
+    """Create a data screen object of a logger of the csv files in path."""
+
+    logger = LoggerProperties("dd10")
+    logger.logger_path = path
+    logger.file_ext = "csv"
+    logger.file_timestamp_format = "xxxxxYYYYxmmDDxHHMM"
+    logger.channel_header_row = 1
+    logger.num_headers = 2
+    logger.freq = 10
+    logger.get_filenames()
+    logger.set_files_to_process()
+
+    data_screen = DataScreen()
+    data_screen.set_logger(logger)
+
+    return data_screen
+
+
+def test_read_files_for_screening():
+    header = "Timestamp,AccelX,AccelY\n-,m/s2,m/s2\n"
+    with TempDirectory() as d:
+        d.write("dd10_2020_0101_0000.csv", (header + "2020-01-01 00:00:00,1.0,2.0\n").encode())
+        d.write("dd10_2020_0101_0001.csv", (header + "2020-01-01 00:01:00,3.0,4.0\n2020-01-01 00:01:01,5,6").encode())
+        d.write("dd10_2020_0101_0002.csv", (header + "2020-01-01 00:02:00,7.0,8.0\n").encode())
+        data_screen = create_batch_data_screen(d.path)
+
+        expected = [
+            read_file_for_screening(data_screen, file, j) for j, file in enumerate(data_screen.files)
+        ]
+        assert len(data_screen.read_logger_files(data_screen.files, data_screen.read_plan)) == 3
+
+        df_files = read_files_for_screening(data_screen, [0, 1, 2])
+        for df, df_expected in zip(df_files, expected):
+            assert_frame_equal(df, df_expected)
+
+        # Files with a different header or non-numeric data are read separately
+        d.write("dd10_2020_0101_0003.csv", (header.replace("AccelY", "RateY") + "2020-01-01 00:03:00,1,2\n").encode())
+        d.write("dd10_2020_0101_0004.csv", (header + "2020-01-01 00:04:00,1,bad\n").encode())
+        data_screen = create_batch_data_screen(d.path)
+        assert data_screen.read_logger_files(data_screen.files[2:4], data_screen.read_plan) is None
+        assert data_screen.read_logger_files(data_screen.files[3:], data_screen.read_plan) is None
+
+        expected = [
+            read_file_for_screening(data_screen, file, j) for j, file in enumerate(data_screen.files)
+        ]
+        df_files = read_files_for_screening(data_screen, [2, 3, 4])
+        for df, df_expected in zip(df_files, expected[2:]):
+            assert_frame_equal(df, df_expected)
+
+
+def screen_in_blocks(path, block_reading):
+    """Screen the stats, spectrograms and histograms of the csv files in path, reading whole files or in blocks."""
+
+    data_screen = create_batch_data_screen(path)
+    logger = data_screen.logger
+    logger.cols_to_process = [2, 3]
+    logger.all_channel_names = ["AccelX", "AccelY"]
+    logger.channel_names = ["AccelX", "AccelY"]
+    logger.channel_units = ["m/s2", "m/s2"]
+    logger.expected_data_points = 240
+    logger.stats_interval = 4
+    logger.spect_interval = 6
+    logger.psd_nperseg = 30
+    data_screen.set_logger(logger)
+    data_screen.stats_requested = True
+    data_screen.spect_requested = True
+    data_screen.histograms_requested = True
+
+    stats_screening = StatsScreening()
+    spect_screening = SpectralScreening()
+    histograms = CycleHistograms()
+    screen_logger_files(
+        data_screen, stats_screening, spect_screening, histograms, block_reading=block_reading
+    )
+
+    return data_screen, stats_screening, spect_screening, histograms
+
+
+@pytest.mark.parametrize("default_block_length, block_length", [(100000, 120), (100, 60)])
+def test_screen_logger_files_in_blocks(monkeypatch, default_block_length, block_length):
+    # Blocks shorter than the common multiple of the sample lengths split stats samples across blocks
+    monkeypatch.setattr(data_screen_module, "DEFAULT_BLOCK_LENGTH", default_block_length)
+    rng = np.random.default_rng(0)
+    with TempDirectory() as d:
+        # Second file is longer than expected so is not screened
+        for i, n in enumerate([240, 250, 240]):
+            t = pd.date_range(f"2020-01-01 00:0{i}", periods=n, freq="100ms")
+            df = pd.DataFrame({"Timestamp": t, "AccelX": rng.normal(size=n), "AccelY": rng.normal(size=n)})
+            text = "Timestamp,AccelX,AccelY\n-,m/s2,m/s2\n" + df.to_csv(index=False, header=False)
+            d.write(f"dd10_2020_0101_000{i}.csv", text.encode())
+
+        data_screen, stats_screening, spect_screening, histograms = screen_in_blocks(d.path, False)
+        blocks = screen_in_blocks(d.path, True)
+        block_data_screen, block_stats_screening, block_spect_screening, block_histograms = blocks
+
+    assert data_screen.screening_block_length() == block_length
+    assert block_data_screen.points_per_file == data_screen.points_per_file == [240, 250, 240]
+    assert block_data_screen.dict_bad_files == data_screen.dict_bad_files
+    assert block_data_screen.stats_sample_start == data_screen.stats_sample_start
+    assert block_data_screen.spect_file_nums == data_screen.spect_file_nums
+    assert_allclose(block_data_screen.cum_pts_per_channel, data_screen.cum_pts_per_channel)
+
+    assert len(stats_screening.stats_unfilt.mean) == 12
+    assert_allclose(block_stats_screening.stats_unfilt.std, stats_screening.stats_unfilt.std)
+    assert_allclose(block_stats_screening.stats_filt.max, stats_screening.stats_filt.max)
+    for channel, spect in spect_screening.spect_unfilt.spectrograms.items():
+        assert_allclose(block_spect_screening.spect_unfilt.spectrograms[channel], spect)
+    for channel, df_hist in histograms.dict_df_col_hists.items():
+        assert_frame_equal(block_histograms.dict_df_col_hists[channel], df_hist)
+
+
+def test_screening_block_length_of_nearly_coprime_sample_lengths():
+    data_screen = DataScreen()
+    data_screen.stats_requested = True
+    data_screen.spect_requested = True
+    data_screen.stats_sample_length = 6000
+    data_screen.spect_sample_length = 6001
+
+    # Limited to a multiple of the longest sample length rather than the common multiple of 36 million rows
+    assert data_screen.screening_block_length() == 16 * 6001
+
+    data_screen.spect_sample_length = 12000
+    assert data_screen.screening_block_length() == 12000
+
+
+def screen_read_ahead(path, prefetch_depth):
+    """Screen the stats of the csv files in path in trusted time grid mode, reading files ahead."""
+
+    data_screen = create_batch_data_screen(path)
+    logger = data_screen.logger
+    logger.cols_to_process = [2, 3]
+    logger.all_channel_names = ["Temp", "AccelY"]
+    logger.channel_names = ["Temp", "AccelY"]
+    logger.channel_units = ["C", "m/s2"]
+    logger.datetime_format = "%Y-%m-%d %H:%M:%S.%f"
+    logger.trusted_time_grid = True
+    logger.expected_data_points = 240
+    logger.stats_interval = 4
+    data_screen.set_logger(logger)
+    data_screen.encoding = "utf-8"
+    data_screen.stats_requested = True
+
+    stats_screening = StatsScreening()
+    screen_logger_files(data_screen, stats_screening, None, None, prefetch_depth=prefetch_depth)
+
+    return data_screen, stats_screening
+
+
+def test_screen_logger_files_read_ahead():
+    rng = np.random.default_rng(0)
+    with TempDirectory() as d:
+        # Files of mixed encodings (the degree sign is not valid utf-8 in latin1 files), a file with a gap in its
+        # timestamps and a file with an unexpected number of points
+        for i in range(8):
+            t = pd.date_range(f"2020-01-01 00:0{i}", periods=250 if i == 5 else 240, freq="100ms")
+            if i == 2:
+                t = t.delete(100).append(pd.DatetimeIndex([t[-1] + pd.Timedelta("100ms")]))
+            n = len(t)
+            df = pd.DataFrame({"Timestamp": t, "Temp": rng.normal(size=n), "AccelY": rng.normal(size=n)})
+            text = "Timestamp,Temp (\u00b0C),AccelY\n-,C,m/s2\n" + df.to_csv(index=False, header=False)
+            d.write(f"dd10_2020_0101_000{i}.csv", text.encode("latin1" if i % 3 == 1 else "utf-8"))
+
+        data_screen, stats_screening = screen_read_ahead(d.path, 0)
+        for _ in range(5):
+            ahead_data_screen, ahead_stats_screening = screen_read_ahead(d.path, 4)
+
+            assert list(ahead_data_screen.dict_bad_files.items()) == list(data_screen.dict_bad_files.items())
+            assert ahead_data_screen.file_read_errors == {}
+            assert ahead_data_screen.first_col == data_screen.first_col == "Timestamp"
+            assert ahead_data_screen.points_per_file == data_screen.points_per_file
+            assert_allclose(ahead_stats_screening.stats_unfilt.mean, stats_screening.stats_unfilt.mean)
+
+    assert list(data_screen.dict_bad_files.items()) == [
+        ("dd10_2020_0101_0002.csv", "Timestamps not on sample time grid"),
+        ("dd10_2020_0101_0005.csv", "Unexpected number of points"),
+    ]
+    assert data_screen.encoding == "latin1"
+    assert len(stats_screening.stats_unfilt.mean) == 42
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool executor that records the number of tasks submitted and the most tasks in flight."""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.num_tasks = 0
+        self.max_in_flight = 0
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = super().submit(fn, *args, **kwargs)
+        self.futures.append(future)
+        self.num_tasks += 1
+        self.max_in_flight = max(self.max_in_flight, sum(not f.done() for f in self.futures))
+
+        return future
+
+
+def test_screen_files_in_bounded_chunks():
+    rng = np.random.default_rng(0)
+    with TempDirectory() as d:
+        for i in range(10):
+            t = pd.date_range(f"2020-01-01 00:0{i}", periods=240, freq="100ms")
+            df = pd.DataFrame({"Timestamp": t, "AccelX": rng.normal(size=240), "AccelY": rng.normal(size=240)})
+            text = "Timestamp,AccelX,AccelY\n-,m/s2,m/s2\n" + df.to_csv(index=False, header=False)
+            d.write(f"dd10_2020_0101_000{i}.csv", text.encode())
+
+        data_screen = create_batch_data_screen(d.path)
+        logger = data_screen.logger
+        logger.cols_to_process = [2, 3]
+        logger.channel_names = ["AccelX", "AccelY"]
+        logger.expected_data_points = 240
+        logger.stats_interval = 4
+        data_screen.set_logger(logger)
+        data_screen.stats_requested = True
+
+        hub = ProcessingHub(Control())
+        files = list(range(1, 10))
+        serial_results = dict(hub._screen_files(0, data_screen, files, None, 1, lambda *args: None, None))
+        with CountingExecutor(max_workers=2) as executor:
+            results = dict(hub._screen_files(0, data_screen, files, executor, 2, lambda *args: None, None))
+
+    # Files are split into num_workers * 4 chunks with at most num_workers * 2 in flight
+    assert executor.num_tasks == 8
+    assert executor.max_in_flight <= 4
+    assert sorted(results) == files
+    for j, result in results.items():
+        assert result.data_screen.logger is None
+        assert result.data_screen.points_per_file == serial_results[j].data_screen.points_per_file
+        assert_allclose(result.stats_unfilt.mean, serial_results[j].stats_unfilt.mean)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,72 @@
+"""Tests for the memory budget routines."""
+__author__ = "Craig Dickinson"
+
+import pandas as pd
+import pytest
+from testfixtures import TempDirectory
+
+from core.memory_budget import MemoryBudget, MemorySizeError, SpillDict, parse_memory_size
+from core.read_ahead import read_ahead
+
+
+@pytest.mark.parametrize(
+    "size, num_bytes",
+    [
+        ("", None),
+        ("512", 512),
+        ("8G", 8 * 1024**3),
+        ("1.5gb", int(1.5 * 1024**3)),
+        ("64MiB", 64 * 1024**2),
+    ],
+)
+def test_parse_memory_size(size, num_bytes):
+    assert parse_memory_size(size) == num_bytes
+
+
+@pytest.mark.parametrize("size", ["8X", "G", "-1G"])
+def test_parse_invalid_memory_size(size):
+    with pytest.raises(MemorySizeError):
+        parse_memory_size(size)
+
+
+def test_memory_budget():
+    budget = MemoryBudget(100)
+    assert budget.try_acquire(60)
+    assert not budget.try_acquire(60)
+    budget.release(60)
+
+    # A request larger than the budget is granted when nothing is held
+    assert budget.try_acquire(150)
+    assert budget.used_bytes == 150
+
+
+def test_read_ahead_within_budget():
+    budget = MemoryBudget(100)
+    max_used = []
+
+    def read(x):
+        max_used.append(budget.used_bytes)
+        return x
+
+    results = list(read_ahead(read, range(10), depth=5, memory_budget=budget, item_bytes=40))
+    assert results == [(x, x) for x in range(10)]
+    assert max(max_used) <= 100
+    assert budget.used_bytes == 0
+
+
+def test_spill_dict():
+    with TempDirectory() as d:
+        spill_dict = SpillDict(d.path)
+        df = pd.DataFrame({"X": [1.0, 2.0]})
+        spill_dict["dd09"] = df
+        spill_dict.update({"dd10": df * 2})
+
+        assert list(spill_dict) == ["dd09", "dd10"]
+        pd.testing.assert_frame_equal(spill_dict["dd10"], df * 2)
+
+        del spill_dict["dd09"]
+        assert len(spill_dict) == 1
+
+
+if __name__ == "__main__":
+    pytest.main()
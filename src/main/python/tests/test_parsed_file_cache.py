@@ -0,0 +1,122 @@
+"""Tests for the parsed file cache."""
+__author__ = "Craig Dickinson"
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from core.logger_properties import LoggerProperties
+from core.parsed_file_cache import ParsedFileCache, load_frame, read_settings_key, save_frame
+
+
+def make_frame(n=100):
+    return pd.DataFrame(
+        {
+            "Timestamp": pd.date_range("2020-01-01", periods=n, freq="100ms"),
+            "AccelX": np.random.rand(n),
+            "AccelY": np.random.rand(n),
+        }
+    )
+
+
+def write_raw_file(folder, filename, text="raw data"):
+    filepath = os.path.join(folder, filename)
+    with open(filepath, "w") as f:
+        f.write(text)
+
+    return filepath
+
+
+def test_save_load_frame(temp_dir):
+    df = make_frame()
+    filepath = os.path.join(temp_dir.path, "df.npz")
+
+    assert save_frame(filepath, df)
+    assert_frame_equal(load_frame(filepath), df)
+
+
+def test_save_load_multi_header_frame(temp_dir):
+    cols = pd.MultiIndex.from_tuples([("AccelX", "m/s^2"), ("AccelY", "m/s^2")])
+    df = pd.DataFrame(np.random.rand(10, 2), columns=cols, index=np.arange(10) * 0.1)
+    df.columns.names = ["Channel", "Unit"]
+    filepath = os.path.join(temp_dir.path, "df.npz")
+
+    assert save_frame(filepath, df)
+    assert_frame_equal(load_frame(filepath), df)
+
+
+def test_object_columns_not_saved(temp_dir):
+    df = pd.DataFrame({"Timestamp": ["a", "b"], "AccelX": [1.0, 2.0]})
+
+    assert not save_frame(os.path.join(temp_dir.path, "df.npz"), df)
+
+
+def test_cache_hit_and_miss(temp_dir):
+    raw_file = write_raw_file(temp_dir.path, "dd10_2020_0101_0000.csv")
+    cache = ParsedFileCache(os.path.join(temp_dir.path, "cache"))
+    key = read_settings_key(LoggerProperties(), "screening")
+    df = make_frame()
+
+    assert cache.get(raw_file, key) is None
+    cache.put(raw_file, key, df)
+    assert_frame_equal(cache.get(raw_file, key), df)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Different read settings
+    logger = LoggerProperties()
+    logger.cols_to_process = [2]
+    assert cache.get(raw_file, read_settings_key(logger, "screening")) is None
+
+    # Different detected file encoding
+    logger = LoggerProperties()
+    logger.file_encoding = "latin1"
+    assert cache.get(raw_file, read_settings_key(logger, "screening")) is None
+
+    # Cached files are found by a new cache object of the same folder
+    cache = ParsedFileCache(os.path.join(temp_dir.path, "cache"))
+    assert_frame_equal(cache.get(raw_file, key), df)
+
+
+def test_changed_raw_file_not_loaded(temp_dir):
+    raw_file = write_raw_file(temp_dir.path, "dd10_2020_0101_0000.csv")
+    cache = ParsedFileCache(os.path.join(temp_dir.path, "cache"))
+    cache.put(raw_file, "key", make_frame())
+
+    write_raw_file(temp_dir.path, "dd10_2020_0101_0000.csv", "changed raw data")
+    assert cache.get(raw_file, "key") is None
+
+
+def test_file_stream_not_cached(temp_dir):
+    cache = ParsedFileCache(os.path.join(temp_dir.path, "cache"))
+
+    with open(write_raw_file(temp_dir.path, "dd10_2020_0101_0000.csv"), "rb") as f:
+        cache.put(f, "key", make_frame())
+        assert cache.get(f, "key") is None
+
+    assert cache.total_bytes == 0
+
+
+def test_least_recently_used_files_evicted(temp_dir):
+    raw_files = [write_raw_file(temp_dir.path, f"dd10_2020_0101_000{i}.csv") for i in range(3)]
+    df = make_frame()
+    cache = ParsedFileCache(os.path.join(temp_dir.path, "cache"))
+    cache.put(raw_files[0], "key", df)
+    file_bytes = cache.total_bytes
+
+    # Cache size limited to two files
+    cache.max_bytes = int(2.5 * file_bytes)
+    cache.put(raw_files[1], "key", df)
+    cache.get(raw_files[0], "key")
+    cache.put(raw_files[2], "key", df)
+
+    assert cache.get(raw_files[1], "key") is None
+    assert cache.get(raw_files[0], "key") is not None
+    assert cache.get(raw_files[2], "key") is not None
+    assert len(os.listdir(cache.cache_path)) == 2
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,64 @@
+"""Tests for the processing hub command line interface."""
+__author__ = "Craig Dickinson"
+
+import pytest
+from testfixtures import TempDirectory
+
+from core.control import Control
+from core.memory_budget import SpillDict
+from core.processing_hub import ProcessingHub, parse_args
+
+
+def test_parse_args_defaults():
+    args = parse_args(["project_config.json"])
+    assert args.config_file == "project_config.json"
+    assert args.mode == "screening"
+    assert args.parallel_mode is None
+    assert args.num_workers is None
+    assert args.prefetch_depth is None
+
+
+def test_parse_args_overrides():
+    args = parse_args(
+        ["project_config.json", "-m", "integration", "--parallel-mode", "Files", "-j", "8"]
+    )
+    assert args.mode == "integration"
+    assert args.parallel_mode == "Files"
+    assert args.num_workers == 8
+
+
+def test_parse_args_invalid_mode():
+    with pytest.raises(SystemExit):
+        parse_args(["project_config.json", "-m", "plotting"])
+
+
+def test_num_workers_resolved_at_run_time(monkeypatch):
+    control = Control()
+    assert control.num_workers == 0
+
+    monkeypatch.setattr("os.cpu_count", lambda: 6)
+    assert control.get_num_workers() == 6
+
+    control.num_workers = 2
+    assert control.get_num_workers() == 2
+
+
+def test_run_screening_with_memory_budget_and_no_loggers():
+    with TempDirectory() as d:
+        control = Control()
+        control.project_path = d.path
+        control.set_output_paths()
+        control.max_memory = "1G"
+        hub = ProcessingHub(control)
+
+        # Results of a previous run are cleared
+        hub.dict_histograms = SpillDict(d.getpath("Spill"))
+        hub.dict_histograms["dd10"] = {}
+        hub.run_screening()
+
+    assert hub.data_screen_sets == []
+    assert hub.dict_histograms == {}
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,37 @@
+"""Tests for the read-ahead file reading pipeline."""
+__author__ = "Craig Dickinson"
+
+import time
+
+import pytest
+
+from core.read_ahead import read_ahead
+
+
+def slow_square(x):
+    # Make earlier items slower so that reads complete out of order
+    time.sleep(0.01 * (5 - x))
+    return x * x
+
+
+@pytest.mark.parametrize("depth", [0, 1, 3, 10])
+def test_read_ahead_order(depth):
+    results = list(read_ahead(slow_square, range(5), depth))
+    assert results == [(0, 0), (1, 1), (2, 4), (3, 9), (4, 16)]
+
+
+def test_read_ahead_raises_read_error():
+    def read(x):
+        if x == 2:
+            raise ValueError("Bad file")
+        return x
+
+    gen = read_ahead(read, range(5), depth=2)
+    assert next(gen) == (0, 0)
+    assert next(gen) == (1, 1)
+    with pytest.raises(ValueError):
+        next(gen)
+
+
+if __name__ == "__main__":
+    pytest.main()
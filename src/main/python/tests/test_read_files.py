@@ -0,0 +1,100 @@
+"""Tests for the time series file readers."""
+__author__ = "Craig Dickinson"
+
+import numpy as np
+import pandas as pd
+import pytest
+from testfixtures import TempDirectory
+
+from core.read_files import (
+    detect_encoding,
+    read_2hps2_acc,
+    read_2hps2_acc_blocks,
+    read_pulse_acc,
+    read_pulse_acc_blocks,
+)
+
+BODY = "  0.00   0.100000  9.810000\n  0.01   0.200000  9.820000\n  0.02   0.300000  9.830000\n"
+
+
+@pytest.fixture
+def pulse_acc_file():
+    headers = [f"%Header line {i}" for i in range(1, 21)]
+    headers[17] = "%Data,AccX (m/s^2): AccY (m/s^2)"
+    headers[19] = "%StartTime, 5 30 16 7 6 2018"
+
+    with TempDirectory() as d:
+        yield d.write("MPOD001_2018_06_07_16_30.ACC", "\n".join(headers) + "\n" + BODY, "utf-8")
+
+
+@pytest.fixture
+def hps2_acc_file():
+    headers = [f"Header line {i}" for i in range(1, 28)]
+    headers[15] = "Time, AccX, AccY"
+    headers[16] = "(s), AccX (m/s^2), AccY (m/s^2)"
+    headers[19] = "Start time of record is 5 30 16 7 6 2018"
+
+    with TempDirectory() as d:
+        yield d.write(
+            "SMA0096_0000_2018_06_07_16_30.Acc", "\n".join(headers) + "\n" + BODY, "utf-8"
+        )
+
+
+@pytest.mark.parametrize("read_acc", [read_pulse_acc, read_2hps2_acc])
+def test_read_acc_multi_header(read_acc, pulse_acc_file, hps2_acc_file):
+    filename = pulse_acc_file if read_acc is read_pulse_acc else hps2_acc_file
+    df = read_acc(filename, multi_header=True)
+
+    assert list(df.columns) == [("Timestamp", ""), ("AccX", "m/s^2"), ("AccY", "m/s^2")]
+    assert df.index.name == "Time (s)"
+    np.testing.assert_array_equal(df.index, [0, 0.01, 0.02])
+    assert df.iloc[1, 0] == pd.Timestamp(2018, 6, 7, 16, 30, 5, 10000)
+    np.testing.assert_array_equal(df[("AccY", "m/s^2")], [9.81, 9.82, 9.83])
+
+
+@pytest.mark.parametrize("read_acc", [read_pulse_acc, read_2hps2_acc])
+def test_read_acc_single_header(read_acc, pulse_acc_file, hps2_acc_file):
+    filename = pulse_acc_file if read_acc is read_pulse_acc else hps2_acc_file
+    df = read_acc(filename, multi_header=False)
+
+    assert list(df.columns) == ["Timestamp", "AccX", "AccY"]
+    assert isinstance(df.index, pd.RangeIndex)
+    assert df["Timestamp"].dtype == "datetime64[ns]"
+    assert df.iloc[2, 0] == pd.Timestamp(2018, 6, 7, 16, 30, 5, 20000)
+    np.testing.assert_array_equal(df["AccX"], [0.1, 0.2, 0.3])
+
+
+@pytest.mark.parametrize("read_acc", [read_pulse_acc, read_2hps2_acc])
+def test_read_acc_columns(read_acc, pulse_acc_file, hps2_acc_file):
+    filename = pulse_acc_file if read_acc is read_pulse_acc else hps2_acc_file
+    df = read_acc(filename, multi_header=False)
+    df_cols = read_acc(filename, multi_header=False, usecols=[0, 2])
+
+    pd.testing.assert_frame_equal(df_cols, df[["Timestamp", "AccY"]])
+
+
+@pytest.mark.parametrize(
+    "read_acc, read_acc_blocks",
+    [(read_pulse_acc, read_pulse_acc_blocks), (read_2hps2_acc, read_2hps2_acc_blocks)],
+)
+def test_read_acc_blocks(read_acc, read_acc_blocks, pulse_acc_file, hps2_acc_file):
+    filename = pulse_acc_file if read_acc is read_pulse_acc else hps2_acc_file
+    df = read_acc(filename, multi_header=False, usecols=[0, 2])
+    blocks = list(read_acc_blocks(filename, 2, usecols=[0, 2]))
+
+    assert [len(block) for block in blocks] == [2, 1]
+    pd.testing.assert_frame_equal(pd.concat(blocks), df)
+
+
+def test_detect_encoding():
+    assert detect_encoding(b"Time,AccelX\n0,1.0\n", default="latin1") == "latin1"
+    assert detect_encoding("Time,Temp (\u00b0C)\n".encode("utf-8")) == "utf-8"
+    assert detect_encoding("Time,Temp (\u00b0C)\n".encode("latin1")) == "latin1"
+    assert detect_encoding(b"\xef\xbb\xbfTime,AccelX\n", default="latin1") == "utf-8"
+
+    # Multi-byte character cut off at the end of the sample
+    assert detect_encoding("Time,Temp (\u00b0C)".encode("utf-8")[:-4]) == "utf-8"
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,128 @@
+"""Tests for the incremental screening manifest."""
+__author__ = "Craig Dickinson"
+
+import os
+import unittest
+
+import pytest
+from testfixtures import TempDirectory
+
+from core.data_screen import DataScreen
+from core.logger_properties import LoggerProperties
+from core.logger_screening import LoggerScreeningResult
+from core.screening_manifest import ScreeningManifest, screening_fingerprint
+
+
+class TestScreeningManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TempDirectory()
+        self.cache_dir = self.temp_dir.makedir("cache")
+        self.filepath = self.temp_dir.write("dd09/dd09_2016_0317_0000.csv", b"1,2,3\n")
+
+        self.data_screen = DataScreen()
+        self.data_screen.logger = LoggerProperties("dd09")
+        self.data_screen.logger_id = "dd09"
+        self.data_screen.files = [self.filepath]
+
+    def tearDown(self):
+        self.temp_dir.cleanup_all()
+
+    def _cache_result(self):
+        result = LoggerScreeningResult(DataScreen(), None, None, None)
+        result.data_screen.points_per_file = [3]
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.add_result(0, 1, result)
+        manifest.save()
+
+    def test_unchanged_file_result_reused(self):
+        self._cache_result()
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.load()
+        result = manifest.get_result(0, 1)
+        self.assertEqual(result.data_screen.points_per_file, [3])
+
+    def test_changed_file_result_not_reused(self):
+        self._cache_result()
+        with open(self.filepath, "ab") as f:
+            f.write(b"4,5,6\n")
+
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.load()
+        self.assertIsNone(manifest.get_result(0, 1))
+
+    def test_changed_file_number_not_reused(self):
+        self._cache_result()
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.load()
+        self.assertIsNone(manifest.get_result(0, 2))
+
+    def test_changed_settings_discard_manifest(self):
+        self._cache_result()
+        fingerprint = screening_fingerprint(self.data_screen)
+        self.data_screen.logger.stats_interval = 60
+        self.assertNotEqual(screening_fingerprint(self.data_screen), fingerprint)
+
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.load()
+        self.assertEqual(manifest.files, {})
+        self.assertTrue(os.path.exists(manifest.manifest_file))
+
+    def test_changed_file_encoding_discards_manifest(self):
+        self._cache_result()
+        self.data_screen.logger.file_encoding = "latin1"
+
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.load()
+        self.assertEqual(manifest.files, {})
+
+    def test_changed_working_precision_rescreens_all_files(self):
+        self.data_screen.files.append(self.temp_dir.write("dd09/dd09_2016_0317_0010.csv", b"4,5,6\n"))
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        for j in range(2):
+            manifest.add_result(j, j + 1, LoggerScreeningResult(DataScreen(), None, None, None))
+        manifest.save()
+
+        self.data_screen.working_precision = "float32"
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.load()
+        self.assertIsNone(manifest.get_result(0, 1))
+        self.assertIsNone(manifest.get_result(1, 2))
+
+    def test_files_of_the_same_name_have_separate_results(self):
+        self.data_screen.logger.logger_path = os.path.dirname(self.filepath)
+        self.data_screen.files = [
+            self.filepath,
+            self.temp_dir.write("dd09/dd09_2016_0317_0000.txt", b"4,5,6\n"),
+            self.temp_dir.write("dd09/sub/dd09_2016_0317_0000.csv", b"7,8,9\n"),
+        ]
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        for j in range(3):
+            result = LoggerScreeningResult(DataScreen(), None, None, None)
+            result.data_screen.points_per_file = [j]
+            manifest.add_result(j, j + 1, result)
+        manifest.save()
+
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.load()
+        self.assertEqual(len(manifest.files), 3)
+        for j in range(3):
+            self.assertEqual(manifest.get_result(j, j + 1).data_screen.points_per_file, [j])
+
+    def test_overwritten_blob_not_reused(self):
+        logger = self.data_screen.logger
+        logger.data_on_azure = True
+        logger.blobs = ["dd09/dd09_2016_0317_0000.csv"]
+        logger.blob_etags = {"dd09/dd09_2016_0317_0000.csv": '"1"'}
+        self._cache_result()
+
+        manifest = ScreeningManifest(self.cache_dir, self.data_screen)
+        manifest.load()
+        self.assertIsNotNone(manifest.get_result(0, 1))
+
+        # A blob overwritten under the same name has a new ETag
+        logger.blob_etags = {"dd09/dd09_2016_0317_0000.csv": '"2"'}
+        self.assertIsNone(manifest.get_result(0, 1))
+
+
+if __name__ == "__main__":
+    pytest.main()
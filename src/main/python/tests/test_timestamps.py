@@ -0,0 +1,88 @@
+"""Tests for the vectorised timestamp routines."""
+
+__author__ = "Craig Dickinson"
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.custom_date import get_datetime_format
+from core.timestamps import (
+    compile_datetime_format,
+    parse_timestamps,
+    time_grid_timestamps,
+    timestamps_from_offsets,
+)
+
+
+def test_timestamps_from_offsets_match_timedelta():
+    dt_start = datetime(2018, 6, 7, 16, 30, 5)
+    time_steps = np.arange(180000) * 0.01
+    expected = [dt_start + timedelta(seconds=t) for t in time_steps]
+
+    np.testing.assert_array_equal(
+        timestamps_from_offsets(dt_start, time_steps), np.array(expected, dtype="datetime64[ns]")
+    )
+
+
+@pytest.mark.parametrize(
+    "timestamp_format, datetime_format",
+    [
+        ("dd-mmm-yyyy HH:MM:SS.FFF", "%d-%b-%Y %H:%M:%S.%f"),
+        ("yyyy-mm-dd HH:MM:SS", "%Y-%m-%d %H:%M:%S"),
+        ("dd/mm/yy HH:MM:SS.FFF", "%d/%m/%y %H:%M:%S.%f"),
+    ],
+)
+def test_parse_timestamps_match_pandas(timestamp_format, datetime_format):
+    assert get_datetime_format(timestamp_format) == datetime_format
+    t = pd.date_range("2016-02-28 23:59", periods=2000, freq="100ms")
+    values = pd.Series(t.strftime(datetime_format))
+
+    np.testing.assert_array_equal(
+        parse_timestamps(values, datetime_format),
+        pd.to_datetime(values, format=datetime_format).values,
+    )
+
+
+def test_parse_timestamps_fraction_lengths():
+    values = np.array(["17-Mar-2016 00:00:00.1", "17-MAR-2016 00:00:00.123456789"], dtype=object)
+    expected = pd.to_datetime(values, format="%d-%b-%Y %H:%M:%S.%f").values
+
+    np.testing.assert_array_equal(parse_timestamps(values, "%d-%b-%Y %H:%M:%S.%f"), expected)
+
+
+def test_parse_invalid_timestamps():
+    values = np.array(["17/03/2016 00:00:00", "30/02/2016 00:00:00", "bad", np.nan], dtype=object)
+    df = parse_timestamps(values, "%d/%m/%Y %H:%M:%S", errors="coerce")
+
+    assert df[0] == np.datetime64("2016-03-17")
+    assert np.isnat(df[1:]).all()
+
+    with pytest.raises(ValueError):
+        parse_timestamps(values, "%d/%m/%Y %H:%M:%S")
+
+
+def test_time_grid_timestamps():
+    t = pd.date_range("2016-03-17 01:00", periods=1000, freq="50ms")
+    values = t.strftime("%d-%b-%Y %H:%M:%S.%f").values
+
+    np.testing.assert_array_equal(
+        time_grid_timestamps(values, "%d-%b-%Y %H:%M:%S.%f", 20), t.values
+    )
+    assert time_grid_timestamps(values, "%d-%b-%Y %H:%M:%S.%f", 10) is None
+    assert time_grid_timestamps(np.delete(values, 500), "%d-%b-%Y %H:%M:%S.%f", 20) is None
+
+
+def test_formats_not_compiled():
+    assert compile_datetime_format("%Y-%m-%d %H:%M:%S.%f") is None
+    assert compile_datetime_format("%d %B %Y") is None
+    assert compile_datetime_format("%H:%M:%S") is None
+
+    values = ["17 March 2016"]
+    assert parse_timestamps(values, "%d %B %Y")[0] == np.datetime64("2016-03-17")
+
+
+if __name__ == "__main__":
+    pytest.main()
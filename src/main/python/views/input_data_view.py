@@ -6,13 +6,14 @@ import logging
 import os
 import sys
 from datetime import datetime
-from glob import glob
 
 from PyQt5 import QtGui, QtWidgets
 from PyQt5.QtCore import Qt, pyqtSlot
 
+from core.blob_listing import get_listings_path
 from core.calc_seascatter import Seascatter
 from core.calc_transfer_functions import TransferFunctions
+from core.compressed_files import inner_filename, list_raw_files
 from core.control import Control, InputError
 from core.custom_date import get_datetime_format
 from core.custom_exception_logger import set_exception_logger_file_handler
@@ -1624,13 +1625,13 @@ class EditLoggerPropertiesDialog(QtWidgets.QDialog):
             msg = "Logger path does not exist. Set a logger path first."
             return QtWidgets.QMessageBox.information(self, "Detect File Timestamp Format", msg)
 
-        raw_files = glob(logger_path + "/*." + self.fileExt.text())
+        raw_files = list_raw_files(logger_path, self.fileExt.text())
         if not raw_files:
             msg = f"No files found in {logger_path}"
             return QtWidgets.QMessageBox.information(self, "Detect File Timestamp Format", msg)
 
-        # Attempt to decipher file timestamp format code (e.g. xxxxYYYYxmmDDxHHMM)
-        test_filename = os.path.basename(raw_files[0])
+        # Attempt to decipher file timestamp format code (e.g. xxxxYYYYxmmDDxHHMM) of the (uncompressed) filename
+        test_filename = inner_filename(raw_files[0])
         file_timestamp_format = detect_file_timestamp_format(test_filename)
 
         # Test file timestamp format code
@@ -1796,6 +1797,7 @@ class EditLoggerPropertiesDialog(QtWidgets.QDialog):
             logger.data_on_azure = True
             logger.azure_account_name = self.control.azure_account_name
             logger.azure_account_key = self.control.azure_account_key
+            logger.azure_listings_path = get_listings_path(self.control)
         else:
             logger.data_on_azure = False
 
@@ -136,6 +136,7 @@ class DataLabGui(QtWidgets.QMainWindow):
         self.processScreeningAction.setShortcut("F6")
         self.runIntegrationAction = QtWidgets.QAction("Run Time Series Integration")
         self.runIntegrationAction.setShortcut("F7")
+        self.watchLoggersAction = QtWidgets.QAction("Watch Logger Folders")
         self.calcSeascatterAction = QtWidgets.QAction("Create Seascatter")
         self.calcSeascatterAction.setShortcut("F8")
         self.calcTFAction = QtWidgets.QAction("Calculate Transfer Functions")
@@ -144,6 +145,7 @@ class DataLabGui(QtWidgets.QMainWindow):
         self.calcFatigueAction.setShortcut("F10")
         self.menuProcess.addAction(self.processScreeningAction)
         self.menuProcess.addAction(self.runIntegrationAction)
+        self.menuProcess.addAction(self.watchLoggersAction)
         self.menuProcess.addAction(self.calcSeascatterAction)
         self.menuProcess.addAction(self.calcTFAction)
         self.menuProcess.addAction(self.calcFatigueAction)
@@ -14,7 +14,10 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
 from core.azure_cloud_storage import connect_to_azure_account, stream_blob
+from core.blob_cache import create_blob_cache
+from core.campaign_store import open_campaign_store, raw_file_properties
 from core.control import Control
+from core.parsed_file_cache import create_parsed_file_cache
 from core.raw_data_plot_properties import RawDataPlotProperties, RawDataRead
 from core.signal_processing import (
     add_signal_mean,
@@ -617,20 +620,44 @@ class RawDataDashboard(QtWidgets.QWidget):
         logger = self.control.loggers[i]
 
         try:
-            # Get filestream from Azure
+            # Blob name of the file on Azure or local file path
             if logger.data_on_azure:
                 blob_idx = logger.raw_filenames.index(filename)
                 blob = logger.blobs[blob_idx]
-                bloc_blob_service = connect_to_azure_account(
-                    self.control.azure_account_name, self.control.azure_account_key
-                )
-                filepath = stream_blob(bloc_blob_service, logger.container_name, blob)
+                filepath = None
             else:
+                blob = None
                 srs = self._get_series()
                 filepath = os.path.join(srs.path_to_files, filename)
 
+            # Read from the logger campaign store if the file has been ingested and is unchanged since
+            # (files with a units header are read from the raw file to show the units of each file)
+            campaign_store = None
+            if not dataset.has_units_header:
+                campaign_store = open_campaign_store(self.control, logger)
+            if campaign_store is not None:
+                with campaign_store:
+                    # Store files are named by the file basename (zip archive members are stored by member name)
+                    store_filename = os.path.basename(filename)
+                    properties = raw_file_properties(logger, filepath, blob)
+                    if campaign_store.has_file(store_filename, properties):
+                        return dataset.read_store_file(campaign_store, store_filename)
+
+            # Get filestream from Azure
+            if logger.data_on_azure:
+                bloc_blob_service = connect_to_azure_account(
+                    self.control.azure_account_name, self.control.azure_account_key
+                )
+
+                # Read from the blob cache if enabled
+                blob_cache = create_blob_cache(self.control)
+                if blob_cache is not None:
+                    filepath = blob_cache.open(bloc_blob_service, logger.container_name, blob)
+                else:
+                    filepath = stream_blob(bloc_blob_service, logger.container_name, blob)
+
             # Read file from either local file path or Azure file stream
-            df = dataset.read_file(filepath)
+            df = dataset.read_file(filepath, create_parsed_file_cache(self.control))
 
             return df
         except FileNotFoundError as e: